@@ -0,0 +1,259 @@
+import errno
+import os
+import shutil
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from manifest import hash_file
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+COPY_MODES = ("copy", "hardlink", "reflink")
+
+# ioctl request that clones a file's extents on Linux (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+# errno values meaning a kernel-side copy is unsupported for these files
+_UNSUPPORTED_COPY_ERRORS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+
+
+class SyncReport:
+    """
+    Relative paths of the files touched by a directory sync.
+    """
+
+    def __init__(self):
+        self.added = []
+        self.updated = []
+        self.removed = []
+        self.unchanged = 0
+
+    @property
+    def changed(self):
+        return bool(self.added or self.updated or self.removed)
+
+    def summary(self):
+        return (
+            f"{len(self.added)} added, {len(self.updated)} updated, "
+            f"{len(self.removed)} removed, {self.unchanged} unchanged"
+        )
+
+    def __repr__(self):
+        return f"SyncReport({self.summary()})"
+
+
+def file_changed(src_stat, src_path, dest_path, checksum=False):
+    """
+    Return True if dest_path is missing or differs from src_path.
+
+    Files of different sizes always differ. Otherwise the contents are
+    compared by hash when checksum is set, and by modification time when not
+    (copy2 preserves mtimes, so an unchanged copy has the source's mtime).
+    """
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return True
+    if dest_stat.st_size != src_stat.st_size:
+        return True
+    if checksum:
+        return hash_file(src_path) != hash_file(dest_path)
+    return dest_stat.st_mtime_ns != src_stat.st_mtime_ns
+
+
+def _kernel_copy(src_file, dest_file):
+    # Copy with copy_file_range or sendfile so the data never passes through
+    # user space, falling back to a buffered copy where neither works
+    with open(src_file, 'rb') as src, open(dest_file, 'wb') as dest:
+        remaining = os.fstat(src.fileno()).st_size
+        offset = 0
+        for copy in (_copy_file_range, _sendfile):
+            try:
+                while remaining > 0:
+                    sent = copy(src.fileno(), dest.fileno(), offset, remaining)
+                    if sent == 0:
+                        break
+                    offset += sent
+                    remaining -= sent
+                return
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED_COPY_ERRORS or offset:
+                    raise
+        shutil.copyfileobj(src, dest)
+
+
+def _copy_file_range(src_fd, dest_fd, offset, count):
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(errno.ENOSYS, "copy_file_range is not available")
+    return os.copy_file_range(src_fd, dest_fd, count, offset, offset)
+
+
+def _sendfile(src_fd, dest_fd, offset, count):
+    if not hasattr(os, "sendfile"):
+        raise OSError(errno.ENOSYS, "sendfile is not available")
+    return os.sendfile(dest_fd, src_fd, offset, count)
+
+
+def _reflink(src_file, dest_file):
+    if fcntl is None:
+        raise OSError(errno.ENOSYS, "reflinks are not available")
+    with open(src_file, 'rb') as src, open(dest_file, 'wb') as dest:
+        fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+
+
+def _same_file(src_file, dest_file):
+    try:
+        dest_stat = os.stat(dest_file)
+    except FileNotFoundError:
+        return False
+    src_stat = os.stat(src_file)
+    return (src_stat.st_ino, src_stat.st_dev) == (dest_stat.st_ino, dest_stat.st_dev)
+
+
+def copy_file(src_file, dest_file, mode="copy"):
+    """
+    Copy a file and its metadata, like shutil.copy2.
+
+    In "hardlink" mode the destination becomes a hard link to the source
+    (so it must never be edited in place); in "reflink" mode it shares the
+    source's extents copy-on-write. Both fall back to a kernel-side copy
+    when the files are on different filesystems or the filesystem does not
+    support them.
+
+    Args:
+    src_file (str): Path to the source file
+    dest_file (str): Path to the destination file
+    mode (str): One of COPY_MODES
+
+    Returns:
+    str: The mode that was actually used
+    """
+    if mode not in COPY_MODES:
+        raise ValueError(f"Invalid copy mode: {mode}")
+    if mode != "hardlink" and _same_file(src_file, dest_file):
+        # dest_file is a hard link left by an earlier hardlink build: opening
+        # it for writing would truncate the source, so write a new file
+        os.remove(dest_file)
+    if mode == "hardlink":
+        if os.path.lexists(dest_file):
+            os.remove(dest_file)
+        try:
+            os.link(src_file, dest_file)
+            return mode
+        except OSError:
+            pass
+    elif mode == "reflink":
+        try:
+            _reflink(src_file, dest_file)
+            shutil.copystat(src_file, dest_file)
+            return mode
+        except OSError:
+            pass
+    _kernel_copy(src_file, dest_file)
+    shutil.copystat(src_file, dest_file)
+    return "copy"
+
+
+def copy_files(copies, mode="copy", workers=1, copy=None):
+    """
+    Copy many files, overlapping up to workers copies on a thread pool.
+
+    Args:
+    copies (list): (src_file, dest_file) tuples
+    mode (str): One of COPY_MODES
+    workers (int): Number of copies in flight at once
+    copy (callable): Called with (src_file, dest_file, mode) to copy each
+        file, copy_file by default
+
+    Yields:
+    tuple: Each (src_file, dest_file) once copied, in the order given
+    """
+    if copy is None:
+        copy = copy_file
+    if workers <= 1 or len(copies) <= 1:
+        for src_file, dest_file in copies:
+            copy(src_file, dest_file, mode)
+            yield src_file, dest_file
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(copy, src_file, dest_file, mode)
+            for src_file, dest_file in copies
+        ]
+        for future, paths in zip(futures, copies):
+            future.result()
+            yield paths
+
+
+def sync_directory(source, destination, checksum=False, preserve=None, mode="copy", workers=1, copy=None):
+    """
+    Make destination match source, copying only new or changed files and
+    removing only files that no longer exist in source.
+
+    Args:
+    source (str): Path to the source directory
+    destination (str): Path to the destination directory
+    checksum (bool): Compare file contents by hash rather than mtime
+    preserve (callable): Called with a path relative to destination; files
+        for which it returns True are never removed (e.g. generated pages)
+    mode (str): How files are copied, one of COPY_MODES
+    workers (int): Number of files copied concurrently
+    copy (callable): Called with (src_file, dest_file, mode) to copy each
+        file, copy_file by default
+
+    Returns:
+    SyncReport: The files that were added, updated and removed
+    """
+    report = SyncReport()
+    os.makedirs(destination, exist_ok=True)
+
+    source_files = set()
+    pending = []
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        rel_root = os.path.relpath(root, source)
+        dest_root = os.path.normpath(os.path.join(destination, rel_root))
+        os.makedirs(dest_root, exist_ok=True)
+        for file_name in sorted(files):
+            src_file = os.path.join(root, file_name)
+            rel_path = os.path.normpath(os.path.join(rel_root, file_name))
+            dest_file = os.path.join(dest_root, file_name)
+            source_files.add(rel_path)
+            src_stat = os.stat(src_file)
+            if not file_changed(src_stat, src_file, dest_file, checksum):
+                report.unchanged += 1
+                continue
+            pending.append((rel_path, os.path.exists(dest_file)))
+
+    copies = [
+        (os.path.join(source, rel_path), os.path.join(destination, rel_path))
+        for rel_path, _ in pending
+    ]
+    for (_, dest_file), (rel_path, existed) in zip(copy_files(copies, mode, workers, copy), pending):
+        if existed:
+            report.updated.append(rel_path)
+            logging.info(f"Updated file: {dest_file}")
+        else:
+            report.added.append(rel_path)
+            logging.info(f"Copied file: {dest_file}")
+
+    for root, dirs, files in os.walk(destination, topdown=False):
+        rel_root = os.path.relpath(root, destination)
+        for file_name in sorted(files):
+            rel_path = os.path.normpath(os.path.join(rel_root, file_name))
+            if rel_path in source_files or (preserve is not None and preserve(rel_path)):
+                continue
+            dest_file = os.path.join(root, file_name)
+            os.remove(dest_file)
+            report.removed.append(rel_path)
+            logging.info(f"Removed file: {dest_file}")
+        if (
+            rel_root != os.curdir
+            and not os.listdir(root)
+            and not os.path.isdir(os.path.join(source, rel_root))
+        ):
+            os.rmdir(root)
+
+    return report
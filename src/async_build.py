@@ -0,0 +1,199 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from build import (
+    _worker_cache,
+    cache_lookups,
+    plan_pages,
+    remove_stale_pages,
+    render_page,
+    report_cache_lookups,
+)
+from manifest import BuildManifest, default_manifest_path
+from markdown_blocks import BlockCache
+from profiling import BuildProfiler
+from render_cache import RenderCache
+from sinks import DIRECTORY_SINK, MemorySink
+from sources import MappingSource
+from template import load_template
+
+
+def read_markdown(path):
+    with open(path, 'r') as md_file:
+        return md_file.read()
+
+
+def write_page(dest_path, html, sink=DIRECTORY_SINK):
+    sink.write_bytes(dest_path, html)
+
+
+def render_markdown(from_path, markdown, template_path, profiler=None, block_cache=None, render_cache=None):
+    """
+    Render markdown into a template with build.render_page, without
+    touching the filesystem (beyond loading the compiled template).
+
+    Returns:
+    tuple: (full HTML as UTF-8 bytes, list of warning messages)
+    """
+    sink = MemorySink()
+    warnings = render_page(
+        from_path, load_template(template_path), from_path, profiler, block_cache,
+        render_cache, sink, MappingSource({from_path: markdown}),
+    )
+    return sink.files[from_path], warnings
+
+
+def _render_markdown_task(from_path, markdown, template_path, profiler_settings, block_cache_size, render_cache_dir):
+    # render_markdown in a worker process, which keeps its own caches like
+    # the workers of build.render_pages_parallel
+    profiler = BuildProfiler(*profiler_settings) if profiler_settings is not None else None
+    render_cache = RenderCache(render_cache_dir) if render_cache_dir is not None else None
+    block_cache = _worker_cache(block_cache_size)
+    hits, misses = block_cache.hits, block_cache.misses
+    html, warnings = render_markdown(from_path, markdown, template_path, profiler, block_cache, render_cache)
+    lookups = {"block_cache": (block_cache.hits - hits, block_cache.misses - misses)}
+    if render_cache is not None:
+        lookups["render_cache"] = (render_cache.hits, render_cache.misses, render_cache.writes)
+    return html, warnings, profiler.pages if profiler is not None else [], lookups
+
+
+async def generate_pages_async(dir_path_content, template_path, dest_dir_path, incremental=True,
+                               manifest_path=None, jobs=1, io_workers=16, max_in_flight=64,
+                               profiler=None, block_cache=None, render_cache=None, sink=None):
+    """
+    Generate pages like generate_pages_recursive, overlapping file I/O with
+    rendering.
+
+    Each page is read on a pool of ``io_workers`` threads, rendered on
+    ``jobs`` worker processes (or one thread when jobs is 1) and written
+    back on the I/O pool, so slow filesystems keep many reads and writes in
+    flight while pages render. At most ``max_in_flight`` pages are started
+    and not yet written; once that many are in flight no further page is
+    read until one finishes, which bounds memory however many pages there are.
+
+    Args:
+    dir_path_content (str): Path to the content directory
+    template_path (str): Path to the default HTML template file
+    dest_dir_path (str): Path to the destination directory for generated HTML files
+    incremental (bool): Only re-render pages whose inputs changed
+    manifest_path (str): Path to the build manifest, defaults to one next to dest_dir_path
+    jobs (int): Number of worker processes, 0 for one per CPU
+    io_workers (int): Number of file reads and writes in flight at once
+    max_in_flight (int): Number of pages held in memory at once
+    profiler (BuildProfiler): Collects page and stage timings, if given
+    block_cache (BlockCache): Cache of rendered blocks shared by the pages,
+        a new default-sized one if not given
+    render_cache (RenderCache): On-disk cache of rendered pages, pruned to
+        its size limit after the build, if given
+    sink (DirectorySink): Where pages are written, the filesystem by default
+    """
+    if manifest_path is None:
+        manifest_path = default_manifest_path(dest_dir_path)
+    if incremental:
+        manifest = BuildManifest.load(manifest_path)
+    else:
+        manifest = BuildManifest(manifest_path)
+    if not jobs:
+        jobs = os.cpu_count() or 1
+    if block_cache is None:
+        block_cache = BlockCache()
+    if sink is None:
+        sink = DIRECTORY_SINK
+
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=io_workers) as io_executor:
+        pending, seen, skipped = await loop.run_in_executor(
+            io_executor, plan_pages, dir_path_content, template_path, dest_dir_path, manifest
+        )
+        if jobs > 1 and len(pending) > 1:
+            render_executor = ProcessPoolExecutor(max_workers=min(jobs, len(pending)))
+            settings = (
+                profiler.settings() if profiler is not None else None,
+                block_cache.maxsize,
+                render_cache.directory if render_cache is not None else None,
+            )
+
+            def render(md_path, markdown, page_template_path):
+                return loop.run_in_executor(
+                    render_executor, _render_markdown_task, md_path, markdown, page_template_path, *settings
+                )
+        else:
+            # One render thread, so the caches and profiler are only ever
+            # used from it
+            render_executor = ThreadPoolExecutor(max_workers=1)
+
+            def render(md_path, markdown, page_template_path):
+                return loop.run_in_executor(
+                    render_executor, _render_markdown_local, md_path, markdown, page_template_path,
+                    profiler, block_cache, render_cache,
+                )
+        lookups = cache_lookups(block_cache, render_cache)
+        with render_executor:
+            await _run_pages(
+                loop, pending, manifest, io_executor, render, max_in_flight,
+                profiler, block_cache, render_cache, sink,
+            )
+
+    remove_stale_pages(manifest, seen, dest_dir_path)
+    manifest.save()
+    report_cache_lookups(lookups, block_cache, render_cache, profiler)
+
+    if skipped:
+        print(f"Skipped {skipped} unchanged pages.")
+    print("All pages generated successfully.")
+
+
+def _render_markdown_local(md_path, markdown, template_path, profiler, block_cache, render_cache):
+    html, warnings = render_markdown(md_path, markdown, template_path, profiler, block_cache, render_cache)
+    return html, warnings, [], {}
+
+
+async def _run_pages(loop, pending, manifest, io_executor, render, max_in_flight, profiler, block_cache, render_cache, sink):
+    # Start pages in order, keeping at most max_in_flight running, and
+    # cancel the rest as soon as one fails
+    async def build_page(page):
+        md_path, page_template_path, dest_path = page[:3]
+        try:
+            markdown = await loop.run_in_executor(io_executor, read_markdown, md_path)
+            html, warnings, records, lookups = await render(md_path, markdown, page_template_path)
+            await loop.run_in_executor(io_executor, write_page, dest_path, html, sink)
+        except Exception as e:
+            print(f"Error generating page from {md_path}: {e}")
+            raise
+        # Worker results are merged on the event loop thread
+        if profiler is not None:
+            profiler.add_pages(records)
+        if "block_cache" in lookups:
+            block_cache.merge_stats(*lookups["block_cache"])
+        if "render_cache" in lookups:
+            render_cache.merge_stats(*lookups["render_cache"])
+        for warning in warnings:
+            print(warning)
+        manifest.record(*page[3:])
+        print(f"Generated: {dest_path}")
+
+    running = set()
+    try:
+        for page in pending:
+            if len(running) >= max_in_flight:
+                # Backpressure: wait for a page to be written before reading another
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+            running.add(asyncio.create_task(build_page(page)))
+        while running:
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+    except BaseException:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        raise
+
+
+def generate_pages_with_asyncio(*args, **kwargs):
+    """
+    Run generate_pages_async to completion; takes the same arguments.
+    """
+    asyncio.run(generate_pages_async(*args, **kwargs))
@@ -0,0 +1,11 @@
+"""
+Benchmarks for every stage of the site generator.
+
+Generate a synthetic site and time each pipeline stage with:
+
+    python3 -m benchmarks --pages 1000 --output bench.json
+
+(run from src/, or use bench.sh from the project root).
+"""
+from benchmarks.corpus import CorpusSpec, generate_site
+from benchmarks.run import compare_results, run_benchmarks
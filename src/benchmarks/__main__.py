@@ -0,0 +1,79 @@
+import argparse
+import json
+import sys
+import tempfile
+
+from benchmarks.corpus import CorpusSpec, generate_site
+from benchmarks.run import compare_results, environment, run_benchmarks
+
+
+def parse_args(argv=None):
+    defaults = CorpusSpec()
+    parser = argparse.ArgumentParser(
+        prog="python3 -m benchmarks",
+        description="Time every stage of the site generator over a synthetic site.",
+    )
+    corpus = parser.add_argument_group("corpus")
+    corpus.add_argument("--pages", type=int, default=defaults.pages)
+    corpus.add_argument("--blocks-per-page", type=int, default=defaults.blocks_per_page)
+    corpus.add_argument("--words-per-block", type=int, default=defaults.words_per_block)
+    corpus.add_argument("--link-density", type=float, default=defaults.link_density)
+    corpus.add_argument("--image-density", type=float, default=defaults.image_density)
+    corpus.add_argument("--emphasis-density", type=float, default=defaults.emphasis_density)
+    corpus.add_argument("--paragraph-weight", type=float, default=defaults.paragraph_weight)
+    corpus.add_argument("--heading-weight", type=float, default=defaults.heading_weight)
+    corpus.add_argument("--ulist-weight", type=float, default=defaults.ulist_weight)
+    corpus.add_argument("--olist-weight", type=float, default=defaults.olist_weight)
+    corpus.add_argument("--quote-weight", type=float, default=defaults.quote_weight)
+    corpus.add_argument("--code-weight", type=float, default=defaults.code_weight)
+    corpus.add_argument("--directories", type=int, default=defaults.directories)
+    corpus.add_argument("--assets", type=int, default=defaults.assets)
+    corpus.add_argument("--asset-size", type=int, default=defaults.asset_size)
+    corpus.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the fastest is reported")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=1.1,
+        help="slowdown ratio reported as a regression by --compare",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    spec = CorpusSpec(**{
+        name: getattr(args, name) for name in CorpusSpec().to_dict()
+    })
+
+    with tempfile.TemporaryDirectory() as root:
+        print(f"Generating {spec.pages} pages and {spec.assets} assets...", file=sys.stderr)
+        site = generate_site(root, spec)
+        stages = run_benchmarks(site, repeat=args.repeat)
+
+    results = {"environment": environment(), "corpus": spec.to_dict(), "stages": stages}
+
+    print(f"{'stage':<26} {'seconds':>10} {'items':>8} {'us/item':>10}")
+    for stage, result in stages.items():
+        per_item = result["seconds"] / result["items"] * 1e6 if result["items"] else 0
+        print(f"{stage:<26} {result['seconds']:>10.4f} {result['items']:>8} {per_item:>10.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        rows = compare_results(baseline, results, args.threshold)
+        print(f"\n{'stage':<26} {'before':>10} {'after':>10} {'ratio':>7}")
+        for stage, before, after, ratio, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{stage:<26} {before:>10.4f} {after:>10.4f} {ratio:>7.2f}{flag}")
+        if any(row[4] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
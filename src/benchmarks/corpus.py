@@ -0,0 +1,149 @@
+import os
+import random
+
+WORDS = (
+    "the of and to in is was that for on with as by at from his an were are "
+    "which this be or has had not but one their all been they who more when "
+    "ring shire hobbit wizard elf dwarf mountain river forest road king song "
+    "light shadow stone tower journey company council sword star sea ship"
+).split()
+
+
+class CorpusSpec:
+    """
+    Parameters of a synthetic site.
+
+    Block type weights choose how often each kind of block appears; link
+    and image density are the average number per paragraph or list item.
+    """
+
+    def __init__(self, pages=200, blocks_per_page=40, words_per_block=60,
+                 link_density=1.0, image_density=0.2, emphasis_density=1.5,
+                 paragraph_weight=6, heading_weight=1, ulist_weight=1,
+                 olist_weight=1, quote_weight=1, code_weight=0.5,
+                 directories=10, assets=100, asset_size=64 * 1024, seed=0):
+        self.pages = pages
+        self.blocks_per_page = blocks_per_page
+        self.words_per_block = words_per_block
+        self.link_density = link_density
+        self.image_density = image_density
+        self.emphasis_density = emphasis_density
+        self.paragraph_weight = paragraph_weight
+        self.heading_weight = heading_weight
+        self.ulist_weight = ulist_weight
+        self.olist_weight = olist_weight
+        self.quote_weight = quote_weight
+        self.code_weight = code_weight
+        self.directories = directories
+        self.assets = assets
+        self.asset_size = asset_size
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    def __repr__(self):
+        return f"CorpusSpec({self.to_dict()})"
+
+
+def _count(rng, density):
+    # Whole part always, fractional part with that probability
+    whole = int(density)
+    return whole + (1 if rng.random() < density - whole else 0)
+
+
+def _inline_text(rng, spec, words):
+    tokens = [rng.choice(WORDS) for _ in range(words)]
+    for _ in range(_count(rng, spec.emphasis_density)):
+        i = rng.randrange(len(tokens))
+        tokens[i] = rng.choice(("**{}**", "*{}*", "`{}`")).format(tokens[i])
+    for _ in range(_count(rng, spec.link_density)):
+        i = rng.randrange(len(tokens))
+        tokens[i] = f"[{tokens[i]}](/{rng.choice(WORDS)}/{rng.randrange(1000)})"
+    for _ in range(_count(rng, spec.image_density)):
+        i = rng.randrange(len(tokens))
+        tokens[i] = f"![{tokens[i]}](/images/{rng.randrange(spec.assets or 1)}.png)"
+    return " ".join(tokens)
+
+
+def generate_block(rng, spec):
+    kinds = ("paragraph", "heading", "ulist", "olist", "quote", "code")
+    weights = (
+        spec.paragraph_weight, spec.heading_weight, spec.ulist_weight,
+        spec.olist_weight, spec.quote_weight, spec.code_weight,
+    )
+    kind = rng.choices(kinds, weights)[0]
+    words = max(1, spec.words_per_block)
+    if kind == "heading":
+        return "#" * rng.randint(2, 6) + " " + _inline_text(rng, spec, max(1, words // 10))
+    if kind in ("ulist", "olist"):
+        items = rng.randint(2, 8)
+        lines = []
+        for n in range(1, items + 1):
+            marker = rng.choice(("*", "-")) if kind == "ulist" else f"{n}."
+            lines.append(f"{marker} {_inline_text(rng, spec, max(1, words // items))}")
+        return "\n".join(lines)
+    if kind == "quote":
+        lines = rng.randint(1, 4)
+        return "\n".join(
+            f"> {_inline_text(rng, spec, max(1, words // lines))}" for _ in range(lines)
+        )
+    if kind == "code":
+        lines = [
+            " " * rng.choice((0, 4)) + " ".join(rng.choice(WORDS) for _ in range(6))
+            for _ in range(rng.randint(2, 10))
+        ]
+        return "```\n" + "\n".join(lines) + "\n```"
+    # Paragraphs wrap over several lines
+    text = _inline_text(rng, spec, words)
+    tokens = text.split(" ")
+    return "\n".join(" ".join(tokens[i:i + 12]) for i in range(0, len(tokens), 12))
+
+
+def generate_page(rng, spec, number):
+    blocks = [f"# Page {number}"]
+    blocks.extend(generate_block(rng, spec) for _ in range(spec.blocks_per_page))
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_site(root, spec):
+    """
+    Write a synthetic site to root.
+
+    Creates ``content/`` with spec.pages markdown files spread over
+    spec.directories subdirectories, ``static/`` with spec.assets binary
+    files and a ``template.html``.
+
+    Args:
+    root (str): Directory to create the site in
+    spec (CorpusSpec): Shape of the site
+
+    Returns:
+    dict: Paths of the content and static directories and the template
+    """
+    rng = random.Random(spec.seed)
+    content_dir = os.path.join(root, "content")
+    static_dir = os.path.join(root, "static")
+    template_path = os.path.join(root, "template.html")
+
+    for number in range(spec.pages):
+        directory = os.path.join(content_dir, f"section{number % max(1, spec.directories)}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"page{number}.md"), 'w') as f:
+            f.write(generate_page(rng, spec, number))
+
+    os.makedirs(os.path.join(static_dir, "images"), exist_ok=True)
+    with open(os.path.join(static_dir, "index.css"), 'w') as f:
+        f.write("body { margin: 0 auto; max-width: 40em; }\n")
+    for number in range(spec.assets):
+        with open(os.path.join(static_dir, "images", f"{number}.png"), 'wb') as f:
+            f.write(rng.randbytes(spec.asset_size))
+
+    with open(template_path, 'w') as f:
+        f.write(
+            "<!DOCTYPE html>\n<html>\n<head>\n<title> {{ Title }} </title>\n"
+            "<link href=\"/index.css\" rel=\"stylesheet\">\n</head>\n"
+            "<body>\n<article>\n{{ Content }}\n</article>\n</body>\n</html>\n"
+        )
+
+    return {"content": content_dir, "static": static_dir, "template": template_path}
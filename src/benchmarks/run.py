@@ -0,0 +1,206 @@
+import contextlib
+import io
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+from build import copy_directory, generate_pages_recursive
+from inline_markdown import text_to_textnodes
+from markdown_blocks import (
+    block_to_block_type,
+    block_type_heading,
+    block_type_olist,
+    block_type_paragraph,
+    block_type_quote,
+    block_type_ulist,
+    markdown_to_blocks,
+    markdown_to_document,
+    markdown_to_html_node,
+    parse_markdown,
+)
+from template import clear_template_cache, load_template
+
+STAGES = (
+    "read",
+    "markdown_to_blocks",
+    "block_to_block_type",
+    "parse_markdown",
+    "text_to_textnodes",
+    "markdown_to_html_node",
+    "to_html",
+    "markdown_to_document",
+    "document_to_html",
+    "template",
+    "write",
+    "copy_directory",
+    "sync_directory",
+    "generate_pages_recursive",
+)
+
+
+def inline_texts(block, block_type):
+    """
+    Return the inline markdown passed to text_to_textnodes for a block.
+    """
+    lines = block.split("\n")
+    if block_type == block_type_paragraph:
+        return [" ".join(lines)]
+    if block_type == block_type_heading:
+        return [block.lstrip("#")[1:]]
+    if block_type == block_type_olist:
+        return [line[3:] for line in lines]
+    if block_type == block_type_ulist:
+        return [line[2:] for line in lines]
+    if block_type == block_type_quote:
+        return [" ".join(line.lstrip(">").strip() for line in lines)]
+    return []
+
+
+def _time(func, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+@contextlib.contextmanager
+def _quiet():
+    # The build functions report every page and file they touch
+    level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logging.getLogger().setLevel(level)
+
+
+def run_benchmarks(site, repeat=3):
+    """
+    Time every pipeline stage over a generated site.
+
+    Each stage runs ``repeat`` times over the whole site, with its inputs
+    prepared beforehand, so stages are measured in isolation.
+
+    Args:
+    site (dict): Paths returned by benchmarks.corpus.generate_site
+    repeat (int): Number of runs per stage; the fastest is reported
+
+    Returns:
+    dict: Per-stage results with ``seconds`` (best run), ``runs`` and
+    ``items`` (the number of pages, blocks, ... processed per run)
+    """
+    paths = []
+    for root, dirs, files in os.walk(site["content"]):
+        dirs.sort()
+        paths.extend(os.path.join(root, name) for name in sorted(files) if name.endswith(".md"))
+
+    texts = []
+
+    def read():
+        texts.clear()
+        for path in paths:
+            with open(path, 'r') as f:
+                texts.append(f.read())
+
+    results = {}
+
+    def record(stage, func, items):
+        runs = _time(func, repeat)
+        results[stage] = {"seconds": min(runs), "runs": runs, "items": items}
+
+    record("read", read, len(paths))
+    blocks = [block for text in texts for block in markdown_to_blocks(text)]
+    record("markdown_to_blocks", lambda: [markdown_to_blocks(text) for text in texts], len(texts))
+    record("block_to_block_type", lambda: [block_to_block_type(block) for block in blocks], len(blocks))
+    record("parse_markdown", lambda: [parse_markdown(text) for text in texts], len(texts))
+    inline = [
+        text for block in blocks
+        for text in inline_texts(block, block_to_block_type(block))
+    ]
+    record("text_to_textnodes", lambda: [text_to_textnodes(text) for text in inline], len(inline))
+    record("markdown_to_html_node", lambda: [markdown_to_html_node(text) for text in texts], len(texts))
+    nodes = [markdown_to_html_node(text) for text in texts]
+    record("to_html", lambda: [node.to_html() for node in nodes], len(nodes))
+    record("markdown_to_document", lambda: [markdown_to_document(text) for text in texts], len(texts))
+    documents = [markdown_to_document(text) for text in texts]
+    record("document_to_html", lambda: [document.to_html() for document in documents], len(documents))
+    fragments = [node.to_html() for node in nodes]
+
+    def render():
+        clear_template_cache()
+        template = load_template(site["template"])
+        return [template.render(Title="Title", Content=html) for html in fragments]
+
+    record("template", render, len(fragments))
+    pages = render()
+
+    with tempfile.TemporaryDirectory() as out:
+        def write():
+            for number, page in enumerate(pages):
+                with open(os.path.join(out, f"{number}.html"), 'w') as f:
+                    f.write(page)
+
+        record("write", write, len(pages))
+
+        assets = sum(len(files) for _, _, files in os.walk(site["static"]))
+        public = os.path.join(out, "public")
+        with _quiet():
+            record("copy_directory", lambda: copy_directory(site["static"], public), assets)
+            record(
+                "sync_directory",
+                lambda: copy_directory(site["static"], public, sync=True),
+                assets,
+            )
+
+            def full_build():
+                shutil.rmtree(public, ignore_errors=True)
+                generate_pages_recursive(
+                    site["content"], site["template"], public, incremental=False,
+                    manifest_path=os.path.join(out, "manifest.json"),
+                )
+
+            record("generate_pages_recursive", full_build, len(paths))
+
+    return results
+
+
+def environment():
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def compare_results(baseline, current, threshold=1.1):
+    """
+    Compare two benchmark result documents stage by stage.
+
+    Args:
+    baseline (dict): Earlier results, as written by ``python3 -m benchmarks``
+    current (dict): New results
+    threshold (float): Ratio of current to baseline time counted as a regression
+
+    Returns:
+    list: (stage, baseline seconds, current seconds, ratio, regressed) tuples
+    for the stages present in both
+    """
+    rows = []
+    for stage in STAGES:
+        if stage not in baseline["stages"] or stage not in current["stages"]:
+            continue
+        before = baseline["stages"][stage]["seconds"]
+        after = current["stages"][stage]["seconds"]
+        ratio = after / before if before else float("inf")
+        rows.append((stage, before, after, ratio, ratio > threshold))
+    return rows
@@ -1,19 +1,82 @@
 import os
 import shutil
 import logging
-from markdown_blocks import markdown_to_html_node, extract_title
+from concurrent.futures import ProcessPoolExecutor
+from htmlnode import ParentNode
+from markdown_blocks import (
+    BlockCache,
+    block_to_html_node,
+    extract_title,
+    parse_markdown,
+    blocks_to_document,
+    blocks_to_html_node,
+    extract_title_from_lines,
+    iter_file_blocks,
+    iter_file_lines,
+)
+from assets import copy_files, sync_directory
+from compress import remove_compressed
+from manifest import BuildManifest, default_manifest_path, forget_manifest
+from profiling import NULL_PROFILER, BuildProfiler
+from render_cache import RenderCache
+from shard import in_shard
+from sinks import DIRECTORY_SINK, MemorySink
+from sources import MappingSource
+from template import TemplateResolver, compile_template, load_template
+
+# Markdown files at least this large are rendered as a stream of blocks
+STREAMING_THRESHOLD = 16 * 1024 * 1024
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
-def copy_directory(source, destination):
+def copy_directory(source, destination, sync=False, checksum=False, preserve=None, mode="copy", workers=1, profiler=None, sink=None):
     """
     Recursively copy contents from source directory to destination directory.
+
+    By default the destination is deleted and everything is copied again.
+    In sync mode only new or changed files are copied and only files missing
+    from source are removed.
     
     Args:
     source (str): Path to the source directory
     destination (str): Path to the destination directory
+    sync (bool): Incrementally sync instead of cleaning and copying
+    checksum (bool): In sync mode, compare files by content hash
+    preserve (callable): In sync mode, called with paths relative to
+        destination to decide which files missing from source to keep
+    mode (str): "copy", "hardlink" or "reflink"
+    workers (int): Number of files copied concurrently
+    profiler (BuildProfiler): Collects copy timings, if given
+    sink (DirectorySink): Where the files are written, the filesystem by
+        default. An archive sink receives the files in sorted order
+
+    Returns:
+    SyncReport: In sync mode, what was added, updated and removed
     """
+    if profiler is None:
+        profiler = NULL_PROFILER
+    if sink is not None and not sink.on_disk:
+        count = 0
+        with profiler.stage("copy_static"):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                for file_name in sorted(files):
+                    src_file = os.path.join(root, file_name)
+                    sink.add_file(os.path.join(destination, os.path.relpath(src_file, source)), src_file)
+                    count += 1
+        profiler.add_static_files(count)
+        return
+    copy = None
+    if sink is not None:
+        copy = lambda src_file, dest_file, mode: sink.add_file(dest_file, src_file, mode)
+    if sync:
+        with profiler.stage("copy_static"):
+            report = sync_directory(source, destination, checksum, preserve, mode, workers, copy)
+        profiler.add_static_files(len(report.added) + len(report.updated))
+        logging.info(f"Synced {source} to {destination}: {report.summary()}")
+        return report
+
     # First, delete all contents of the destination directory
     if os.path.exists(destination):
         logging.info(f"Cleaning destination directory: {destination}")
@@ -23,6 +86,7 @@ def copy_directory(source, destination):
     os.makedirs(destination, exist_ok=True)
     
     # Walk through the source directory
+    copies = []
     for root, dirs, files in os.walk(source):
         # Create corresponding subdirectories in destination
         for dir_name in dirs:
@@ -31,14 +95,19 @@ def copy_directory(source, destination):
             os.makedirs(dest_path, exist_ok=True)
             logging.info(f"Created directory: {dest_path}")
         
-        # Copy files
+        # Queue files
         for file_name in files:
             src_file = os.path.join(root, file_name)
             dest_file = os.path.join(destination, os.path.relpath(src_file, source))
-            shutil.copy2(src_file, dest_file)
+            copies.append((src_file, dest_file))
+
+    # Copy files
+    with profiler.stage("copy_static"):
+        for _, dest_file in copy_files(copies, mode, workers, copy):
             logging.info(f"Copied file: {dest_file}")
+    profiler.add_static_files(len(copies))
 
-def generate_page(from_path, template_path, dest_path):
+def generate_page(from_path, template_path, dest_path, profiler=None, block_cache=None, render_cache=None, sink=None):
     """
     Generate an HTML page from a markdown file using a template.
 
@@ -46,67 +115,546 @@ def generate_page(from_path, template_path, dest_path):
     from_path (str): Path to the source markdown file
     template_path (str): Path to the HTML template file
     dest_path (str): Path where the generated HTML file will be saved
+    profiler (BuildProfiler): Collects stage timings, if given
+    block_cache (BlockCache): Reuses blocks rendered for earlier pages, if given
+    render_cache (RenderCache): On-disk cache of rendered pages, if given
+    sink (DirectorySink): Where the page is written, the filesystem by default
     """
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
 
-    # Read the markdown file
-    with open(from_path, 'r') as md_file:
-        markdown_content = md_file.read()
+    # Load the compiled template
+    template = load_template(template_path)
 
-    # Read the template file
-    with open(template_path, 'r') as template_file:
-        template_content = template_file.read()
+    for warning in render_page(from_path, template, dest_path, profiler, block_cache, render_cache, sink):
+        print(warning)
 
-    # Convert markdown to HTML
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html()
+    print(f"Page generated successfully: {dest_path}")
 
-    # Extract the title
-    try:
-        title = extract_title(markdown_content)
-    except ValueError:
-        print(f"Warning: No title found in {from_path}. Using a default title.")
-        title = "Untitled Page"
+def render_page(from_path, template, dest_path, profiler=None, block_cache=None, render_cache=None, sink=None, site=None):
+    """
+    Render a markdown file into a compiled template and write it out.
 
-    # Replace placeholders in the template
-    full_html = template_content.replace("{{ Title }}", title).replace("{{ Content }}", html_content)
+    The page is always streamed to the sink, serialized through the
+    template as it is written, so a profiled build measures the same path
+    as an unprofiled one.
 
-    # Ensure the directory for dest_path exists
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    Args:
+    from_path (str): Path to the source markdown file
+    template (Template): The compiled HTML template
+    dest_path (str): Path where the generated HTML file will be saved
+    profiler (BuildProfiler): Collects stage timings, if given
+    block_cache (BlockCache): Reuses blocks rendered for earlier pages, if
+        given. Without one, or with one of size 0, the page is converted to
+        an array-backed Document instead of a node tree
+    render_cache (RenderCache): On-disk cache of rendered pages; on a hit the
+        markdown is not parsed at all
+    sink (DirectorySink): Where the page is written, the filesystem by default
+    site (SiteSource): Read from_path from this source instead of the filesystem
 
-    # Write the full HTML to the destination file
-    with open(dest_path, 'w') as dest_file:
-        dest_file.write(full_html)
+    Returns:
+    list: Warning messages produced while rendering
+    """
+    if profiler is None:
+        profiler = NULL_PROFILER
+    if sink is None:
+        sink = DIRECTORY_SINK
+    convert = block_to_html_node if block_cache is None else block_cache.render
+    warnings = []
 
-    print(f"Page generated successfully: {dest_path}")
+    with profiler.page(from_path):
+        streaming = site is None and os.path.getsize(from_path) >= STREAMING_THRESHOLD
+        if streaming:
+            # Very large pages are never held in memory: find the title in a
+            # first pass, then convert and write one block at a time
+            html_node = blocks_to_html_node(iter_file_blocks(from_path, use_mmap=True), block_cache)
+            find_title = lambda: extract_title_from_lines(iter_file_lines(from_path, use_mmap=True))
+        else:
+            # Read the markdown file
+            with profiler.stage("read"):
+                if site is not None:
+                    markdown_content = site.read_text(from_path)
+                else:
+                    with open(from_path, 'r') as md_file:
+                        markdown_content = md_file.read()
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
+            html_node = None
+            document = None
+            if render_cache is not None:
+                with profiler.stage("render_cache"):
+                    html_node = render_cache.get(markdown_content)
+            if html_node is None:
+                # Split and classify blocks and find the title in one pass,
+                # then convert to an HTML node tree, serialized while writing
+                with profiler.stage("blocks"):
+                    document = parse_markdown(markdown_content)
+                with profiler.stage("inline"):
+                    if block_cache is None or block_cache.maxsize <= 0:
+                        html_node = blocks_to_document(document.blocks)
+                    else:
+                        html_node = ParentNode(
+                            "div", [convert(block, block_type) for block_type, block in document.blocks]
+                        )
+                if render_cache is not None:
+                    with profiler.stage("serialize"):
+                        html_node = html_node.to_html()
+                    with profiler.stage("render_cache"):
+                        render_cache.put(markdown_content, html_node)
+            if document is not None and document.title is not None:
+                find_title = lambda: document.title
+            else:
+                find_title = lambda: extract_title(markdown_content)
+
+        # Extract the title
+        with profiler.stage("title"):
+            try:
+                title = find_title()
+            except ValueError:
+                warnings.append(f"Warning: No title found in {from_path}. Using a default title.")
+                title = "Untitled Page"
+
+        def write(f):
+            template.write(f, Title=title, Content=html_node)
+            # Before the sink commits the page, so a page over the memory
+            # budget leaves no output behind
+            profiler.check_budget()
+
+        # Serializing and templating (and, for streamed pages, reading and
+        # parsing) all happen while writing
+        with profiler.stage("write"):
+            sink.write_page(dest_path, write)
+
+    return warnings
+
+# Block cache of a worker process, kept across the pages it renders
+_worker_block_cache = None
+
+def _worker_cache(block_cache_size):
+    global _worker_block_cache
+    if block_cache_size is None:
+        return None
+    if _worker_block_cache is None or _worker_block_cache.maxsize != block_cache_size:
+        _worker_block_cache = BlockCache(block_cache_size)
+    return _worker_block_cache
+
+def _render_task(task):
+    from_path, template_path, dest_path, profiler_settings, block_cache_size, render_cache_dir, disk_sink = task
+    # Pages bound for an archive are sent back to the parent to be written
+    sink = MemorySink() if disk_sink is None else disk_sink
+    profiler = BuildProfiler(*profiler_settings) if profiler_settings is not None else None
+    render_cache = RenderCache(render_cache_dir) if render_cache_dir is not None else None
+    block_cache = _worker_cache(block_cache_size)
+    if block_cache is not None:
+        hits, misses = block_cache.hits, block_cache.misses
+    # Compiled templates are cached per worker process
+    warnings = render_page(
+        from_path, load_template(template_path), dest_path, profiler, block_cache, render_cache, sink
+    )
+    lookups = {}
+    if block_cache is not None:
+        lookups["block_cache"] = (block_cache.hits - hits, block_cache.misses - misses)
+    if render_cache is not None:
+        lookups["render_cache"] = (render_cache.hits, render_cache.misses, render_cache.writes)
+    outputs = sink.files if disk_sink is None else {}
+    return warnings, profiler.pages if profiler is not None else [], lookups, outputs
+
+def render_pages_parallel(pages, jobs, profiler=None, block_cache=None, render_cache=None, sink=None):
+    """
+    Render pages on a pool of worker processes.
+
+    Each worker compiles a template once and reuses it. Pages are yielded
+    back in the order of ``pages`` regardless of which worker finishes
+    first, and the first failing page (in that order) aborts the build.
+
+    Args:
+    pages (list): (from_path, template_path, dest_path) tuples
+    jobs (int): Number of worker processes
+    profiler (BuildProfiler): Receives the workers' page timings, if given
+    block_cache (BlockCache): Each worker keeps a cache of the same size,
+        and their hits and misses are added to this one, if given
+    render_cache (RenderCache): On-disk cache used by the workers, whose
+        hits and misses are added to this one, if given
+    sink (DirectorySink): Where pages are written; workers write to an
+        on-disk sink themselves, pages for any other sink are written here
+    """
+    if profiler is None:
+        profiler = NULL_PROFILER
+    if sink is None:
+        sink = DIRECTORY_SINK
+    disk_sink = sink if sink.on_disk else None
+    block_cache_size = block_cache.maxsize if block_cache is not None else None
+    render_cache_dir = render_cache.directory if render_cache is not None else None
+    tasks = [
+        page + (profiler.settings(), block_cache_size, render_cache_dir, disk_sink)
+        for page in pages
+    ]
+    chunksize = max(1, len(pages) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(_render_task, tasks, chunksize=chunksize)
+        for from_path, template_path, dest_path in pages:
+            try:
+                warnings, records, lookups, outputs = next(results)
+            except Exception as e:
+                print(f"Error generating page from {from_path}: {e}")
+                raise
+            profiler.add_pages(records)
+            if "block_cache" in lookups:
+                block_cache.merge_stats(*lookups["block_cache"])
+            if "render_cache" in lookups:
+                render_cache.merge_stats(*lookups["render_cache"])
+            for warning in warnings:
+                print(warning)
+            for path, data in outputs.items():
+                sink.write_bytes(path, data)
+            yield from_path, dest_path
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, incremental=True, manifest_path=None, jobs=1, profiler=None, block_cache=None, render_cache=None, sink=None, shard=None):
     """
     Recursively generate HTML pages from markdown files in a directory.
 
+    A ``template.html`` inside a content directory overrides template_path
+    for the pages in that directory and below it.
+
+    When incremental, a build manifest next to the destination directory
+    records the hash of every source, of the template (including its
+    partials) and the generator version. Pages whose inputs are unchanged
+    and whose output still exists are skipped, and outputs whose sources
+    were removed are deleted.
+
     Args:
     dir_path_content (str): Path to the content directory
-    template_path (str): Path to the HTML template file
+    template_path (str): Path to the default HTML template file
     dest_dir_path (str): Path to the destination directory for generated HTML files
+    incremental (bool): Only re-render pages whose inputs changed
+    manifest_path (str): Path to the build manifest, defaults to one next to dest_dir_path
+    jobs (int): Number of worker processes, 0 for one per CPU
+    profiler (BuildProfiler): Collects page and stage timings, if given
+    block_cache (BlockCache): Cache of rendered blocks shared by the pages,
+        a new default-sized one if not given
+    render_cache (RenderCache): On-disk cache of rendered pages, pruned to
+        its size limit after the build, if given
+    sink (DirectorySink): Where pages are written, the filesystem by
+        default. With an archive sink every page is rendered, in order, and
+        no manifest is written.
+    shard (tuple): (index, count) to render only the pages that
+        shard.shard_of assigns to shard index of count; the output and
+        manifest then hold just those pages, ready for shard.merge_shards
+    """
+    on_disk = sink is None or sink.on_disk
+    if block_cache is None:
+        block_cache = BlockCache()
+    if manifest_path is None:
+        manifest_path = default_manifest_path(dest_dir_path)
+    if incremental and on_disk:
+        manifest = BuildManifest.load(manifest_path)
+    else:
+        manifest = BuildManifest(manifest_path)
+    manifest.shard = shard
+    if not jobs:
+        jobs = os.cpu_count() or 1
+
+    pending, seen, skipped = plan_pages(dir_path_content, template_path, dest_dir_path, manifest, shard)
+
+    if jobs > 1 and len(pending) > 1:
+        pages = [page[:3] for page in pending]
+        generated = render_pages_parallel(
+            pages, min(jobs, len(pages)), profiler, block_cache, render_cache, sink
+        )
+    else:
+        generated = (
+            # Generate the page
+            (generate_page(md_path, page_template_path, dest_path, profiler, block_cache, render_cache, sink), dest_path)
+            for md_path, page_template_path, dest_path, *_ in pending
+        )
+    lookups = cache_lookups(block_cache, render_cache)
+    for (_, dest_path), page in zip(generated, pending):
+        rel_path, digest, stat, rel_dest, template_hash = page[3:]
+        manifest.record(rel_path, digest, stat, rel_dest, template_hash)
+        print(f"Generated: {dest_path}")
+
+    if on_disk:
+        remove_stale_pages(manifest, seen, dest_dir_path)
+        manifest.save()
+
+    report_cache_lookups(lookups, block_cache, render_cache, profiler)
+    if skipped:
+        print(f"Skipped {skipped} unchanged pages.")
+    print("All pages generated successfully.")
+
+def cache_lookups(block_cache, render_cache):
+    """
+    Return the hit and miss counts of the caches, to pass to
+    report_cache_lookups once the pages are rendered.
+    """
+    lookups = (block_cache.hits, block_cache.misses)
+    if render_cache is not None:
+        lookups += (render_cache.hits, render_cache.misses)
+    return lookups
+
+def report_cache_lookups(before, block_cache, render_cache, profiler=None):
+    """
+    Print and profile the cache lookups made since cache_lookups returned
+    before, and prune the render cache to its size limit.
     """
-    for root, _, files in os.walk(dir_path_content):
-        for file in files:
+    hits, misses = block_cache.hits - before[0], block_cache.misses - before[1]
+    if hits:
+        print(f"Block cache: {hits} hits, {misses} misses.")
+    if profiler is not None:
+        profiler.add_counters({"block_cache_hits": hits, "block_cache_misses": misses})
+    if render_cache is not None:
+        render_cache.prune()
+        cache_hits, cache_misses = render_cache.hits - before[2], render_cache.misses - before[3]
+        print(f"Render cache: {cache_hits} hits, {cache_misses} misses.")
+        if profiler is not None:
+            profiler.add_counters({
+                "render_cache_hits": cache_hits,
+                "render_cache_misses": cache_misses,
+            })
+
+def plan_pages(dir_path_content, template_path, dest_dir_path, manifest, shard=None):
+    """
+    Find the markdown files to render and skip those that are up to date.
+
+    Unchanged pages are recorded in the manifest again as they are found.
+
+    Args:
+    dir_path_content (str): Path to the content directory
+    template_path (str): Path to the default HTML template file
+    dest_dir_path (str): Path to the destination directory for generated HTML files
+    manifest (BuildManifest): Manifest of the previous build
+    shard (tuple): (index, count) to plan only that shard's pages; the
+        others are treated as if they did not exist
+
+    Returns:
+    tuple: (pending, seen, skipped), where pending holds a (md_path,
+    template_path, dest_path, rel_path, digest, stat, rel_dest,
+    template_hash) tuple per page to render, seen every source path
+    relative to the content directory and skipped the number of
+    unchanged pages
+    """
+    templates = TemplateResolver(dir_path_content, template_path)
+    seen = set()
+    pending = []
+    skipped = 0
+    for root, dirs, files in os.walk(dir_path_content):
+        dirs.sort()
+        page_template_path = templates.resolve(root)
+        template_hash = load_template(page_template_path).digest
+        for file in sorted(files):
             if file.endswith('.md'):
                 # Construct the full path to the markdown file
                 md_path = os.path.join(root, file)
                 
                 # Construct the relative path from the content directory
                 rel_path = os.path.relpath(md_path, dir_path_content)
+                if shard is not None and not in_shard(rel_path, shard):
+                    continue
+                seen.add(rel_path)
                 
                 # Construct the destination path, replacing .md with .html
-                dest_path = os.path.join(dest_dir_path, os.path.splitext(rel_path)[0] + '.html')
-                
-                # Ensure the destination directory exists
-                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                
-                # Generate the page
-                generate_page(md_path, template_path, dest_path)
-                
+                rel_dest = os.path.splitext(rel_path)[0] + '.html'
+                dest_path = os.path.join(dest_dir_path, rel_dest)
+
+                digest, stat = manifest.source_hash(rel_path, md_path)
+                if manifest.is_current(rel_path, digest, template_hash) and os.path.exists(dest_path):
+                    manifest.record(rel_path, digest, stat, rel_dest, template_hash)
+                    skipped += 1
+                    continue
+                pending.append((md_path, page_template_path, dest_path, rel_path, digest, stat, rel_dest, template_hash))
+    return pending, seen, skipped
+
+def remove_stale_pages(manifest, seen, dest_dir_path):
+    """
+    Delete the outputs of pages whose sources are no longer in seen.
+    """
+    for rel_path in sorted(set(manifest.pages) - seen):
+        entry = manifest.pages.pop(rel_path)
+        remove_output(dest_dir_path, entry["output"])
+
+def copy_source_directory(site, source, destination, sink=None, profiler=None):
+    """
+    Copy the files under a directory of a site source to destination,
+    replacing whatever destination held.
+
+    Args:
+    site (SiteSource): Where the files are read from
+    source (str): Directory within site, e.g. "static"
+    destination (str): Path to the destination directory
+    sink (DirectorySink): Where the files are written, the filesystem by default
+    profiler (BuildProfiler): Collects copy timings, if given
+    """
+    if profiler is None:
+        profiler = NULL_PROFILER
+    if sink is None or sink.on_disk:
+        if os.path.exists(destination):
+            logging.info(f"Cleaning destination directory: {destination}")
+            shutil.rmtree(destination)
+    if sink is None:
+        sink = DIRECTORY_SINK
+    paths = site.files(source)
+    with profiler.stage("copy_static"):
+        for path in paths:
+            dest_file = os.path.join(destination, os.path.relpath(path, source))
+            sink.write_bytes(dest_file, site.read_bytes(path))
+            logging.info(f"Copied file: {dest_file}")
+    profiler.add_static_files(len(paths))
+
+def _render_source_task(task):
+    from_path, markdown, template, dest_path, profiler_settings, block_cache_size = task
+    profiler = BuildProfiler(*profiler_settings) if profiler_settings is not None else None
+    block_cache = _worker_cache(block_cache_size)
+    if block_cache is not None:
+        hits, misses = block_cache.hits, block_cache.misses
+    sink = MemorySink()
+    warnings = render_page(
+        from_path, template, dest_path, profiler, block_cache,
+        sink=sink, site=MappingSource({from_path: markdown}),
+    )
+    lookups = (block_cache.hits - hits, block_cache.misses - misses) if block_cache else (0, 0)
+    return warnings, profiler.pages if profiler is not None else [], lookups, sink.files
+
+def generate_pages_from_source(site, dir_path_content, template_path, dest_dir_path, jobs=1, profiler=None, block_cache=None, sink=None):
+    """
+    Generate every page of a site source, like generate_pages_recursive but
+    reading markdown and templates (with their includes and per-directory
+    overrides) from site instead of the filesystem.
+
+    Builds from a source are always full builds and write no manifest; one
+    written to the filesystem deletes the manifest of dest_dir_path.
+
+    Args:
+    site (SiteSource): Where the content and templates are read from
+    dir_path_content (str): Content directory within site
+    template_path (str): Default template within site
+    dest_dir_path (str): Path to the destination directory for generated HTML files
+    jobs (int): Number of worker processes, 0 for one per CPU
+    profiler (BuildProfiler): Collects page and stage timings, if given
+    block_cache (BlockCache): Cache of rendered blocks shared by the pages,
+        a new default-sized one if not given
+    sink (DirectorySink): Where pages are written, the filesystem by default
+    """
+    if profiler is None:
+        profiler = NULL_PROFILER
+    if block_cache is None:
+        block_cache = BlockCache()
+    if sink is None:
+        sink = DIRECTORY_SINK
+    if sink.on_disk:
+        forget_manifest(dest_dir_path)
+    if not jobs:
+        jobs = os.cpu_count() or 1
+
+    templates = TemplateResolver(dir_path_content, template_path, isfile=site.isfile)
+    compiled = {}
+    pages = []
+    for md_path in site.files(dir_path_content):
+        if not md_path.endswith('.md'):
+            continue
+        page_template_path = templates.resolve(os.path.dirname(md_path))
+        template = compiled.get(page_template_path)
+        if template is None:
+            template = compile_template(
+                site.read_text(page_template_path), os.path.dirname(page_template_path),
+                page_template_path, read=site.read_text,
+            )
+            compiled[page_template_path] = template
+        rel_dest = os.path.splitext(os.path.relpath(md_path, dir_path_content))[0] + '.html'
+        pages.append((md_path, template, os.path.join(dest_dir_path, rel_dest)))
+
+    if jobs > 1 and len(pages) > 1:
+        tasks = [
+            (md_path, site.read_text(md_path), template, dest_path, profiler.settings(), block_cache.maxsize)
+            for md_path, template, dest_path in pages
+        ]
+        jobs = min(jobs, len(pages))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = executor.map(_render_source_task, tasks, chunksize=max(1, len(pages) // (jobs * 4)))
+            for md_path, _, dest_path in pages:
+                try:
+                    warnings, records, lookups, outputs = next(results)
+                except Exception as e:
+                    print(f"Error generating page from {md_path}: {e}")
+                    raise
+                profiler.add_pages(records)
+                block_cache.merge_stats(*lookups)
+                for warning in warnings:
+                    print(warning)
+                for path, data in outputs.items():
+                    sink.write_bytes(path, data)
                 print(f"Generated: {dest_path}")
+    else:
+        for md_path, template, dest_path in pages:
+            for warning in render_page(md_path, template, dest_path, profiler, block_cache, sink=sink, site=site):
+                print(warning)
+            print(f"Generated: {dest_path}")
 
     print("All pages generated successfully.")
+
+def update_pages(dir_path_content, template_path, dest_dir_path, rel_paths, manifest_path=None, block_cache=None, render_cache=None, sink=None):
+    """
+    Re-render or remove specific pages and record them in the build manifest.
+
+    Pages whose source no longer exists have their output removed. Pages
+    whose source and template are unchanged since the last build are skipped.
+
+    Args:
+    dir_path_content (str): Path to the content directory
+    template_path (str): Path to the default HTML template file
+    dest_dir_path (str): Path to the destination directory for generated HTML files
+    rel_paths (iterable): Markdown paths relative to dir_path_content
+    manifest_path (str): Path to the build manifest, defaults to one next to dest_dir_path
+    block_cache (BlockCache): Reuses blocks rendered for earlier pages, if given
+    render_cache (RenderCache): On-disk cache of rendered pages, if given
+    sink (DirectorySink): Where pages are written, the filesystem by default
+
+    Returns:
+    list: The destination paths that were generated
+    """
+    if manifest_path is None:
+        manifest_path = default_manifest_path(dest_dir_path)
+    manifest = BuildManifest.load(manifest_path)
+    templates = TemplateResolver(dir_path_content, template_path)
+
+    generated = []
+    for rel_path in sorted(rel_paths):
+        md_path = os.path.join(dir_path_content, rel_path)
+        rel_dest = os.path.splitext(rel_path)[0] + '.html'
+        dest_path = os.path.join(dest_dir_path, rel_dest)
+        if not os.path.exists(md_path):
+            entry = manifest.pages.pop(rel_path, None)
+            remove_output(dest_dir_path, entry["output"] if entry else rel_dest)
+            continue
+        page_template_path = templates.resolve(os.path.dirname(md_path))
+        template_hash = load_template(page_template_path).digest
+        digest, stat = manifest.source_hash(rel_path, md_path)
+        if not (manifest.is_current(rel_path, digest, template_hash) and os.path.exists(dest_path)):
+            generate_page(
+                md_path, page_template_path, dest_path,
+                block_cache=block_cache, render_cache=render_cache, sink=sink,
+            )
+            generated.append(dest_path)
+        manifest.record(rel_path, digest, stat, rel_dest, template_hash)
+
+    manifest.save()
+    return generated
+
+def remove_output(dest_dir_path, rel_output):
+    """
+    Delete a generated file, its .gz sibling and any directories left
+    empty by their removal.
+
+    Args:
+    dest_dir_path (str): Path to the destination directory
+    rel_output (str): Path of the generated file relative to dest_dir_path
+    """
+    output_path = os.path.join(dest_dir_path, rel_output)
+    if os.path.exists(output_path):
+        os.remove(output_path)
+        print(f"Removed: {output_path}")
+    remove_compressed(output_path)
+    parent = os.path.dirname(output_path)
+    while os.path.normpath(parent) != os.path.normpath(dest_dir_path):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
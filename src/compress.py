@@ -0,0 +1,281 @@
+import json
+import logging
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from profiling import NULL_PROFILER
+from sinks import DirectorySink, write_atomic
+
+GZIP_SUFFIX = ".gz"
+
+STATE_SUFFIX = ".gzip.json"
+
+# Text formats worth serving precompressed; images, fonts and archives are
+# already compressed
+COMPRESSIBLE_SUFFIXES = (
+    ".html", ".htm", ".css", ".js", ".mjs", ".json", ".map", ".svg", ".xml",
+    ".txt", ".csv", ".md", ".ico", ".wasm", ".webmanifest",
+)
+
+# Files smaller than this gain nothing from compression
+MIN_SIZE = 256
+
+
+def default_state_path(dest_dir_path):
+    """
+    Return the path of the record of compressed files for an output
+    directory, which lives next to it like the build manifest.
+    """
+    return os.path.normpath(dest_dir_path) + STATE_SUFFIX
+
+
+def is_compressible(path):
+    return path.lower().endswith(COMPRESSIBLE_SUFFIXES)
+
+
+def gzip_bytes(data, level=9):
+    """
+    Compress data into the gzip format with zlib.
+
+    zlib writes a zero timestamp and no file name into the header, so the
+    same input always gives the same bytes.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_file(path, level=9, data=None):
+    """
+    Write path + ".gz" next to path, with the same modification time (which
+    is what the server reports as Last-Modified for it).
+
+    Args:
+    path (str): File to compress
+    level (int): zlib compression level, 1-9
+    data (bytes): The contents of path, if already in memory
+
+    Returns:
+    int: Size of the compressed file
+    """
+    if data is None:
+        with open(path, 'rb') as f:
+            data = f.read()
+    data = gzip_bytes(data, level)
+    gz_path = path + GZIP_SUFFIX
+    write_atomic(gz_path, lambda f: f.write(data), 'wb')
+    stat = os.stat(path)
+    os.utime(gz_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    return len(data)
+
+
+def remove_compressed(path):
+    """
+    Delete the .gz sibling of path, if there is one.
+    """
+    gz_path = path + GZIP_SUFFIX
+    if os.path.exists(gz_path):
+        os.remove(gz_path)
+        logging.info(f"Removed: {gz_path}")
+
+
+def keep_compressed(preserve, source):
+    """
+    Extend a sync_directory preserve callable to also keep the .gz sibling
+    of every file it keeps and of every file under source.
+    """
+    def keep(rel_path):
+        if preserve(rel_path):
+            return True
+        if not rel_path.endswith(GZIP_SUFFIX):
+            return False
+        original = rel_path[:-len(GZIP_SUFFIX)]
+        return preserve(original) or os.path.isfile(os.path.join(source, original))
+    return keep
+
+
+class _GzipTee:
+    # Text file wrapper that also compresses everything written through it
+    def __init__(self, f, gz_file, compressor):
+        self._f = f
+        self._gz_file = gz_file
+        self._compressor = compressor
+
+    def write(self, text):
+        self._gz_file.write(self._compressor.compress(text.encode('utf-8')))
+        return self._f.write(text)
+
+
+class GzipSink(DirectorySink):
+    """
+    Write outputs to the filesystem, each compressible one together with
+    its .gz sibling, so a --gzip build compresses exactly the files it
+    writes. Pages are compressed while they are rendered. A file smaller
+    than min_size loses the .gz an earlier build may have left.
+
+    The sink holds only its settings, so it can be sent to worker processes.
+    """
+
+    def __init__(self, level=9, min_size=MIN_SIZE):
+        self.level = level
+        self.min_size = min_size
+
+    def write_page(self, path, write):
+        if not is_compressible(path):
+            super().write_page(path, write)
+            return
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+        def write_both(f):
+            def write_gz(gz_file):
+                write(_GzipTee(f, gz_file, compressor))
+                gz_file.write(compressor.flush())
+            write_atomic(path + GZIP_SUFFIX, write_gz, 'wb')
+
+        super().write_page(path, write_both)
+        stat = os.stat(path)
+        if stat.st_size < self.min_size:
+            remove_compressed(path)
+        else:
+            os.utime(path + GZIP_SUFFIX, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    def write_bytes(self, path, data):
+        super().write_bytes(path, data)
+        self._compress(path, len(data), data)
+
+    def add_file(self, path, src_path, mode="copy"):
+        super().add_file(path, src_path, mode)
+        self._compress(path, os.path.getsize(path))
+
+    def _compress(self, path, size, data=None):
+        if not is_compressible(path):
+            return
+        if size < self.min_size:
+            remove_compressed(path)
+        else:
+            compress_file(path, self.level, data)
+
+
+class PrecompressReport:
+    """
+    Relative paths of the files whose .gz sibling was written or removed.
+    """
+
+    def __init__(self):
+        self.compressed = []
+        self.removed = []
+
+    def summary(self):
+        return f"{len(self.compressed)} compressed, {len(self.removed)} removed"
+
+    def __repr__(self):
+        return f"PrecompressReport({self.summary()})"
+
+
+class PrecompressState:
+    """
+    Record of the settings an output directory was compressed with.
+
+    Builds with the same settings compress the files they write through a
+    GzipSink; any other --gzip build runs precompress_directory over the
+    whole directory first. ``loaded`` tells whether a record with these
+    settings was found.
+    """
+
+    def __init__(self, path, level, min_size, loaded=False):
+        self.path = path
+        self.level = level
+        self.min_size = min_size
+        self.loaded = loaded
+
+    @classmethod
+    def load(cls, path, level=9, min_size=MIN_SIZE):
+        return cls(path, level, min_size, loaded=read_settings(path) == (level, min_size))
+
+    def save(self):
+        data = {"level": self.level, "min_size": self.min_size}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_atomic(self.path, lambda f: json.dump(data, f, indent=2, sort_keys=True))
+
+
+def read_settings(path):
+    """
+    Return the (level, min_size) a state file records, or None if there is
+    no valid state at path.
+    """
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    return data.get("level"), data.get("min_size")
+
+
+def forget_state(dest_dir_path):
+    """
+    Delete the record of an output directory written without compression,
+    so the next --gzip build compresses the whole directory again.
+    """
+    state_path = default_state_path(dest_dir_path)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+
+
+def precompress_directory(directory, state_path=None, level=9, min_size=MIN_SIZE, workers=None, profiler=None):
+    """
+    Write a gzip-compressed .gz sibling of every compressible file under
+    directory, for servers that serve them directly (nginx ``gzip_static``).
+
+    This is the full pass for a directory not yet compressed with these
+    settings; later builds compress what they write through a GzipSink.
+    Every compressible file is compressed again, and the .gz of one too
+    small to be worth compressing is deleted. Files are compressed on a
+    thread pool; zlib releases the GIL while it works.
+
+    Args:
+    directory (str): Output directory to compress
+    state_path (str): Path of the record of the settings, defaults to one
+        next to directory
+    level (int): zlib compression level, 1-9
+    min_size (int): Files smaller than this many bytes are not compressed
+    workers (int): Number of files compressed at once, defaults to the
+        number of CPUs
+    profiler (BuildProfiler): Collects the compression time, if given
+
+    Returns:
+    PrecompressReport: The files that were compressed and removed
+    """
+    if profiler is None:
+        profiler = NULL_PROFILER
+    if state_path is None:
+        state_path = default_state_path(directory)
+    report = PrecompressReport()
+
+    with profiler.stage("precompress"):
+        pending = []
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for file_name in sorted(files):
+                if not is_compressible(file_name):
+                    continue
+                path = os.path.join(root, file_name)
+                rel_path = os.path.relpath(path, directory)
+                if os.path.getsize(path) >= min_size:
+                    pending.append((rel_path, path))
+                elif os.path.exists(path + GZIP_SUFFIX):
+                    remove_compressed(path)
+                    report.removed.append(rel_path)
+
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            sizes = executor.map(lambda item: compress_file(item[1], level), pending)
+            for (rel_path, path), size in zip(pending, sizes):
+                report.compressed.append(rel_path)
+                logging.info(f"Compressed: {path}{GZIP_SUFFIX} ({size} bytes)")
+
+        PrecompressState(state_path, level, min_size).save()
+
+    profiler.add_counters({"gzip_compressed": len(report.compressed)})
+    return report
@@ -0,0 +1,267 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from build import copy_directory, generate_pages_recursive, render_page
+from compress import forget_state
+from manifest import BuildManifest, default_manifest_path
+from markdown_blocks import BlockCache
+from render_cache import RenderCache
+from sinks import MemorySink
+from sources import MappingSource
+from template import TemplateResolver, cached_templates, load_template
+
+# Requests larger than this are rejected
+MAX_REQUEST_SIZE = 64 * 1024 * 1024
+
+METHODS = ("render", "build", "health", "stats")
+
+
+class RequestError(Exception):
+    """
+    A request that cannot be served, reported back to the client.
+    """
+
+
+class RenderDaemon:
+    """
+    A long-running renderer that keeps compiled templates, the block cache
+    and the render cache warm between requests.
+
+    Renders run one at a time (they share the block cache and are CPU
+    bound anyway) and builds run one at a time, but a render never waits
+    for a build: builds keep their own block cache.
+
+    Args:
+    content_dir (str): Path to the content directory
+    static_dir (str): Path to the static files directory
+    template_path (str): Path to the default HTML template
+    public_dir (str): Output directory of builds
+    block_cache_size (int): Rendered blocks kept for reuse
+    render_cache_dir (str): Directory of an on-disk render cache, if any
+    render_cache_max_bytes (int): Size the render cache is pruned to
+    """
+
+    def __init__(self, content_dir, static_dir, template_path, public_dir,
+                 block_cache_size=4096, render_cache_dir=None, render_cache_max_bytes=1024 * 1024 * 1024):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.public_dir = public_dir
+        self.block_cache = BlockCache(block_cache_size)
+        self.build_block_cache = BlockCache(block_cache_size)
+        self.render_cache = None
+        self.build_render_cache = None
+        if render_cache_dir is not None:
+            self.render_cache = RenderCache(render_cache_dir, render_cache_max_bytes)
+            self.build_render_cache = RenderCache(render_cache_dir, render_cache_max_bytes)
+        self.started = time.time()
+        self.requests = {}
+        self._stats_lock = threading.Lock()
+        self._render_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def handle(self, request):
+        """
+        Serve one decoded request and return the response to encode.
+
+        Requests are objects with a ``method``, optional ``params`` and an
+        optional ``id`` echoed back. Responses hold ``ok`` and either a
+        ``result`` or an ``error`` message.
+        """
+        start = time.perf_counter()
+        request_id = request.get("id") if isinstance(request, dict) else None
+        method = request.get("method") if isinstance(request, dict) else None
+        try:
+            if method not in METHODS:
+                raise RequestError(f"Unknown method: {method}")
+            params = request.get("params") or {}
+            if not isinstance(params, dict):
+                raise RequestError("params must be an object")
+            result = getattr(self, method)(**params)
+            response = {"id": request_id, "ok": True, "result": result}
+        except RequestError as e:
+            response = {"id": request_id, "ok": False, "error": str(e)}
+        except Exception as e:
+            # A failing page must not take the daemon down with it
+            logging.exception(f"{method} request failed")
+            response = {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        self._record(method if method in METHODS else "invalid", time.perf_counter() - start, response["ok"])
+        return response
+
+    def _record(self, method, seconds, ok):
+        with self._stats_lock:
+            stats = self.requests.setdefault(method, {"count": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0})
+            stats["count"] += 1
+            stats["errors"] += not ok
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def render(self, path=None, markdown=None):
+        """
+        Render one page without writing it.
+
+        Args:
+        path (str): Page path relative to the content directory, e.g.
+            "blog/post.md"; picks the template and names the page in warnings
+        markdown (str): Markdown to render instead of the file at path,
+            e.g. an unsaved draft
+
+        Returns:
+        dict: ``html`` of the page and any ``warnings``
+        """
+        if path is None and markdown is None:
+            raise RequestError("render needs a path, markdown or both")
+        md_path = os.path.join(self.content_dir, path if path is not None else "draft.md")
+        if os.path.relpath(md_path, self.content_dir).startswith(os.pardir):
+            raise RequestError(f"Path is outside the content directory: {path}")
+        if markdown is None and not os.path.isfile(md_path):
+            raise RequestError(f"No such page: {path}")
+        template_path = TemplateResolver(self.content_dir, self.template_path).resolve(os.path.dirname(md_path))
+        site = MappingSource({md_path: markdown}) if markdown is not None else None
+        sink = MemorySink()
+        with self._render_lock:
+            template = load_template(template_path)
+            warnings = render_page(
+                md_path, template, md_path, block_cache=self.block_cache,
+                render_cache=self.render_cache, sink=sink, site=site,
+            )
+        return {"html": sink.files[md_path].decode('utf-8'), "warnings": warnings}
+
+    def build(self, jobs=1):
+        """
+        Run an incremental build into the output directory.
+
+        Returns:
+        dict: Static files ``copied`` and ``removed`` and build ``seconds``
+        """
+        start = time.perf_counter()
+        with self._build_lock:
+            manifest = BuildManifest.load(default_manifest_path(self.public_dir))
+            outputs = {os.path.normpath(entry["output"]) for entry in manifest.pages.values()}
+            report = copy_directory(
+                self.static_dir, self.public_dir, sync=True, preserve=outputs.__contains__,
+            )
+            generate_pages_recursive(
+                self.content_dir, self.template_path, self.public_dir, jobs=jobs,
+                block_cache=self.build_block_cache, render_cache=self.build_render_cache,
+            )
+            # The sync removed any .gz files a --gzip build left
+            forget_state(self.public_dir)
+        return {
+            "copied": len(report.added) + len(report.updated),
+            "removed": len(report.removed),
+            "seconds": time.perf_counter() - start,
+        }
+
+    def health(self):
+        return {"status": "ok", "pid": os.getpid(), "uptime": time.time() - self.started}
+
+    def stats(self):
+        with self._stats_lock:
+            requests = {method: dict(stats) for method, stats in self.requests.items()}
+        return {
+            "uptime": time.time() - self.started,
+            "requests": requests,
+            "templates": len(cached_templates()),
+            "block_cache": self.block_cache.stats(),
+            "build_block_cache": self.build_block_cache.stats(),
+            "render_cache": self.render_cache.stats() if self.render_cache is not None else None,
+        }
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Read newline-delimited JSON requests from a connection and answer each
+    with one line of JSON, until the client closes it.
+    """
+
+    def handle(self):
+        renderer = self.server.renderer
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_SIZE + 1)
+            if not line:
+                break
+            if len(line) > MAX_REQUEST_SIZE:
+                self._reply({"id": None, "ok": False, "error": "Request too large"})
+                break
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {"id": None, "ok": False, "error": f"Invalid JSON: {e}"}
+            else:
+                response = renderer.handle(request)
+            try:
+                self._reply(response)
+            except (BrokenPipeError, ConnectionResetError):
+                break
+
+    def _reply(self, response):
+        self.wfile.write(json.dumps(response).encode('utf-8') + b"\n")
+        self.wfile.flush()
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Serve a RenderDaemon on a Unix domain socket, one thread per client.
+
+    A socket file left behind by a daemon that is no longer running is
+    replaced; one that still accepts connections is not.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, renderer):
+        self.renderer = renderer
+        self.socket_path = socket_path
+        if os.path.exists(socket_path):
+            if _is_listening(socket_path):
+                raise OSError(f"A daemon is already listening on {socket_path}")
+            os.remove(socket_path)
+        super().__init__(socket_path, DaemonRequestHandler)
+
+    def server_bind(self):
+        # Only the owner may render through the daemon. The socket file is
+        # created by bind, so restrict it there: a chmod afterwards leaves
+        # a window in which anyone could connect.
+        umask = os.umask(0o077)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def _is_listening(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def call(socket_path, method, **params):
+    """
+    Send one request to a daemon and return its result.
+
+    Raises:
+    RuntimeError: If the daemon reports an error
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps({"method": method, "params": params}).encode('utf-8') + b"\n")
+        with sock.makefile('rb') as reader:
+            response = json.loads(reader.readline())
+    if not response["ok"]:
+        raise RuntimeError(response["error"])
+    return response["result"]
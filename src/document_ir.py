@@ -0,0 +1,358 @@
+from array import array
+from htmlnode import LeafNode, ParentNode
+from textnode import TEXT_TYPE_TAGS, TextType
+
+# Node kinds: raw text (a LeafNode without a tag), a LeafNode with a tag,
+# and an element with children (a ParentNode)
+TEXT = 0
+LEAF = 1
+ELEMENT = 2
+
+# Index stored where a node has no tag, value or parent
+NONE = -1
+
+
+class Document:
+    """
+    An HTML tree stored as parallel arrays instead of one object per node.
+
+    Nodes are numbered in document order (a parent before its children).
+    For node ``i``:
+
+    - ``kinds[i]`` is TEXT, LEAF or ELEMENT
+    - ``tags[i]`` and ``values[i]`` index ``strings`` (NONE if absent)
+    - ``ends[i]`` is one past the last node of its subtree, so its
+      descendants are exactly ``i + 1`` to ``ends[i] - 1``
+    - its attributes are the pairs ``prop_names[j]``/``prop_values[j]`` (both
+      indexing ``strings``) for j from ``prop_offsets[i]`` to
+      ``prop_offsets[i + 1]``
+
+    Tag names and attributes are stored once however often they occur. A
+    Document can be used wherever an HTMLNode is serialized, e.g. as a
+    template slot value.
+    """
+
+    __slots__ = (
+        "kinds", "tags", "values", "ends",
+        "prop_offsets", "prop_names", "prop_values", "strings",
+    )
+
+    def __init__(self, kinds, tags, values, ends, prop_offsets, prop_names, prop_values, strings):
+        self.kinds = kinds
+        self.tags = tags
+        self.values = values
+        self.ends = ends
+        self.prop_offsets = prop_offsets
+        self.prop_names = prop_names
+        self.prop_values = prop_values
+        self.strings = strings
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def props(self, i):
+        """
+        Return the attributes of node i as a dict, or None if it has none.
+        """
+        start, end = self.prop_offsets[i], self.prop_offsets[i + 1]
+        if start == end:
+            return None
+        strings = self.strings
+        return {
+            strings[self.prop_names[j]]: strings[self.prop_values[j]]
+            for j in range(start, end)
+        }
+
+    def children(self, i):
+        """
+        Return the numbers of the children of node i, or of the top-level
+        nodes when i is NONE.
+        """
+        child = i + 1
+        end = self.ends[i] if i != NONE else len(self.kinds)
+        children = []
+        while child < end:
+            children.append(child)
+            child = self.ends[child]
+        return children
+
+    def parents(self):
+        """
+        Return an array of each node's parent number, NONE for top-level
+        nodes.
+        """
+        parents = array('l')
+        ends = self.ends
+        # Open elements as (number, end) pairs
+        stack = []
+        for i in range(len(ends)):
+            while stack and i >= stack[-1][1]:
+                stack.pop()
+            parents.append(stack[-1][0] if stack else NONE)
+            if ends[i] > i + 1:
+                stack.append((i, ends[i]))
+        return parents
+
+    def html_parts(self):
+        """
+        Return ("", children, "") for serializing the document inside an
+        HTMLNode tree, children being its HTML chunks as text leaves.
+        """
+        return "", (LeafNode(None, chunk) for chunk in self._chunks()), ""
+
+    def _chunks(self):
+        # Yield the HTML of the document straight from the arrays.
+        # Plain lists index faster than arrays in the loop below
+        kinds, tags, values, ends = (
+            self.kinds.tolist(), self.tags.tolist(), self.values.tolist(), self.ends.tolist()
+        )
+        offsets = self.prop_offsets.tolist()
+        strings = self.strings
+        # Opening and closing tags of attribute-less elements, by tag index
+        openings = {}
+        closings = {}
+        # Closing tags of the open elements, and the node numbers their
+        # subtrees end at
+        closing = []
+        closing_at = []
+        next_close = len(kinds)
+        for i, kind in enumerate(kinds):
+            while i >= next_close:
+                yield closing.pop()
+                closing_at.pop()
+                next_close = closing_at[-1] if closing_at else len(kinds)
+            if kind == TEXT:
+                yield strings[values[i]]
+                continue
+            tag_index = tags[i]
+            if offsets[i] == offsets[i + 1]:
+                opening = openings.get(tag_index)
+                if opening is None:
+                    opening = openings[tag_index] = f"<{strings[tag_index]}>"
+            else:
+                opening = f"<{strings[tag_index]}{self._attributes(i)}>"
+            end_tag = closings.get(tag_index)
+            if end_tag is None:
+                end_tag = closings[tag_index] = f"</{strings[tag_index]}>"
+            if kind == LEAF:
+                yield opening
+                yield strings[values[i]]
+                yield end_tag
+            else:
+                yield opening
+                closing.append(end_tag)
+                closing_at.append(ends[i])
+                next_close = ends[i]
+        while closing:
+            yield closing.pop()
+
+    def _attributes(self, i):
+        strings = self.strings
+        return "".join(
+            f' {strings[self.prop_names[j]]}="{strings[self.prop_values[j]]}"'
+            for j in range(self.prop_offsets[i], self.prop_offsets[i + 1])
+        )
+
+    def iter_html(self):
+        """
+        Yield the HTML of the document in chunks.
+        """
+        return self._chunks()
+
+    def to_html(self):
+        return "".join(self._chunks())
+
+    def write_html(self, sink):
+        """
+        Write the HTML of the document to a file-like object, one chunk at
+        a time.
+        """
+        write = sink.write
+        for chunk in self._chunks():
+            write(chunk)
+
+    def to_html_node(self):
+        """
+        Convert to an HTMLNode tree. A document with a single top-level
+        node becomes that node; otherwise the top-level nodes are returned
+        as a list.
+        """
+        kinds, tags, values, ends = self.kinds, self.tags, self.values, self.ends
+        strings = self.strings
+        roots = []
+        # Child lists of the open elements, with the node numbers their
+        # subtrees end at
+        stack = []
+        for i in range(len(kinds)):
+            while stack and i >= stack[-1][1]:
+                stack.pop()
+            kind = kinds[i]
+            if kind == ELEMENT:
+                children = []
+                node = ParentNode(strings[tags[i]], children, self.props(i))
+            elif kind == LEAF:
+                node = LeafNode(strings[tags[i]], strings[values[i]], self.props(i))
+            else:
+                node = LeafNode(None, strings[values[i]])
+            (stack[-1][0] if stack else roots).append(node)
+            if kind == ELEMENT:
+                stack.append((children, ends[i]))
+        return roots[0] if len(roots) == 1 else roots
+
+    @classmethod
+    def from_html_node(cls, node):
+        """
+        Convert an HTMLNode tree (or a list of them) to a Document.
+
+        Raises:
+        ValueError: For the nodes HTMLNode.to_html would reject
+        """
+        builder = DocumentBuilder()
+        builder.add_html_node(node)
+        return builder.build()
+
+    def __repr__(self):
+        return f"Document({len(self.kinds)} nodes, {len(self.strings)} strings)"
+
+
+class DocumentBuilder:
+    """
+    Append nodes to a Document in document order.
+
+    ``open`` starts an element whose children are the nodes added until the
+    matching ``close``.
+    """
+
+    def __init__(self):
+        # Plain lists append faster than arrays; build() packs them
+        self.kinds = []
+        self.tags = []
+        self.values = []
+        self.ends = []
+        self.prop_offsets = [0]
+        self.prop_names = []
+        self.prop_values = []
+        self.strings = []
+        self._string_ids = {}
+        self._open = []
+
+    def _string(self, value):
+        strings = self.strings
+        index = self._string_ids.setdefault(value, len(strings))
+        if index == len(strings):
+            strings.append(value)
+        return index
+
+    def _add_props(self, props):
+        prop_names = self.prop_names
+        if props:
+            for name, value in props.items():
+                prop_names.append(self._string(name))
+                self.prop_values.append(self._string(value))
+        self.prop_offsets.append(len(prop_names))
+
+    # text, leaf and open run once per node, so each appends to the arrays
+    # directly. Text values are rarely repeated and are not deduplicated.
+
+    def text(self, value):
+        """
+        Add raw text (or already serialized HTML).
+        """
+        kinds = self.kinds
+        kinds.append(TEXT)
+        self.tags.append(NONE)
+        self.values.append(len(self.strings))
+        self.strings.append(value)
+        self.ends.append(len(kinds))
+        self.prop_offsets.append(len(self.prop_names))
+
+    def leaf(self, tag, value, props=None):
+        kinds = self.kinds
+        kinds.append(LEAF)
+        self.tags.append(self._string(tag))
+        self.values.append(len(self.strings))
+        self.strings.append(value)
+        self.ends.append(len(kinds))
+        self._add_props(props)
+
+    def open(self, tag, props=None):
+        kinds = self.kinds
+        self._open.append(len(kinds))
+        kinds.append(ELEMENT)
+        self.tags.append(self._string(tag))
+        self.values.append(NONE)
+        # Set by close()
+        self.ends.append(len(kinds))
+        self._add_props(props)
+
+    def close(self):
+        i = self._open.pop()
+        self.ends[i] = len(self.kinds)
+
+    def add_html_node(self, node):
+        """
+        Add an HTMLNode tree, or a list of them, walking it without
+        recursion.
+        """
+        stack = [iter(node if isinstance(node, list) else (node,))]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                if stack:
+                    self.close()
+                continue
+            if isinstance(child, ParentNode):
+                if child.tag is None:
+                    raise ValueError("Invalid HTML: no tag")
+                if child.children is None:
+                    raise ValueError("Invalid HTML: no children")
+                self.open(child.tag, child.props)
+                stack.append(iter(child.children))
+            elif child.value is None:
+                raise ValueError("Invalid HTML: no value")
+            elif child.tag is None:
+                self.text(child.value)
+            else:
+                self.leaf(child.tag, child.value, child.props)
+
+    def add_text_nodes(self, text_nodes):
+        """
+        Add the HTML for a list of TextNodes, as text_node_to_html_node
+        would convert them, without creating the HTMLNodes.
+        """
+        for text_node in text_nodes:
+            text_type = text_node.text_type
+            if text_node.children is not None:
+                if text_type is TextType.BOLD:
+                    self.open("b")
+                elif text_type is TextType.ITALIC:
+                    self.open("i")
+                elif text_type is TextType.LINK:
+                    self.open("a", {"href": text_node.url})
+                else:
+                    raise ValueError(f"Invalid nested text type: {text_type}")
+                self.add_text_nodes(text_node.children)
+                self.close()
+            elif text_type is TextType.TEXT:
+                self.text(text_node.text)
+            elif text_type in TEXT_TYPE_TAGS:
+                self.leaf(TEXT_TYPE_TAGS[text_type], text_node.text)
+            elif text_type is TextType.LINK:
+                self.leaf("a", text_node.text, {"href": text_node.url})
+            elif text_type is TextType.IMAGE:
+                self.leaf("img", "", {"src": text_node.url, "alt": text_node.text})
+            else:
+                raise ValueError(f"Invalid text type: {text_type}")
+
+    def build(self):
+        """
+        Return the Document built so far.
+        """
+        if self._open:
+            raise ValueError(f"{len(self._open)} elements were opened but not closed")
+        return Document(
+            array('b', self.kinds), array('l', self.tags), array('l', self.values),
+            array('l', self.ends), array('l', self.prop_offsets),
+            array('l', self.prop_names), array('l', self.prop_values), self.strings,
+        )
@@ -1,6 +1,12 @@
+from sys import intern
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
-        self.tag = tag
+        # Tags are interned so the many nodes sharing a tag share one string
+        self.tag = intern(tag) if type(tag) is str else tag
         self.value = value
         self.children = children
         self.props = props
@@ -8,6 +14,44 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError("to_html method not implemented")
 
+    def html_parts(self):
+        """
+        Return (opening, children, closing) for serializing this node.
+
+        Leaves return their whole HTML as ``opening`` and None for the rest.
+        """
+        raise NotImplementedError("html_parts method not implemented")
+
+    def iter_html(self):
+        """
+        Yield the HTML for this node in chunks.
+
+        The tree is walked with an explicit stack, so deeply nested trees
+        do not hit the recursion limit and no intermediate strings are built
+        for subtrees.
+        """
+        stack = [(iter((self,)), None)]
+        while stack:
+            children, closing = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                if closing is not None:
+                    yield closing
+                continue
+            opening, grandchildren, child_closing = child.html_parts()
+            yield opening
+            if grandchildren is not None:
+                stack.append((iter(grandchildren), child_closing))
+
+    def write_html(self, sink):
+        """
+        Write the HTML for this node to a file-like object with a write method.
+        """
+        write = sink.write
+        for chunk in self.iter_html():
+            write(chunk)
+
     def props_to_html(self):
         if self.props is None:
             return ""
@@ -21,6 +65,8 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
@@ -31,23 +77,28 @@ class LeafNode(HTMLNode):
             return self.value
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def html_parts(self):
+        return self.to_html(), None, None
+
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def html_parts(self):
         if self.tag is None:
             raise ValueError("Invalid HTML: no tag")
         if self.children is None:
             raise ValueError("Invalid HTML: no children")
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html()}>", self.children, f"</{self.tag}>"
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
@@ -5,7 +5,7 @@ import re
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
     for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT.value:
+        if old_node.text_type is not TextType.TEXT:
             new_nodes.append(old_node)
             continue
         split_nodes = []
@@ -26,7 +26,7 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 def split_nodes_image(old_nodes):
     new_nodes = []
     for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT.value:
+        if old_node.text_type is not TextType.TEXT:
             new_nodes.append(old_node)
             continue
         original_text = old_node.text
@@ -56,7 +56,7 @@ def split_nodes_image(old_nodes):
 def split_nodes_link(old_nodes):
     new_nodes = []
     for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT.value:
+        if old_node.text_type is not TextType.TEXT:
             new_nodes.append(old_node)
             continue
         original_text = old_node.text
@@ -77,25 +77,178 @@ def split_nodes_link(old_nodes):
     return new_nodes
 
 
+IMAGE_PATTERN = re.compile(r"!\[([^\]]*)\]\(([^)]+)\)")
+LINK_PATTERN = re.compile(r"\[([^\]]+)\]\(([^)]+)\)")
+
+# Characters that can start an inline token
+INLINE_SPECIAL = re.compile(r"[*`!\[]")
+
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
+    """
+    Tokenize inline markdown into TextNodes in a single scan.
 
-    # Process bold text
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    Code spans, images and links are matched where they start; ``**`` and
+    ``*`` open and close frames on a delimiter stack, so formatting can nest
+    (bold inside a link, italic inside bold, ...). A formatted node whose
+    content is not plain text keeps its parsed content in ``children``.
 
-    # Process italic text
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    Args:
+    text (str): The inline markdown
 
-    # Process code blocks
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    Returns:
+    list: The TextNodes
 
-    # Process images
+    Input the single scan rejects is split by the original passes instead
+    (``**``, then ``*``, then code, images and links), so everything they
+    accepted still parses, with the flat output they gave it.
+
+    Raises:
+    ValueError: If a delimiter is not closed
+    """
+    try:
+        return _scan_textnodes(text)
+    except ValueError:
+        return _split_textnodes(text)
+
+
+def _split_textnodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
     nodes = split_nodes_image(nodes)
+    return split_nodes_link(nodes)
+
+
+def _scan_textnodes(text):
+    root = []
+    # Open bold/italic frames as (text_type, nodes) pairs
+    stack = []
+    nodes = root
+    # Start of the literal text not yet emitted
+    position = 0
+    i = 0
+    while True:
+        match = INLINE_SPECIAL.search(text, i)
+        if match is None:
+            break
+        start = match.start()
+        char = text[start]
+        if char == "`":
+            end = text.find("`", start + 1)
+            if end == -1:
+                # A backtick with no closing one is literal text (the old
+                # split passes left it alone inside bold or italic)
+                i = start + 1
+                continue
+            if end == start + 1 and stack:
+                # An empty code span inside bold or italic stays literal,
+                # as it did when the split passes never looked inside them
+                i = end + 1
+                continue
+            _flush_text(nodes, text, position, start)
+            if end > start + 1:
+                nodes.append(TextNode(text[start + 1:end], TextType.CODE))
+            position = i = end + 1
+        elif char == "!":
+            image = IMAGE_PATTERN.match(text, start)
+            # Code spans bind tighter than images and links
+            if image is None or "`" in image.group(0):
+                i = start + 1
+                continue
+            _flush_text(nodes, text, position, start)
+            nodes.append(TextNode(image.group(1), TextType.IMAGE, image.group(2)))
+            position = i = image.end()
+        elif char == "[":
+            link = LINK_PATTERN.match(text, start)
+            # An image starting inside the link text or URL is matched as
+            # the image
+            if link is None or "`" in link.group(0) or _image_within(text, start, link.end()):
+                i = start + 1
+                continue
+            if "[" in link.group(1):
+                # The text runs back to an unmatched "[" that the split
+                # passes kept out of the link; leave the whole text to them
+                raise ValueError("Invalid markdown, link text contains an unmatched [")
+            _flush_text(nodes, text, position, start)
+            nodes.append(_formatted_node(
+                TextType.LINK, text_to_textnodes(link.group(1)), link.group(2)
+            ))
+            position = i = link.end()
+        else:
+            end = start
+            while end < len(text) and text[end] == "*":
+                end += 1
+            _flush_text(nodes, text, position, start)
+            run = end - start
+            while run:
+                top = stack[-1][0] if stack else None
+                bold_open = any(frame[0] is TextType.BOLD for frame in stack)
+                if top is TextType.BOLD and run >= 2:
+                    run -= 2
+                elif top is TextType.ITALIC and run != 2:
+                    run -= 1
+                elif run >= 2 and bold_open:
+                    _unwind(stack, TextType.BOLD)
+                    run -= 2
+                elif run != 2 and any(frame[0] is TextType.ITALIC for frame in stack):
+                    _unwind(stack, TextType.ITALIC)
+                    run -= 1
+                else:
+                    text_type = TextType.BOLD if run >= 2 else TextType.ITALIC
+                    run -= 2 if run >= 2 else 1
+                    stack.append((text_type, []))
+                    nodes = stack[-1][1]
+                    continue
+                text_type, children = stack.pop()
+                nodes = stack[-1][1] if stack else root
+                if children:
+                    nodes.append(_formatted_node(text_type, children))
+            position = i = end
+    if stack:
+        raise ValueError("Invalid markdown, formatted section not closed")
+    _flush_text(nodes, text, position, len(text))
+    return root
+
+
+def _image_within(text, start, end):
+    position = text.find("![", start, end)
+    while position != -1:
+        if IMAGE_PATTERN.match(text, position):
+            return True
+        position = text.find("![", position + 1, end)
+    return False
+
+
+def _flush_text(nodes, text, start, end):
+    if start < end:
+        nodes.append(TextNode(text[start:end], TextType.TEXT))
+
+
+def _unwind(stack, text_type):
+    # Frames opened after the one being closed were never closed themselves,
+    # so their delimiters are literal text.
+    while stack[-1][0] is not text_type:
+        frame_type, children = stack.pop()
+        nodes = stack[-1][1]
+        delimiter = "**" if frame_type is TextType.BOLD else "*"
+        for node in [TextNode(delimiter, TextType.TEXT)] + children:
+            if (
+                nodes
+                and node.text_type is TextType.TEXT
+                and nodes[-1].text_type is TextType.TEXT
+            ):
+                nodes[-1] = TextNode(nodes[-1].text + node.text, TextType.TEXT)
+            else:
+                nodes.append(node)
 
-    # Process links
-    nodes = split_nodes_link(nodes)
 
-    return nodes
+def _formatted_node(text_type, children, url=None):
+    plain = "".join(child.text for child in children)
+    if len(children) == 1 and children[0].text_type is TextType.TEXT:
+        return TextNode(plain, text_type, url)
+    return TextNode(plain, text_type, url, children)
 
 
 def extract_markdown_images(text):
@@ -0,0 +1,244 @@
+import difflib
+import hashlib
+import json
+import logging
+import queue
+import threading
+from markdown_blocks import block_to_html_node, extract_title, parse_markdown
+from watch import diff_snapshots, snapshot
+
+# Path of the Server-Sent Events stream the injected script listens to
+LIVE_RELOAD_PATH = "/__livereload"
+
+# Attribute marking the element that holds a page's top-level blocks
+BLOCKS_ATTRIBUTE = "data-live-blocks"
+
+# Patches replace the [start, end) run of the container's children (old
+# indexes) with new blocks; they are applied last to first so earlier
+# indexes stay valid. Anything else reloads the page.
+CLIENT_SCRIPT = """<script>
+(function () {
+  var url = "%(path)s?path=" + encodeURIComponent(location.pathname) + "&version=%(version)s";
+  var source = new EventSource(url);
+  source.onmessage = function (message) {
+    var event = JSON.parse(message.data);
+    var root = document.querySelector("[%(attribute)s]");
+    if (event.type !== "patch" || !root) {
+      source.close();
+      location.reload();
+      return;
+    }
+    for (var i = event.ops.length - 1; i >= 0; i--) {
+      var op = event.ops[i];
+      for (var j = op[0]; j < op[1]; j++) {
+        root.removeChild(root.children[op[0]]);
+      }
+      var fragment = document.createElement("template");
+      fragment.innerHTML = op[2].join("");
+      root.insertBefore(fragment.content, root.children[op[0]] || null);
+    }
+  };
+})();
+</script>
+"""
+
+
+class LivePage:
+    """
+    A page rendered for live reload: its title, the HTML of each top-level
+    block and the digest of the template it was rendered with.
+    """
+
+    def __init__(self, title, blocks, template_digest):
+        self.title = title
+        self.blocks = blocks
+        self.template_digest = template_digest
+        digest = hashlib.sha256(f"{template_digest}\0{title}".encode())
+        for block in blocks:
+            digest.update(b"\0" + block.encode())
+        self.version = digest.hexdigest()[:32]
+
+
+def render_live_page(md_path, template, block_cache=None):
+    """
+    Render a page like render_page, but keep each top-level block's HTML,
+    mark their container with BLOCKS_ATTRIBUTE and inject the script that
+    patches changed blocks in place.
+
+    Returns:
+    tuple: (html, LivePage)
+    """
+    with open(md_path, 'r') as md_file:
+        markdown_content = md_file.read()
+    convert = block_to_html_node if block_cache is None else block_cache.render
+    document = parse_markdown(markdown_content)
+    blocks = [convert(block, block_type).to_html() for block_type, block in document.blocks]
+    title = document.title
+    if title is None:
+        try:
+            title = extract_title(markdown_content)
+        except ValueError:
+            print(f"Warning: No title found in {md_path}. Using a default title.")
+            title = "Untitled Page"
+    page = LivePage(title, blocks, template.digest)
+    content = f'<div {BLOCKS_ATTRIBUTE}="">{"".join(blocks)}</div>'
+    html = template.render(Title=title, Content=content)
+    return inject_script(html, page.version), page
+
+
+def inject_script(html, version):
+    """
+    Insert the live reload client before </body>, or at the end of pages
+    without one.
+    """
+    script = CLIENT_SCRIPT % {
+        "path": LIVE_RELOAD_PATH, "version": version, "attribute": BLOCKS_ATTRIBUTE,
+    }
+    index = html.lower().rfind("</body>")
+    if index == -1:
+        return html + script
+    return html[:index] + script + html[index:]
+
+
+def diff_blocks(old, new):
+    """
+    Return the edits turning the old list of block HTML into the new one.
+
+    Returns:
+    list: [start, end, blocks] entries, each replacing old[start:end] with
+    blocks, in increasing order of start
+    """
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    return [
+        [i1, i2, new[j1:j2]]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+
+
+def page_event(old, new):
+    """
+    Return the event that brings a browser showing old up to date with new,
+    or None if nothing visible changed.
+
+    Only block edits are patched in place; a changed title or template can
+    touch any part of the page, so those reload it.
+    """
+    if old is None or old.title != new.title or old.template_digest != new.template_digest:
+        return {"type": "reload"}
+    ops = diff_blocks(old.blocks, new.blocks)
+    if not ops:
+        return None
+    return {"type": "patch", "ops": ops}
+
+
+class Subscriber:
+    """
+    One connected browser: the page it shows and a queue of events for it.
+    """
+
+    def __init__(self, md_path, page):
+        self.md_path = md_path
+        self.page = page
+        self.events = queue.Queue()
+
+
+class LiveReload:
+    """
+    Watch the pages that browsers have open and push the blocks that
+    changed to them.
+
+    Every ``interval`` seconds each open page is fetched from the store,
+    which re-renders it only if its markdown or template changed; each
+    subscriber then gets the diff against the version it last saw. A
+    change to a static file reloads every page.
+
+    Args:
+    store (SiteStore): A store created with live=True
+    interval (float): Seconds between polls
+    """
+
+    def __init__(self, store, interval=0.1):
+        self.store = store
+        self.interval = interval
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._static = snapshot(store.static_dir)
+
+    def subscribe(self, md_path, version):
+        """
+        Register a browser showing the given version of a page. A browser
+        showing an older version is told to reload straight away.
+        """
+        page = self.store.get("page", md_path).live
+        subscriber = Subscriber(md_path, page)
+        if page.version != version:
+            subscriber.events.put({"type": "reload"})
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def poll(self):
+        """
+        Check the open pages and static files once and queue any events.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        static = snapshot(self.store.static_dir)
+        static_changed = bool(diff_snapshots(self._static, static))
+        self._static = static
+
+        pages = {}
+        for subscriber in subscribers:
+            if static_changed:
+                subscriber.events.put({"type": "reload"})
+                continue
+            if subscriber.md_path not in pages:
+                try:
+                    pages[subscriber.md_path] = self.store.get("page", subscriber.md_path).live
+                except FileNotFoundError:
+                    pages[subscriber.md_path] = None
+                except Exception as e:
+                    # Keep showing the last good version until the error is fixed
+                    logging.info(f"Live reload of {subscriber.md_path} failed: {e}")
+                    pages[subscriber.md_path] = subscriber.page
+            page = pages[subscriber.md_path]
+            if page is subscriber.page:
+                continue
+            event = {"type": "reload"} if page is None else page_event(subscriber.page, page)
+            subscriber.page = page
+            if event is not None:
+                subscriber.events.put(event)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.poll()
+
+    def stop(self):
+        """
+        Stop polling and end every open event stream.
+        """
+        self._stopped.set()
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.events.put(None)
+        if self._thread is not None:
+            self._thread.join()
+
+
+def format_event(event):
+    """
+    Encode an event as a Server-Sent Events message.
+    """
+    return f"data: {json.dumps(event)}\n\n".encode('utf-8')
@@ -1,16 +1,431 @@
 from textnode import TextNode, TextType
-from build import copy_directory, generate_page, generate_pages_recursive
+from build import (
+    copy_directory,
+    copy_source_directory,
+    generate_page,
+    generate_pages_from_source,
+    generate_pages_recursive,
+)
+from async_build import generate_pages_with_asyncio
+from daemon import DaemonServer, RenderDaemon
+from assets import COPY_MODES
+from compress import (
+    GzipSink,
+    PrecompressState,
+    default_state_path,
+    forget_state,
+    keep_compressed,
+    precompress_directory,
+)
+from markdown_blocks import BlockCache
+from manifest import BuildManifest, default_manifest_path
+from render_cache import RenderCache
+from sinks import OUTPUT_FORMATS, open_sink
+from sources import open_source
+from profiling import BUDGET_ACTIONS, BuildProfiler
+from serve import SiteServer, SiteStore
+from shard import ShardMergeError, merge_shards, parse_shard
+from livereload import LiveReload
+from watch import SiteWatcher
+import argparse
+import contextlib
 import logging
 import os
+import signal
+import sys
 
-def main():
-    # Define paths
-    content_dir = "content"
-    template_path = "template.html"
-    public_dir = "public"
+# Define paths
+CONTENT_DIR = "content"
+STATIC_DIR = "static"
+TEMPLATE_PATH = "template.html"
+PUBLIC_DIR = "public"
 
-    print("Generating pages...")
-    generate_pages_recursive(content_dir, template_path, public_dir)
+def shard_spec(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the static site.")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="number of worker processes used to render pages (0 for one per CPU)",
+    )
+    parser.add_argument(
+        "--clean", action="store_true",
+        help="delete the output directory and copy every static file again",
+    )
+    parser.add_argument(
+        "--checksum", action="store_true",
+        help="compare static files by content hash instead of size and mtime",
+    )
+    parser.add_argument(
+        "--copy-mode", choices=COPY_MODES, default="copy",
+        help="how static files are copied (hardlink/reflink fall back to copy across filesystems)",
+    )
+    parser.add_argument(
+        "--copy-workers", type=int, default=8,
+        help="number of static files copied concurrently",
+    )
+    parser.add_argument(
+        "--shard", type=shard_spec, metavar="I/N",
+        help="render only shard I of N (by a stable hash of each page's path), "
+             "for combining with the merge command; shard 1 also copies static files",
+    )
+    parser.add_argument(
+        "--source", metavar="PATH",
+        help=f"read {CONTENT_DIR}/, {STATIC_DIR}/ and {TEMPLATE_PATH} from this directory, "
+             ".zip or (compressed) tar archive instead of the working directory, "
+             "or '-' for a tar on stdin",
+    )
+    parser.add_argument(
+        "--source-strip", type=int, default=0, metavar="N",
+        help="drop the first N path components of every --source archive entry",
+    )
+    parser.add_argument(
+        "--output", metavar="PATH",
+        help="stream the site into a .tar, .tar.gz/.tgz or .zip archive instead of "
+             f"{PUBLIC_DIR}/, or '-' for a tar on stdout",
+    )
+    parser.add_argument(
+        "--output-format", choices=OUTPUT_FORMATS[1:],
+        help="archive format for --output, if not given by its suffix",
+    )
+    parser.add_argument(
+        "--async-io", action="store_true",
+        help="render pages with the asyncio driver, overlapping file reads and writes "
+             "with rendering (for slow or network filesystems)",
+    )
+    parser.add_argument(
+        "--io-workers", type=int, default=16,
+        help="with --async-io, number of file reads and writes in flight at once",
+    )
+    parser.add_argument(
+        "--max-in-flight", type=int, default=64,
+        help="with --async-io, number of pages held in memory at once",
+    )
+    parser.add_argument(
+        "--gzip", action="store_true",
+        help="write a .gz copy of every HTML, CSS and other text file for servers that "
+             "serve precompressed files (nginx gzip_static)",
+    )
+    parser.add_argument(
+        "--gzip-level", type=int, choices=range(1, 10), default=9, metavar="1-9",
+        help="with --gzip, the zlib compression level",
+    )
+    parser.add_argument(
+        "--gzip-workers", type=int, default=0,
+        help="with --gzip, number of files compressed concurrently when the whole output "
+             "directory needs compressing, e.g. after --gzip-level changes (0 for one per CPU)",
+    )
+    parser.add_argument(
+        "--block-cache-size", type=int, default=4096,
+        help="number of rendered blocks kept for reuse across pages (0 to disable, "
+             "converting each page to a compact array-backed document instead)",
+    )
+    parser.add_argument(
+        "--cache-dir", default=os.environ.get("SSG_CACHE_DIR"), metavar="PATH",
+        help="directory of an on-disk render cache reused across builds and machines "
+             "(default: $SSG_CACHE_DIR, no cache if unset)",
+    )
+    parser.add_argument(
+        "--cache-max-size", type=float, default=1024, metavar="MIB",
+        help="size the render cache is pruned down to after each build",
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="time each build stage and print a report at the end",
+    )
+    parser.add_argument(
+        "--profile-top", type=int, default=10,
+        help="number of slowest pages listed in the profile report",
+    )
+    parser.add_argument(
+        "--profile-json", metavar="PATH",
+        help="write the profile report as JSON (implies --profile)",
+    )
+    parser.add_argument(
+        "--profile-prometheus", metavar="PATH",
+        help="write the profile report as a Prometheus text file (implies --profile)",
+    )
+    parser.add_argument(
+        "--memory-profile", action="store_true",
+        help="measure the peak allocation of each page (implies --profile)",
+    )
+    parser.add_argument(
+        "--memory-budget", type=float, metavar="MIB",
+        help="flag pages whose peak allocation exceeds this many MiB (implies --memory-profile)",
+    )
+    parser.add_argument(
+        "--memory-budget-action", choices=BUDGET_ACTIONS, default="warn",
+        help="whether a page over the memory budget is reported or aborts the build",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    watch_parser = subparsers.add_parser(
+        "watch", help="build, then rebuild changed pages and assets as files change",
+    )
+    watch_parser.add_argument(
+        "--interval", type=float, default=0.25,
+        help="seconds between polls for changes",
+    )
+    watch_parser.add_argument(
+        "--debounce", type=float, default=0.025,
+        help="seconds without further changes before rebuilding",
+    )
+    serve_parser = subparsers.add_parser(
+        "serve", help="preview the site over HTTP, rendering pages when they are requested",
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    serve_parser.add_argument("--port", type=int, default=8888, help="port to listen on")
+    serve_parser.add_argument(
+        "--max-memory", type=float, default=256, metavar="MIB",
+        help="memory used to keep rendered pages and static files",
+    )
+    serve_parser.add_argument(
+        "--no-live-reload", dest="live_reload", action="store_false",
+        help="do not push edits to open pages",
+    )
+    serve_parser.add_argument(
+        "--interval", type=float, default=0.1,
+        help="seconds between checks of open pages for changes",
+    )
+    daemon_parser = subparsers.add_parser(
+        "daemon", help="keep templates and caches warm and render or build on request "
+                       "over a Unix socket",
+    )
+    daemon_parser.add_argument(
+        "--socket", default=os.environ.get("SSG_SOCKET", "ssg.sock"), metavar="PATH",
+        help="path of the Unix socket to listen on (default: $SSG_SOCKET or ssg.sock)",
+    )
+    merge_parser = subparsers.add_parser(
+        "merge", help="combine the outputs of a --shard build into one directory",
+    )
+    merge_parser.add_argument(
+        "shard_dirs", nargs="+", metavar="SHARD_DIR",
+        help="output directory of each shard, with its manifest next to it",
+    )
+    merge_parser.add_argument(
+        "--into", default=PUBLIC_DIR, metavar="PATH",
+        help=f"directory to merge into, replacing its contents (default: {PUBLIC_DIR})",
+    )
+    cache_parser = subparsers.add_parser(
+        "cache", help="inspect or prune the render cache given by --cache-dir",
+    )
+    cache_subparsers = cache_parser.add_subparsers(dest="cache_command", required=True)
+    cache_subparsers.add_parser("stats", help="show the number and size of cached pages")
+    prune_parser = cache_subparsers.add_parser(
+        "prune", help="evict the least recently used pages",
+    )
+    prune_parser.add_argument(
+        "--max-size", type=float, metavar="MIB",
+        help="size to prune down to (default: --cache-max-size, 0 empties the cache)",
+    )
+    return parser.parse_args(argv)
+
+def open_render_cache(args):
+    if args.cache_dir is None:
+        return None
+    return RenderCache(args.cache_dir, int(args.cache_max_size * 1024 * 1024))
+
+def build(args):
+    if args.async_io and (args.output is not None or args.source is not None):
+        raise SystemExit("--async-io cannot be combined with --output or --source")
+    if args.gzip and args.output is not None:
+        raise SystemExit("--gzip cannot be combined with --output")
+    if args.shard is not None and (args.output is not None or args.source is not None or args.async_io):
+        raise SystemExit("--shard cannot be combined with --output, --source or --async-io")
+    if args.output is None:
+        build_site(args)
+        return
+    sink = open_sink(args.output, PUBLIC_DIR, args.output_format)
+    if sink.on_disk:
+        raise SystemExit("--output must end in .tar, .tar.gz, .tgz or .zip, or be '-'")
+    # Keep progress messages out of an archive written to stdout
+    with contextlib.redirect_stdout(sys.stderr) if args.output == "-" else contextlib.nullcontext():
+        with sink:
+            build_site(args, sink)
+
+def build_site(args, sink=None):
+    memory_budget = None
+    if args.memory_budget is not None:
+        memory_budget = int(args.memory_budget * 1024 * 1024)
+    memory = args.memory_profile or memory_budget is not None
+    profiling = args.profile or args.profile_json or args.profile_prometheus or memory
+    profiler = None
+    if profiling:
+        profiler = BuildProfiler(memory, memory_budget, args.memory_budget_action)
+
+    site = open_source(args.source, args.source_strip) if args.source is not None else None
+
+    gzip_state = None
+    if args.gzip:
+        gzip_state = PrecompressState.load(default_state_path(PUBLIC_DIR), args.gzip_level)
+        if gzip_state.loaded or args.clean or site is not None:
+            # Everything already compressed, or about to be rewritten:
+            # compress just the files this build writes
+            sink = GzipSink(args.gzip_level)
+    elif sink is None:
+        # Forgotten up front, so a build that fails partway leaves no record
+        # claiming the files it did write are compressed
+        forget_state(PUBLIC_DIR)
+
+    try:
+        print("Copying static files...")
+        if args.shard is not None and args.shard[0] != 1:
+            print("Skipped: shard 1 copies static files.")
+        elif site is not None:
+            copy_source_directory(site, STATIC_DIR, PUBLIC_DIR, sink=sink, profiler=profiler)
+        elif sink is not None and not sink.on_disk:
+            copy_directory(STATIC_DIR, PUBLIC_DIR, profiler=profiler, sink=sink)
+        elif args.clean:
+            copy_directory(
+                STATIC_DIR, PUBLIC_DIR, mode=args.copy_mode, workers=args.copy_workers,
+                profiler=profiler, sink=sink,
+            )
+        else:
+            # Keep the pages generated by the previous build
+            manifest = BuildManifest.load(default_manifest_path(PUBLIC_DIR))
+            outputs = {os.path.normpath(entry["output"]) for entry in manifest.pages.values()}
+            preserve = outputs.__contains__
+            if args.gzip:
+                preserve = keep_compressed(preserve, STATIC_DIR)
+            copy_directory(
+                STATIC_DIR, PUBLIC_DIR, sync=True, checksum=args.checksum,
+                preserve=preserve, mode=args.copy_mode, workers=args.copy_workers,
+                profiler=profiler, sink=sink,
+            )
+
+        print("Generating pages...")
+        if site is not None:
+            generate_pages_from_source(
+                site, CONTENT_DIR, TEMPLATE_PATH, PUBLIC_DIR, jobs=args.jobs, profiler=profiler,
+                block_cache=BlockCache(args.block_cache_size), sink=sink,
+            )
+        elif args.async_io:
+            generate_pages_with_asyncio(
+                CONTENT_DIR, TEMPLATE_PATH, PUBLIC_DIR, jobs=args.jobs,
+                io_workers=args.io_workers, max_in_flight=args.max_in_flight, profiler=profiler,
+                block_cache=BlockCache(args.block_cache_size), render_cache=open_render_cache(args),
+                sink=sink,
+            )
+        else:
+            generate_pages_recursive(
+                CONTENT_DIR, TEMPLATE_PATH, PUBLIC_DIR, jobs=args.jobs, profiler=profiler,
+                block_cache=BlockCache(args.block_cache_size), render_cache=open_render_cache(args),
+                sink=sink, shard=args.shard,
+            )
+    finally:
+        if site is not None:
+            # Archive sources hold the archive or its spool file open
+            site.close()
+
+    if gzip_state is not None and sink is None:
+        print("Compressing files...")
+        report = precompress_directory(
+            PUBLIC_DIR, level=args.gzip_level, workers=args.gzip_workers, profiler=profiler,
+        )
+        print(f"Compressed files: {report.summary()}")
+    elif gzip_state is not None and not gzip_state.loaded:
+        gzip_state.save()
+
+    if profiler is not None:
+        profiler.stop()
+        print(profiler.format_report(args.profile_top))
+        if args.profile_json:
+            profiler.write_json(args.profile_json, args.profile_top)
+        if args.profile_prometheus:
+            profiler.write_prometheus(args.profile_prometheus, args.profile_top)
+
+def watch(args):
+    # Snapshot the inputs before the initial build, so edits made while it
+    # runs are not missed
+    watcher = SiteWatcher(
+        CONTENT_DIR, STATIC_DIR, TEMPLATE_PATH, PUBLIC_DIR,
+        interval=args.interval, debounce=args.debounce,
+        jobs=args.jobs, copy_mode=args.copy_mode, block_cache_size=args.block_cache_size,
+        render_cache=open_render_cache(args),
+        gzip_level=args.gzip_level if args.gzip else None,
+    )
+    try:
+        watcher.run(lambda: build(args))
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+def serve(args):
+    store = SiteStore(
+        CONTENT_DIR, STATIC_DIR, TEMPLATE_PATH,
+        block_cache=BlockCache(args.block_cache_size), render_cache=open_render_cache(args),
+        max_bytes=int(args.max_memory * 1024 * 1024), live=args.live_reload,
+    )
+    live_reload = LiveReload(store, args.interval) if args.live_reload else None
+    server = SiteServer((args.host, args.port), store, gzip_level=args.gzip_level, live_reload=live_reload)
+    if live_reload is not None:
+        live_reload.start()
+    host, port = server.server_address[:2]
+    print(f"Serving {CONTENT_DIR} and {STATIC_DIR} on http://{host}:{port}/ ...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped serving.")
+    finally:
+        if live_reload is not None:
+            live_reload.stop()
+        server.server_close()
+
+def daemon(args):
+    renderer = RenderDaemon(
+        CONTENT_DIR, STATIC_DIR, TEMPLATE_PATH, PUBLIC_DIR,
+        block_cache_size=args.block_cache_size, render_cache_dir=args.cache_dir,
+        render_cache_max_bytes=int(args.cache_max_size * 1024 * 1024),
+    )
+    server = DaemonServer(args.socket, renderer)
+    # Stop cleanly (removing the socket) when a service manager stops us
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Listening on {args.socket} ...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped the daemon.")
+    finally:
+        server.server_close()
+
+def merge(args):
+    try:
+        files, pages = merge_shards(
+            args.shard_dirs, args.into, mode=args.copy_mode, workers=args.copy_workers,
+        )
+    except ShardMergeError as e:
+        raise SystemExit(str(e))
+    print(f"Merged {len(args.shard_dirs)} shards into {args.into}: {files} files, {pages} pages.")
+
+def cache(args):
+    render_cache = open_render_cache(args)
+    if render_cache is None:
+        raise SystemExit("No render cache: pass --cache-dir or set SSG_CACHE_DIR")
+    if args.cache_command == "prune":
+        max_bytes = None if args.max_size is None else int(args.max_size * 1024 * 1024)
+        removed, freed = render_cache.prune(max_bytes)
+        print(f"Removed {removed} cached pages ({freed} bytes).")
+    stats = render_cache.stats()
+    print(f"Render cache: {stats['directory']}")
+    print(f"Pages: {stats['entries']}")
+    print(f"Size: {stats['bytes']} bytes (limit {stats['max_bytes']} bytes)")
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "watch":
+        watch(args)
+    elif args.command == "serve":
+        serve(args)
+    elif args.command == "daemon":
+        daemon(args)
+    elif args.command == "merge":
+        merge(args)
+    elif args.command == "cache":
+        cache(args)
+    else:
+        build(args)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+
+# Bump whenever a change to the parser or renderer alters generated output,
+# so that incremental builds re-render every page.
+GENERATOR_VERSION = "5"
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def default_manifest_path(dest_dir_path):
+    """
+    Return the manifest path for a destination directory.
+
+    The manifest lives next to the destination (``public`` ->
+    ``public.manifest.json``) so that cleaning the output tree does not
+    remove it.
+    """
+    return os.path.normpath(dest_dir_path) + MANIFEST_SUFFIX
+
+
+def forget_manifest(dest_dir_path):
+    """
+    Delete the manifest of a destination directory written by a build that
+    does not record its pages, so the next incremental build renders every
+    page again instead of trusting outputs it did not write.
+    """
+    manifest_path = default_manifest_path(dest_dir_path)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """
+    Return the hex SHA-256 digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    Record of the inputs used to produce each generated page.
+
+    ``pages`` maps a source path, relative to the content directory, to a
+    dict with the source ``hash``, its ``size`` and ``mtime_ns`` (used to
+    skip re-hashing unchanged files), the digest of the ``template`` it was
+    rendered with and the relative ``output`` path.
+
+    ``shard`` is the (index, count) of a sharded build, or None for a build
+    of every page.
+    """
+
+    def __init__(self, path, pages=None, shard=None):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+        self.shard = shard
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a manifest from disk, returning an empty one if it is missing,
+        unreadable or was written by a different generator version.
+        """
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("generator") != GENERATOR_VERSION:
+            return cls(path)
+        shard = data.get("shard")
+        return cls(path, data.get("pages", {}), tuple(shard) if shard else None)
+
+    def source_hash(self, rel_path, source_path):
+        """
+        Return the content hash of a source file, reusing the recorded hash
+        when the file's size and mtime are unchanged.
+        """
+        stat = os.stat(source_path)
+        entry = self.pages.get(rel_path)
+        if (
+            entry is not None
+            and entry.get("size") == stat.st_size
+            and entry.get("mtime_ns") == stat.st_mtime_ns
+        ):
+            return entry["hash"], stat
+        return hash_file(source_path), stat
+
+    def is_current(self, rel_path, digest, template_hash):
+        """
+        Return True if the page was last built from the same source and
+        template.
+        """
+        entry = self.pages.get(rel_path)
+        return (
+            entry is not None
+            and entry.get("template") == template_hash
+            and entry.get("hash") == digest
+        )
+
+    def record(self, rel_path, digest, stat, output, template_hash):
+        self.pages[rel_path] = {
+            "hash": digest,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "template": template_hash,
+            "output": output,
+        }
+
+    def save(self):
+        """
+        Atomically write the manifest to disk.
+        """
+        data = {
+            "generator": GENERATOR_VERSION,
+            "pages": self.pages,
+        }
+        if self.shard is not None:
+            data["shard"] = list(self.shard)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
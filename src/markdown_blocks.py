@@ -1,5 +1,8 @@
+import mmap
 import re
-from htmlnode import ParentNode
+from collections import OrderedDict
+from htmlnode import LeafNode, ParentNode
+from document_ir import DocumentBuilder
 from textnode import text_node_to_html_node
 from inline_markdown import text_to_textnodes
 
@@ -10,22 +13,230 @@ block_type_quote = "quote"
 block_type_olist = "ordered_list"
 block_type_ulist = "unordered_list"
 
+# An h1 line; the title must not be blank and never spans lines
+TITLE_PATTERN = re.compile(r'^#[^\S\n]+(\S.*)$', re.MULTILINE)
+
+HEADING_PATTERN = re.compile(r'^#{1,6} ')
+ULIST_LINE_PATTERN = re.compile(r'^\s*[\*\-]\s')
+
+# Characters of a fenced code block held while looking for its closing
+# fence; a longer fence is treated as unterminated, so a stray ``` cannot
+# pull the rest of a streamed file into memory
+FENCE_LOOKAHEAD = 1024 * 1024
+
+class MarkdownDocument:
+    """
+    Result of a single pass over a markdown document.
+
+    ``blocks`` holds (block_type, block) tuples, ``title`` the first h1
+    header (None if there is none) and ``headings`` a (level, text) tuple
+    for every heading block.
+    """
+
+    __slots__ = ("blocks", "title", "headings")
+
+    def __init__(self, blocks=None, title=None, headings=None):
+        self.blocks = blocks if blocks is not None else []
+        self.title = title
+        self.headings = headings if headings is not None else []
+
+def parse_markdown(markdown):
+    """
+    Split, classify and collect the title and headings of a document in one pass.
+
+    Returns:
+    MarkdownDocument: The classified blocks and the document metadata
+    """
+    document = MarkdownDocument()
+    document.blocks = list(iter_typed_blocks(markdown.split('\n'), document))
+    return document
+
 def markdown_to_blocks(markdown):
-    blocks = []
+    return list(iter_blocks(markdown.split('\n')))
+
+def iter_blocks(lines):
+    """
+    Yield markdown blocks one at a time from an iterable of lines.
+
+    Lines may keep their trailing newline, so a text file object can be
+    passed directly. Only the lines of the current block are held in memory.
+
+    Args:
+    lines (iterable): Lines of markdown
+
+    Yields:
+    str: Each block, with its lines joined by newlines
+    """
+    for _, block in iter_typed_blocks(lines):
+        yield block
+
+def iter_typed_blocks(lines, document=None, fence_lookahead=FENCE_LOOKAHEAD):
+    """
+    Yield (block_type, block) for each block of an iterable of lines.
+
+    Blocks are separated by blank lines, except inside a fenced code block,
+    which runs from an opening line starting with three backticks to the
+    next line ending with them. A fence left open at the end of the input,
+    or still open after fence_lookahead characters, is split on blank lines
+    like any other text.
+
+    Each block is classified while its lines are scanned, with the same
+    result as block_to_block_type.
+
+    Args:
+    lines (iterable): Lines of markdown, with or without trailing newlines
+    document (MarkdownDocument): Receives the title and headings, if given
+    fence_lookahead (int): Characters a fence may span before it is
+        treated as unterminated
+
+    Yields:
+    tuple: (block_type, block)
+    """
     current_block = []
+    fenced = False
+    fence_size = 0
+    # For the current block: whether every line so far is a quote line or
+    # an unordered list item, and the next expected ordered list number
+    # (0 once a line is not the next item)
+    quote = ulist = False
+    olist = 0
+    find_title = document is not None
 
-    for line in markdown.split('\n'):
+    for line in lines:
+        line = line.rstrip('\n')
+        if find_title:
+            match = TITLE_PATTERN.match(line)
+            if match:
+                document.title = match.group(1).strip()
+                find_title = False
+        if fenced:
+            current_block.append(line)
+            if line.endswith('```'):
+                fenced = False
+                continue
+            fence_size += len(line) + 1
+            if fence_size > fence_lookahead:
+                # Give up on the fence: emit the blocks it would fall back
+                # to, and carry on from the last one, which may continue
+                fenced = False
+                blocks, current_block = _split_unterminated(current_block)
+                for block in blocks:
+                    yield _block_type_with_metadata(block, document), block
+                quote, ulist, olist = _block_flags(current_block)
+            continue
         if line.strip() == '':
             if current_block:
-                blocks.append('\n'.join(current_block))
+                yield _typed_block(current_block, quote, ulist, olist, document)
                 current_block = []
-        else:
-            current_block.append(line)
+            continue
+        if not current_block:
+            if line.startswith('```'):
+                # Fenced blocks are code or paragraphs, never lists or quotes
+                fenced = len(line) < 6 or not line.endswith('```')
+                fence_size = len(line) + 1
+                quote = ulist = False
+                olist = 0
+                current_block.append(line)
+                continue
+            quote = ulist = True
+            olist = 1
+        current_block.append(line)
+        if quote:
+            quote = line.startswith('>')
+        if ulist:
+            ulist = ULIST_LINE_PATTERN.match(line) is not None
+        if olist:
+            number = line.strip().split('.')[0]
+            olist = olist + 1 if number.isdecimal() and int(number) == olist else 0
+
+    if fenced:
+        # Unterminated fence: fall back to splitting on blank lines
+        blocks, last = _split_unterminated(current_block)
+        if last:
+            blocks.append('\n'.join(last))
+        for block in blocks:
+            yield _block_type_with_metadata(block, document), block
+    elif current_block:
+        yield _typed_block(current_block, quote, ulist, olist, document)
+
+def _split_unterminated(lines):
+    # Split the lines of an unterminated fence on blank lines. Returns the
+    # complete blocks and the lines after the last blank line, which the
+    # next line of input may still continue.
+    blocks = []
+    lines_in_block = []
+    for line in lines:
+        if line.strip() != '':
+            lines_in_block.append(line)
+        elif lines_in_block:
+            blocks.append('\n'.join(lines_in_block))
+            lines_in_block = []
+    return blocks, lines_in_block
 
-    if current_block:
-        blocks.append('\n'.join(current_block))
+def _block_flags(lines):
+    # The quote, ulist and olist state iter_typed_blocks keeps for a block
+    if not lines or lines[0].startswith('```'):
+        return False, False, 0
+    quote = ulist = True
+    olist = 1
+    for line in lines:
+        quote = quote and line.startswith('>')
+        ulist = ulist and ULIST_LINE_PATTERN.match(line) is not None
+        if olist:
+            number = line.strip().split('.')[0]
+            olist = olist + 1 if number.isdecimal() and int(number) == olist else 0
+    return quote, ulist, olist
 
-    return blocks
+def _typed_block(lines, quote, ulist, olist, document):
+    block = '\n'.join(lines)
+    first = lines[0]
+    if first.startswith('#') and HEADING_PATTERN.match(first):
+        if document is not None:
+            level = len(first) - len(first.lstrip('#'))
+            document.headings.append((level, block[level + 1:]))
+        return block_type_heading, block
+    if first.startswith('```') and lines[-1].endswith('```'):
+        return block_type_code, block
+    if quote:
+        return block_type_quote, block
+    if ulist:
+        return block_type_ulist, block
+    if olist:
+        return block_type_olist, block
+    return block_type_paragraph, block
+
+def _block_type_with_metadata(block, document):
+    block_type = block_to_block_type(block)
+    if block_type == block_type_heading and document is not None:
+        level = len(block) - len(block.lstrip('#'))
+        document.headings.append((level, block[level + 1:]))
+    return block_type
+
+def iter_file_lines(path, use_mmap=False):
+    """
+    Yield the lines of a UTF-8 markdown file without reading it all at once.
+
+    Args:
+    path (str): Path to the markdown file
+    use_mmap (bool): Read through a memory map instead of a buffered file
+    """
+    if not use_mmap:
+        with open(path, 'r') as md_file:
+            yield from md_file
+        return
+    with open(path, 'rb') as md_file:
+        # Empty files cannot be memory-mapped
+        if md_file.seek(0, 2) == 0:
+            return
+        with mmap.mmap(md_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for line in iter(mapped.readline, b''):
+                yield line.decode('utf-8')
+
+def iter_file_blocks(path, use_mmap=False):
+    """
+    Yield the markdown blocks of a file one at a time.
+    """
+    return iter_blocks(iter_file_lines(path, use_mmap))
 
 def block_to_block_type(block):
     lines = block.split('\n')
@@ -123,15 +334,158 @@ def quote_to_html_node(block):
     return ParentNode("blockquote", children)
 
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
     children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
+    for block_type, block in iter_typed_blocks(markdown.split('\n')):
+        html_node = block_to_html_node(block, block_type)
         children.append(html_node)
     return ParentNode("div", children, None)
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+def markdown_to_document(markdown):
+    """
+    Convert markdown to a Document, the array-backed form of the tree
+    markdown_to_html_node returns, without creating any HTMLNodes.
+    """
+    return blocks_to_document(iter_typed_blocks(markdown.split('\n')))
+
+def blocks_to_document(typed_blocks):
+    """
+    Convert (block_type, block) pairs, as MarkdownDocument.blocks holds
+    them, to a Document of a div containing the blocks.
+
+    Building one Document per page rather than per block is what makes it
+    cheaper than a node tree: the arrays are only set up once.
+    """
+    builder = DocumentBuilder()
+    builder.open("div")
+    for block_type, block in typed_blocks:
+        add_block(builder, block, block_type)
+    builder.close()
+    return builder.build()
+
+def add_block(builder, block, block_type=None):
+    """
+    Add the HTML for a block to a DocumentBuilder, with the same structure
+    block_to_html_node gives it.
+    """
+    if block_type is None:
+        block_type = block_to_block_type(block)
+    if block_type == block_type_paragraph:
+        builder.open("p")
+        builder.add_text_nodes(text_to_textnodes(" ".join(block.split("\n"))))
+    elif block_type == block_type_heading:
+        level = len(block) - len(block.lstrip("#"))
+        if level + 1 >= len(block):
+            raise ValueError(f"Invalid heading level: {level}")
+        builder.open(f"h{level}")
+        builder.add_text_nodes(text_to_textnodes(block[level + 1:]))
+    elif block_type == block_type_code:
+        if not block.startswith("```") or not block.endswith("```"):
+            raise ValueError("Invalid code block")
+        builder.open("pre")
+        builder.open("code")
+        builder.add_text_nodes(text_to_textnodes(block[4:-3]))
+        builder.close()
+    elif block_type == block_type_olist or block_type == block_type_ulist:
+        builder.open("ol" if block_type == block_type_olist else "ul")
+        marker = 3 if block_type == block_type_olist else 2
+        for item in block.split("\n"):
+            builder.open("li")
+            builder.add_text_nodes(text_to_textnodes(item[marker:]))
+            builder.close()
+    elif block_type == block_type_quote:
+        new_lines = []
+        for line in block.split("\n"):
+            if not line.startswith(">"):
+                raise ValueError("Invalid quote block")
+            new_lines.append(line.lstrip(">").strip())
+        builder.open("blockquote")
+        builder.add_text_nodes(text_to_textnodes(" ".join(new_lines)))
+    else:
+        raise ValueError("Invalid block type")
+    builder.close()
+
+def blocks_to_html_node(blocks, block_cache=None):
+    """
+    Wrap an iterable of blocks in a div whose children are converted lazily.
+
+    Serializing the returned node with iter_html or write_html converts and
+    writes one block at a time, so memory stays bounded by the largest
+    block. The children can only be consumed once.
+    """
+    convert = block_to_html_node if block_cache is None else block_cache.render
+    return ParentNode("div", (convert(block) for block in blocks), None)
+
+class BlockCache:
+    """
+    Bounded LRU cache of rendered blocks, keyed by the block's markdown.
+
+    Converting a block is a pure function of its text, so blocks repeated
+    across pages (disclaimers, shared lists, boilerplate quotes) only need
+    to be parsed once. The rendered HTML fragment is stored rather than the
+    node tree, so cached blocks also skip serialization and can never be
+    mutated by a caller.
+
+    Args:
+    maxsize (int): Number of blocks kept; 0 disables caching
+    max_block_size (int): Longer blocks are converted but never stored, so
+        a few huge unique blocks cannot evict the small repeated ones
+    """
+
+    def __init__(self, maxsize=4096, max_block_size=16 * 1024):
+        self.maxsize = maxsize
+        self.max_block_size = max_block_size
+        self.hits = 0
+        self.misses = 0
+        self._fragments = OrderedDict()
+
+    def render(self, block, block_type=None):
+        """
+        Return the HTML node for a block, as block_to_html_node does.
+        """
+        html = self._fragments.get(block)
+        if html is not None:
+            self.hits += 1
+            self._fragments.move_to_end(block)
+            return LeafNode(None, html)
+        self.misses += 1
+        node = block_to_html_node(block, block_type)
+        if self.maxsize <= 0 or len(block) > self.max_block_size:
+            return node
+        html = node.to_html()
+        self._fragments[block] = html
+        if len(self._fragments) > self.maxsize:
+            self._fragments.popitem(last=False)
+        return LeafNode(None, html)
+
+    def merge_stats(self, hits, misses):
+        """
+        Add lookups counted by another cache, e.g. one in a worker process.
+        """
+        self.hits += hits
+        self.misses += misses
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._fragments),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self):
+        self._fragments.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._fragments)
+
+def block_to_html_node(block, block_type=None):
+    """
+    Convert a block to an HTML node, classifying it unless block_type is given.
+    """
+    if block_type is None:
+        block_type = block_to_block_type(block)
     if block_type == block_type_paragraph:
         return paragraph_to_html_node(block)
     if block_type == block_type_heading:
@@ -160,10 +514,24 @@ def extract_title(markdown):
     ValueError: If no h1 header is found
     """
     # Use regex to find the first h1 header
-    match = re.search(r'^#\s+(.+)$', markdown, re.MULTILINE)
+    match = TITLE_PATTERN.search(markdown)
     
     if match:
         # Return the captured group (everything after '# ')
         return match.group(1).strip()
     else:
         raise ValueError("No h1 header found in the markdown content")
+
+def extract_title_from_lines(lines):
+    """
+    Extract the first h1 header from an iterable of markdown lines, stopping
+    as soon as it is found.
+
+    Raises:
+    ValueError: If no h1 header is found
+    """
+    for line in lines:
+        match = TITLE_PATTERN.match(line.rstrip('\n'))
+        if match:
+            return match.group(1).strip()
+    raise ValueError("No h1 header found in the markdown content")
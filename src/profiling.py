@@ -0,0 +1,310 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+BUDGET_ACTIONS = ("warn", "abort")
+
+
+class MemoryBudgetExceeded(Exception):
+    """
+    Raised when a page's peak allocation exceeds the memory budget and the
+    budget action is "abort".
+    """
+
+    def __init__(self, path, peak_bytes, budget_bytes):
+        super().__init__(path, peak_bytes, budget_bytes)
+        self.path = path
+        self.peak_bytes = peak_bytes
+        self.budget_bytes = budget_bytes
+
+    def __str__(self):
+        return (
+            f"{self.path} allocated {format_bytes(self.peak_bytes)} at peak, "
+            f"over the {format_bytes(self.budget_bytes)} per-page memory budget"
+        )
+
+
+def format_bytes(count):
+    for unit in ("B", "KiB", "MiB"):
+        if abs(count) < 1024:
+            return f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GiB"
+
+
+class BuildProfiler:
+    """
+    Collect per-stage and per-page timings for a build.
+
+    Wrap work in ``stage(name)``; stages entered inside ``page(path)`` are
+    also attributed to that page. Pages rendered in another process can be
+    merged in with ``add_pages``.
+
+    With ``memory`` set, the peak Python allocation of each page is measured
+    with tracemalloc. Pages whose peak exceeds ``memory_budget`` bytes are
+    flagged in the report, or abort the build with MemoryBudgetExceeded
+    when ``budget_action`` is "abort". Call ``check_budget()`` before a
+    page's output is committed so an aborted page leaves none behind.
+    """
+
+    enabled = True
+
+    def __init__(self, memory=False, memory_budget=None, budget_action="warn"):
+        if budget_action not in BUDGET_ACTIONS:
+            raise ValueError(f"Invalid memory budget action: {budget_action}")
+        self.memory = memory or memory_budget is not None
+        self.memory_budget = memory_budget
+        self.budget_action = budget_action
+        self.stages = {}
+        self.pages = []
+        self.counters = {}
+        self.static_files = 0
+        self.started = time.perf_counter()
+        self.finished = None
+        self._page = None
+        self._baseline = None
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def settings(self):
+        """
+        Return the arguments needed to create an equivalent profiler, e.g.
+        in a worker process.
+        """
+        return self.memory, self.memory_budget, self.budget_action
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            if self._page is not None:
+                page_stages = self._page["stages"]
+                page_stages[name] = page_stages.get(name, 0.0) + elapsed
+
+    @contextmanager
+    def page(self, path):
+        record = {"path": path, "seconds": 0.0, "stages": {}}
+        self._page = record
+        if self.memory:
+            # Drop the last page's baseline before measuring this one's
+            self._baseline = None
+            tracemalloc.reset_peak()
+            baseline = self._baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            self._page = None
+            self.pages.append(record)
+            if self.memory:
+                record["peak_bytes"] = tracemalloc.get_traced_memory()[1] - baseline
+        if self.memory_budget is not None and record["peak_bytes"] > self.memory_budget:
+            record["over_budget"] = True
+            if self.budget_action == "abort":
+                raise MemoryBudgetExceeded(path, record["peak_bytes"], self.memory_budget)
+
+    def check_budget(self):
+        """
+        Raise MemoryBudgetExceeded if the current page has already gone over
+        the memory budget and the budget action is "abort".
+        """
+        if self._page is None or self.memory_budget is None or self.budget_action != "abort":
+            return
+        peak_bytes = tracemalloc.get_traced_memory()[1] - self._baseline
+        if peak_bytes > self.memory_budget:
+            self._page["over_budget"] = True
+            raise MemoryBudgetExceeded(self._page["path"], peak_bytes, self.memory_budget)
+
+    def add_pages(self, records):
+        """
+        Merge page records collected by another profiler.
+        """
+        for record in records:
+            self.pages.append(record)
+            for name, seconds in record["stages"].items():
+                self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_static_files(self, count):
+        self.static_files += count
+
+    def add_counters(self, counts):
+        """
+        Add to named event counts, e.g. cache hits.
+        """
+        for name, count in counts.items():
+            self.counters[name] = self.counters.get(name, 0) + count
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def report(self, top=10):
+        """
+        Summarize the build.
+
+        Args:
+        top (int): Number of slowest pages to include
+
+        Returns:
+        dict: Total, per-stage and slowest-page timings and throughput
+        """
+        finished = self.finished if self.finished is not None else time.perf_counter()
+        total = finished - self.started
+        slowest = sorted(self.pages, key=lambda record: record["seconds"], reverse=True)[:top]
+        report = {
+            "total_seconds": total,
+            "pages": len(self.pages),
+            "pages_per_second": len(self.pages) / total if total else 0.0,
+            "static_files": self.static_files,
+            "static_files_per_second": self.static_files / total if total else 0.0,
+            "stages": dict(self.stages),
+            "counters": dict(self.counters),
+            "slowest_pages": slowest,
+        }
+        if self.memory:
+            measured = [record for record in self.pages if "peak_bytes" in record]
+            report["memory"] = {
+                "budget_bytes": self.memory_budget,
+                "max_peak_bytes": max((record["peak_bytes"] for record in measured), default=0),
+                "largest_pages": sorted(
+                    measured, key=lambda record: record["peak_bytes"], reverse=True
+                )[:top],
+                "over_budget": [record["path"] for record in measured if record.get("over_budget")],
+            }
+        return report
+
+    def format_report(self, top=10):
+        report = self.report(top)
+        lines = [
+            f"Build finished in {report['total_seconds']:.3f}s: "
+            f"{report['pages']} pages ({report['pages_per_second']:.1f}/s), "
+            f"{report['static_files']} static files ({report['static_files_per_second']:.1f}/s)",
+            "",
+            f"{'stage':<16} {'seconds':>10}",
+        ]
+        for name, seconds in sorted(report["stages"].items(), key=lambda item: -item[1]):
+            lines.append(f"{name:<16} {seconds:>10.4f}")
+        if report["counters"]:
+            lines.append("")
+            for name, count in sorted(report["counters"].items()):
+                lines.append(f"{name:<24} {count:>10}")
+        if report["slowest_pages"]:
+            lines.extend(["", f"Slowest {len(report['slowest_pages'])} pages:"])
+            for record in report["slowest_pages"]:
+                lines.append(f"{record['seconds']:>10.4f}  {record['path']}")
+        memory = report.get("memory")
+        if memory and memory["largest_pages"]:
+            lines.extend(["", f"Largest peak allocations (max {format_bytes(memory['max_peak_bytes'])}):"])
+            for record in memory["largest_pages"]:
+                lines.append(f"{format_bytes(record['peak_bytes']):>12}  {record['path']}")
+        if memory and memory["over_budget"]:
+            lines.extend([
+                "",
+                f"Warning: {len(memory['over_budget'])} pages exceeded the "
+                f"{format_bytes(memory['budget_bytes'])} memory budget:",
+            ])
+            lines.extend(f"  {path}" for path in memory["over_budget"])
+        return "\n".join(lines)
+
+    def write_json(self, path, top=10):
+        with open(path, 'w') as f:
+            json.dump(self.report(top), f, indent=2)
+
+    def format_prometheus(self, top=10):
+        """
+        Format the report in the Prometheus text exposition format.
+        """
+        report = self.report(top)
+        lines = [
+            "# HELP ssg_build_duration_seconds Wall time of the build.",
+            "# TYPE ssg_build_duration_seconds gauge",
+            f"ssg_build_duration_seconds {report['total_seconds']}",
+            "# HELP ssg_build_pages Pages rendered by the build.",
+            "# TYPE ssg_build_pages gauge",
+            f"ssg_build_pages {report['pages']}",
+            "# HELP ssg_build_pages_per_second Pages rendered per second of build time.",
+            "# TYPE ssg_build_pages_per_second gauge",
+            f"ssg_build_pages_per_second {report['pages_per_second']}",
+            "# HELP ssg_build_static_files Static files copied by the build.",
+            "# TYPE ssg_build_static_files gauge",
+            f"ssg_build_static_files {report['static_files']}",
+            "# HELP ssg_build_stage_seconds Time spent in each build stage.",
+            "# TYPE ssg_build_stage_seconds gauge",
+        ]
+        for name, seconds in report["stages"].items():
+            lines.append(f'ssg_build_stage_seconds{{stage="{_escape_label(name)}"}} {seconds}')
+        lines.extend([
+            "# HELP ssg_build_events_total Named event counts, e.g. cache hits.",
+            "# TYPE ssg_build_events_total counter",
+        ])
+        for name, count in report["counters"].items():
+            lines.append(f'ssg_build_events_total{{name="{_escape_label(name)}"}} {count}')
+        lines.extend([
+            "# HELP ssg_build_page_seconds Render time of the slowest pages.",
+            "# TYPE ssg_build_page_seconds gauge",
+        ])
+        for record in report["slowest_pages"]:
+            lines.append(
+                f'ssg_build_page_seconds{{path="{_escape_label(record["path"])}"}} {record["seconds"]}'
+            )
+        memory = report.get("memory")
+        if memory:
+            lines.extend([
+                "# HELP ssg_build_page_peak_bytes Peak allocation of the largest pages.",
+                "# TYPE ssg_build_page_peak_bytes gauge",
+            ])
+            for record in memory["largest_pages"]:
+                lines.append(
+                    f'ssg_build_page_peak_bytes{{path="{_escape_label(record["path"])}"}} {record["peak_bytes"]}'
+                )
+            lines.extend([
+                "# HELP ssg_build_pages_over_memory_budget Pages whose peak allocation exceeded the budget.",
+                "# TYPE ssg_build_pages_over_memory_budget gauge",
+                f"ssg_build_pages_over_memory_budget {len(memory['over_budget'])}",
+            ])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, top=10):
+        with open(path, 'w') as f:
+            f.write(self.format_prometheus(top))
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class NullProfiler:
+    """
+    Profiler that records nothing, used when profiling is off.
+    """
+
+    enabled = False
+
+    def settings(self):
+        return None
+
+    def stage(self, name):
+        return nullcontext()
+
+    def page(self, path):
+        return nullcontext()
+
+    def check_budget(self):
+        pass
+
+    def add_pages(self, records):
+        pass
+
+    def add_static_files(self, count):
+        pass
+
+    def add_counters(self, counts):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
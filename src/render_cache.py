@@ -0,0 +1,168 @@
+import hashlib
+import os
+import tempfile
+import time
+from manifest import GENERATOR_VERSION
+
+# Temporary files older than this were left by a writer that died
+STALE_TMP_SECONDS = 3600
+
+
+class RenderCache:
+    """
+    Content-addressed on-disk cache of rendered markdown.
+
+    Each entry maps the hash of a page's markdown (and the generator
+    version, so a parser change never serves stale HTML) to the HTML
+    fragment it renders to. Entries are files under ``directory``, sharded
+    by the first two hex digits of the key, so the directory can be kept
+    between CI runs or shared by several machines, like ccache.
+
+    Entries are written to a temporary file and renamed into place, so
+    concurrent builds only ever see complete entries. Reading an entry
+    updates its mtime, and ``prune`` evicts the least recently used entries
+    until the cache is under ``max_bytes``.
+
+    Args:
+    directory (str): Directory holding the cache
+    max_bytes (int): Size the cache is pruned down to, None for no limit
+    """
+
+    def __init__(self, directory, max_bytes=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def key(self, markdown):
+        digest = hashlib.sha256(GENERATOR_VERSION.encode())
+        digest.update(b"\0")
+        digest.update(markdown.encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, markdown):
+        """
+        Return the cached HTML for a page's markdown, or None.
+        """
+        path = self._path(self.key(markdown))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                html = f.read()
+            # Mark the entry as recently used for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            # Missing, or evicted by a concurrent prune
+            self.misses += 1
+            return None
+        self.hits += 1
+        return html
+
+    def put(self, markdown, html):
+        """
+        Atomically store the HTML rendered from a page's markdown.
+        """
+        path = self._path(self.key(markdown))
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(html)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.writes += 1
+
+    def merge_stats(self, hits, misses, writes):
+        """
+        Add lookups counted by another instance, e.g. in a worker process.
+        """
+        self.hits += hits
+        self.misses += misses
+        self.writes += writes
+
+    def _entries(self):
+        # (mtime_ns, size, path) of every entry, plus stale temporary files
+        entries = []
+        stale = []
+        now = time.time()
+        try:
+            shards = os.scandir(self.directory)
+        except FileNotFoundError:
+            return entries, stale
+        with shards:
+            for shard in shards:
+                if not shard.is_dir(follow_symlinks=False):
+                    continue
+                with os.scandir(shard.path) as files:
+                    for entry in files:
+                        try:
+                            stat = entry.stat(follow_symlinks=False)
+                        except FileNotFoundError:
+                            continue
+                        if entry.name.endswith(".tmp"):
+                            if now - stat.st_mtime > STALE_TMP_SECONDS:
+                                stale.append(entry.path)
+                            continue
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries, stale
+
+    def stats(self):
+        """
+        Return the number of entries and their total size, along with the
+        hits, misses and writes counted by this instance.
+        """
+        entries, _ = self._entries()
+        return {
+            "directory": self.directory,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+        }
+
+    def prune(self, max_bytes=None):
+        """
+        Evict least recently used entries until the cache fits in max_bytes.
+
+        Args:
+        max_bytes (int): Target size, defaults to the cache's max_bytes;
+            0 empties the cache
+
+        Returns:
+        tuple: (entries removed, bytes freed)
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries, stale = self._entries()
+        for path in stale:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        if max_bytes is None:
+            return 0, 0
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        freed = 0
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Already evicted by another process
+                pass
+            else:
+                removed += 1
+                freed += size
+            total -= size
+        return removed, freed
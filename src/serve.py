@@ -0,0 +1,352 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import posixpath
+import queue
+import threading
+from collections import OrderedDict
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from build import render_page
+from compress import MIN_SIZE, gzip_bytes, is_compressible
+from livereload import LIVE_RELOAD_PATH, format_event, render_live_page
+from markdown_blocks import BlockCache
+from sinks import MemorySink
+from template import TemplateResolver, load_template
+
+
+class Resource:
+    """
+    The bytes served for one URL, with the signature of the files they were
+    produced from.
+
+    The ETag is a strong validator derived from the body; the gzip-encoded
+    variant is a different representation and so gets its own ETag. It is
+    compressed on first request and then kept.
+
+    Pages rendered for live reload also carry their LivePage as ``live``.
+    """
+
+    def __init__(self, body, content_type, signature, mtime, compressible=False):
+        self.body = body
+        self.content_type = content_type
+        self.signature = signature
+        self.compressible = compressible and len(body) >= MIN_SIZE
+        self.last_modified = formatdate(mtime, usegmt=True)
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.gzip_etag = f'"{self.etag[1:-1]}-gzip"'
+        self._gzipped = None
+        self.live = None
+
+    def gzipped(self, level=6):
+        if self._gzipped is None:
+            self._gzipped = gzip_bytes(self.body, level)
+        return self._gzipped
+
+    @property
+    def size(self):
+        return len(self.body) + len(self._gzipped or b"")
+
+
+class SiteStore:
+    """
+    Render pages and read static files on demand, keeping the results in
+    memory until their source changes.
+
+    A page is rendered from its markdown the first time it is requested
+    and again only when the markdown or its template (or an include) has
+    changed, so previewing one page never builds the rest of the site.
+    Up to ``max_bytes`` of responses are kept, least recently used first
+    out.
+
+    With ``live``, pages are rendered with render_live_page so that a
+    LiveReload can patch them in open browsers.
+
+    Args:
+    content_dir (str): Path to the content directory
+    static_dir (str): Path to the static files directory
+    template_path (str): Path to the default HTML template
+    block_cache (BlockCache): Cache of rendered blocks, a new one if not given
+    render_cache (RenderCache): On-disk cache of rendered pages, if given
+    max_bytes (int): Memory used for cached responses
+    live (bool): Render pages for live reload
+    """
+
+    def __init__(self, content_dir, static_dir, template_path, block_cache=None, render_cache=None, max_bytes=256 * 1024 * 1024, live=False):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.block_cache = block_cache if block_cache is not None else BlockCache()
+        self.render_cache = render_cache
+        self.max_bytes = max_bytes
+        self.live = live
+        self.renders = 0
+        self._resources = OrderedDict()
+        self._lock = threading.Lock()
+        # Rendering shares the block and template caches, so one page
+        # renders at a time
+        self._render_lock = threading.Lock()
+
+    def resolve(self, url_path):
+        """
+        Map a URL path to what serves it.
+
+        Returns:
+        tuple: ("page", markdown path), ("static", file path),
+        ("redirect", location) for a directory requested without its
+        trailing slash, or None if nothing matches
+        """
+        rel_path = posixpath.normpath(unquote(url_path)).lstrip("/")
+        if rel_path.startswith("..") or "\0" in rel_path:
+            return None
+        if rel_path == ".":
+            rel_path = ""
+        if url_path.endswith("/") or not rel_path:
+            rel_path = posixpath.join(rel_path, "index.html")
+        elif os.path.isdir(os.path.join(self.content_dir, rel_path)) or os.path.isdir(os.path.join(self.static_dir, rel_path)):
+            return "redirect", f"/{rel_path}/"
+        # Pages are written after static files in a build, so they win
+        if rel_path.endswith(".html"):
+            md_path = os.path.join(self.content_dir, rel_path[:-len(".html")] + ".md")
+            if os.path.isfile(md_path):
+                return "page", md_path
+        static_path = os.path.join(self.static_dir, rel_path)
+        if os.path.isfile(static_path):
+            return "static", static_path
+        return None
+
+    def get(self, kind, path):
+        """
+        Return the Resource for a page or static file, rendering or reading
+        it if it is not cached or its sources have changed.
+        """
+        stat = os.stat(path)
+        if kind == "page":
+            template_path = TemplateResolver(self.content_dir, self.template_path).resolve(os.path.dirname(path))
+            template = load_template(template_path)
+            signature = (stat.st_mtime_ns, stat.st_size, template.digest)
+        else:
+            template = None
+            signature = (stat.st_mtime_ns, stat.st_size)
+        key = (kind, path)
+        with self._lock:
+            resource = self._resources.get(key)
+            if resource is not None and resource.signature == signature:
+                self._resources.move_to_end(key)
+                return resource
+
+        live = None
+        if kind == "page":
+            body, live = self._render(path, template)
+            content_type = "text/html; charset=utf-8"
+        else:
+            with open(path, 'rb') as f:
+                body = f.read()
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        compressible = kind == "page" or is_compressible(path)
+        resource = Resource(body, content_type, signature, stat.st_mtime, compressible)
+        resource.live = live
+
+        with self._lock:
+            self._resources[key] = resource
+            self._resources.move_to_end(key)
+            self._evict()
+        return resource
+
+    def _render(self, md_path, template):
+        with self._render_lock:
+            self.renders += 1
+            if self.live:
+                html, page = render_live_page(md_path, template, self.block_cache)
+                return html.encode('utf-8'), page
+            sink = MemorySink()
+            for warning in render_page(
+                md_path, template, md_path, block_cache=self.block_cache,
+                render_cache=self.render_cache, sink=sink,
+            ):
+                print(warning)
+        return sink.files[md_path], None
+
+    def _evict(self):
+        total = sum(resource.size for resource in self._resources.values())
+        while total > self.max_bytes and len(self._resources) > 1:
+            _, resource = self._resources.popitem(last=False)
+            total -= resource.size
+
+    def __len__(self):
+        return len(self._resources)
+
+
+def accepts_gzip(header):
+    """
+    Return True if an Accept-Encoding header allows gzip, preferring an
+    explicit gzip entry over a ``*`` one.
+    """
+    qualities = {}
+    for coding in (header or "").split(","):
+        name, *params = [part.strip() for part in coding.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.lower()] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+def etag_matches(header, *etags):
+    """
+    Return True if an If-None-Match header matches any of etags (with weak
+    comparison, as RFC 9110 specifies for If-None-Match).
+    """
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return any(etag in candidates for etag in etags)
+
+
+class SiteRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serve the store of a SiteServer, with conditional requests and gzip.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "ssg-dev"
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def _serve(self, head):
+        store = self.server.store
+        url = urlsplit(self.path)
+        url_path = url.path
+        if url_path == LIVE_RELOAD_PATH and self.server.live_reload is not None and not head:
+            self._stream_events(url.query)
+            return
+        try:
+            target = store.resolve(url_path)
+            if target is None:
+                self._send_error(HTTPStatus.NOT_FOUND, head)
+                return
+            kind, path = target
+            if kind == "redirect":
+                self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+                self.send_header("Location", path)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            resource = store.get(kind, path)
+        except FileNotFoundError:
+            self._send_error(HTTPStatus.NOT_FOUND, head)
+            return
+        except Exception as e:
+            self.log_error("Error serving %s: %s", url_path, e)
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, head, str(e))
+            return
+
+        use_gzip = resource.compressible and accepts_gzip(self.headers.get("Accept-Encoding"))
+        etag = resource.gzip_etag if use_gzip else resource.etag
+        if etag_matches(self.headers.get("If-None-Match"), resource.etag, resource.gzip_etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_cache_headers(resource, etag)
+            self.end_headers()
+            return
+
+        body = resource.gzipped(self.server.gzip_level) if use_gzip else resource.body
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", resource.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self._send_cache_headers(resource, etag)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def _stream_events(self, query):
+        # One Server-Sent Events stream per open page, held until the
+        # browser goes away or the server stops
+        params = parse_qs(query)
+        target = self.server.store.resolve(params.get("path", ["/"])[0])
+        if target is None or target[0] != "page":
+            self._send_error(HTTPStatus.NOT_FOUND, False)
+            return
+        live_reload = self.server.live_reload
+        subscriber = live_reload.subscribe(target[1], params.get("version", [""])[0])
+        self.close_connection = True
+        try:
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            while True:
+                try:
+                    event = subscriber.events.get(timeout=self.server.keepalive)
+                except queue.Empty:
+                    # Comments keep proxies from timing the stream out and
+                    # detect browsers that have gone
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    continue
+                if event is None:
+                    break
+                self.wfile.write(format_event(event))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            live_reload.unsubscribe(subscriber)
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} {format % args}")
+
+    def _send_cache_headers(self, resource, etag):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", resource.last_modified)
+        # Revalidate every time: the source may change at any moment
+        self.send_header("Cache-Control", "no-cache")
+        if resource.compressible:
+            self.send_header("Vary", "Accept-Encoding")
+
+    def _send_error(self, status, head, message=None):
+        body = f"{status.value} {message or status.phrase}\n".encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+
+class SiteServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server for previewing a site without building it.
+
+    Args:
+    address (tuple): (host, port) to listen on, port 0 for any free port
+    store (SiteStore): Where responses come from
+    gzip_level (int): zlib level for gzip-encoded responses
+    live_reload (LiveReload): Serves LIVE_RELOAD_PATH event streams, if given
+    keepalive (float): Seconds between keepalive comments on event streams
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, store, gzip_level=6, live_reload=None, keepalive=15):
+        self.store = store
+        self.gzip_level = gzip_level
+        self.live_reload = live_reload
+        self.keepalive = keepalive
+        super().__init__(address, SiteRequestHandler)
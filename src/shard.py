@@ -0,0 +1,146 @@
+import filecmp
+import hashlib
+import logging
+import os
+import shutil
+from assets import copy_files
+from compress import PrecompressState, default_state_path, forget_state, read_settings
+from manifest import BuildManifest, default_manifest_path
+
+
+class ShardMergeError(ValueError):
+    """
+    Raised when shard outputs cannot be merged; ``problems`` lists every
+    conflict found, not just the first.
+    """
+
+    def __init__(self, problems):
+        super().__init__("Cannot merge shards:\n" + "\n".join(f"  {problem}" for problem in problems))
+        self.problems = problems
+
+
+def parse_shard(text):
+    """
+    Parse a shard spec such as "2/8" into (index, count), with index
+    counting from 1.
+    """
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {text!r}: expected INDEX/COUNT, e.g. 1/4") from None
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {text!r}: INDEX must be between 1 and COUNT")
+    return index, count
+
+
+def shard_of(rel_path, count):
+    """
+    Return the shard (from 1 to count) a page belongs to.
+
+    The shard depends only on the page's path relative to the content
+    directory, hashed the same way on every machine and Python version.
+    """
+    key = rel_path.replace(os.sep, "/").encode('utf-8')
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "big") % count + 1
+
+
+def in_shard(rel_path, shard):
+    index, count = shard
+    return shard_of(rel_path, count) == index
+
+
+def merge_shards(shard_dirs, dest_dir, mode="copy", workers=8):
+    """
+    Combine the output directories of a sharded build into dest_dir, with
+    a manifest covering every page.
+
+    Each shard directory must have the manifest written next to it by its
+    build (``public`` -> ``public.manifest.json``). Everything is checked
+    before anything is written: the shards must be exactly 1 to N of the
+    same N, no page may come from two shards, and a file present in more
+    than one shard (such as a static file) must be identical in each.
+    When every shard was compressed with the same --gzip settings, the
+    record of them is carried over too, so the next --gzip build of
+    dest_dir only compresses what it writes.
+
+    Args:
+    shard_dirs (list): Output directories of the shards, in any order
+    dest_dir (str): Directory to merge into; replaced entirely
+    mode (str): How files are copied, one of assets.COPY_MODES
+    workers (int): Number of files copied concurrently
+
+    Returns:
+    tuple: (files, pages), the number of files and pages merged
+
+    Raises:
+    ShardMergeError: Listing every problem found
+    """
+    problems = []
+    dest_real = os.path.realpath(dest_dir)
+    manifests = []
+    for shard_dir in shard_dirs:
+        if os.path.realpath(shard_dir) == dest_real:
+            problems.append(f"{shard_dir}: cannot merge a shard into itself")
+        manifest = BuildManifest.load(default_manifest_path(shard_dir))
+        if manifest.shard is None:
+            problems.append(f"{shard_dir}: no manifest of a sharded build by this generator version")
+        else:
+            manifests.append((shard_dir, manifest))
+    counts = {manifest.shard[1] for _, manifest in manifests}
+    if len(counts) > 1:
+        problems.append(f"Shards are from builds split different ways: counts {sorted(counts)}")
+    owners = {}
+    for shard_dir, manifest in manifests:
+        index = manifest.shard[0]
+        if index in owners:
+            problems.append(f"Shard {index} given twice: {owners[index]} and {shard_dir}")
+        owners[index] = shard_dir
+    if len(counts) == 1:
+        missing = sorted(set(range(1, counts.pop() + 1)) - owners.keys())
+        if missing:
+            problems.append(f"Missing shards: {', '.join(map(str, missing))}")
+
+    pages = {}
+    sources = {}
+    for shard_dir, manifest in manifests:
+        for rel_path, entry in manifest.pages.items():
+            if rel_path in sources:
+                problems.append(f"{rel_path}: rendered by both {sources[rel_path]} and {shard_dir}")
+                continue
+            sources[rel_path] = shard_dir
+            pages[rel_path] = entry
+
+    files = {}
+    for shard_dir in shard_dirs:
+        for root, dirs, names in os.walk(shard_dir):
+            dirs.sort()
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                rel_path = os.path.relpath(path, shard_dir)
+                other = files.get(rel_path)
+                if other is None:
+                    files[rel_path] = path
+                elif not filecmp.cmp(other, path, shallow=False):
+                    problems.append(f"{rel_path}: differs between {other} and {path}")
+
+    if problems:
+        raise ShardMergeError(problems)
+
+    if os.path.exists(dest_dir):
+        logging.info(f"Cleaning destination directory: {dest_dir}")
+        shutil.rmtree(dest_dir)
+    copies = []
+    for rel_path, path in files.items():
+        dest_file = os.path.join(dest_dir, rel_path)
+        os.makedirs(os.path.dirname(dest_file), exist_ok=True)
+        copies.append((path, dest_file))
+    for _ in copy_files(copies, mode, workers):
+        pass
+    os.makedirs(dest_dir, exist_ok=True)
+    BuildManifest(default_manifest_path(dest_dir), pages).save()
+    gzip_settings = {read_settings(default_state_path(shard_dir)) for shard_dir in shard_dirs}
+    if len(gzip_settings) == 1 and None not in gzip_settings:
+        PrecompressState(default_state_path(dest_dir), *gzip_settings.pop()).save()
+    else:
+        forget_state(dest_dir)
+    return len(files), len(pages)
@@ -0,0 +1,293 @@
+import gzip
+import io
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+from assets import copy_file
+
+OUTPUT_FORMATS = ("dir", "tar", "tar.gz", "zip")
+
+# Pages larger than this are spooled to a temporary file before archiving
+SPOOL_SIZE = 16 * 1024 * 1024
+
+# Earliest timestamp a zip entry can hold (1980-01-01)
+ZIP_EPOCH = 315532800
+
+
+def write_atomic(dest_path, write, mode='w'):
+    """
+    Write a file through a temporary file moved into place on success, so a
+    failed render never leaves a truncated page behind.
+
+    Args:
+    dest_path (str): Path of the file to write
+    write (callable): Called with the open file
+    mode (str): 'w' for a UTF-8 text file, 'wb' for a binary one
+    """
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        with open(tmp_path, mode, encoding=None if 'b' in mode else 'utf-8') as dest_file:
+            write(dest_file)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def default_mtime():
+    """
+    Timestamp given to archive entries: $SOURCE_DATE_EPOCH, or 0, so the
+    same inputs always produce byte-identical archives.
+    """
+    return int(os.environ.get("SOURCE_DATE_EPOCH", 0))
+
+
+class DirectorySink:
+    """
+    Write outputs to the filesystem, at the paths given.
+    """
+
+    on_disk = True
+
+    def write_page(self, path, write):
+        """
+        Write a text file; write is called with the open file.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, write)
+
+    def write_bytes(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, lambda f: f.write(data), 'wb')
+
+    def add_file(self, path, src_path, mode="copy"):
+        """
+        Copy src_path to path.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        copy_file(src_path, path, mode)
+
+    def close(self):
+        pass
+
+
+DIRECTORY_SINK = DirectorySink()
+
+
+class ArchiveSink:
+    """
+    Base class for sinks that stream outputs into a single artifact.
+
+    Paths are stored relative to ``root`` (the output directory the build
+    would otherwise write to). Entries are written in the order they
+    arrive, which the build keeps deterministic, with a fixed timestamp and
+    permissions.
+
+    An archive written to a path is written under a temporary name and only
+    moved into place by close(); leaving a ``with`` block on an exception
+    calls abort() instead, so a failed build never leaves an archive that
+    looks complete but is missing pages.
+    """
+
+    on_disk = False
+    _path = None
+    _owned = None
+
+    def __init__(self, root, mtime=None):
+        self.root = root
+        self.mtime = default_mtime() if mtime is None else mtime
+        self._names = set()
+
+    def _name(self, path):
+        name = os.path.relpath(path, self.root).replace(os.sep, "/")
+        if name in self._names:
+            raise ValueError(f"Duplicate output path: {name}")
+        self._names.add(name)
+        return name
+
+    def _open(self, target):
+        # Return the binary file to write a path or file object target to
+        if not isinstance(target, str):
+            return target
+        self._path = target
+        self._owned = open(f"{target}.tmp", 'wb')
+        return self._owned
+
+    def _add(self, name, src, size):
+        raise NotImplementedError("_add method not implemented")
+
+    def _finish(self):
+        raise NotImplementedError("_finish method not implemented")
+
+    def close(self):
+        """
+        Finish the archive and move it into place.
+        """
+        self._finish()
+        if self._path is not None:
+            self._owned.close()
+            os.replace(f"{self._path}.tmp", self._path)
+
+    def abort(self):
+        """
+        Discard an unfinished archive. An archive already streamed to a
+        file object cannot be taken back and is left as it is.
+        """
+        if self._path is not None:
+            self._finish()
+            self._owned.close()
+            os.remove(f"{self._path}.tmp")
+
+    def write_page(self, path, write):
+        name = self._name(path)
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as spool:
+            text = io.TextIOWrapper(spool, encoding='utf-8')
+            write(text)
+            text.flush()
+            size = spool.tell()
+            spool.seek(0)
+            self._add(name, spool, size)
+            text.detach()
+
+    def write_bytes(self, path, data):
+        self._add(self._name(path), io.BytesIO(data), len(data))
+
+    def add_file(self, path, src_path, mode="copy"):
+        name = self._name(path)
+        with open(src_path, 'rb') as src:
+            self._add(name, src, os.fstat(src.fileno()).st_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class TarSink(ArchiveSink):
+    """
+    Stream outputs into a tar archive, optionally gzip-compressed.
+
+    Args:
+    target (str or file): Path of the archive, or a binary file object such
+        as sys.stdout.buffer (which need not be seekable)
+    root (str): Directory the output paths are relative to
+    compress (bool): Gzip the archive
+    mtime (int): Timestamp of every entry, defaults to default_mtime()
+    """
+
+    def __init__(self, target, root, compress=False, mtime=None):
+        super().__init__(root, mtime)
+        fileobj = self._open(target)
+        self._gzip = None
+        if compress:
+            # The gzip header holds a name and a timestamp; fix both
+            self._gzip = gzip.GzipFile(filename="", mode='wb', fileobj=fileobj, mtime=self.mtime)
+            fileobj = self._gzip
+        self._tar = tarfile.open(fileobj=fileobj, mode='w|', format=tarfile.PAX_FORMAT)
+
+    def _add(self, name, src, size):
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = self.mtime
+        info.mode = 0o644
+        self._tar.addfile(info, src)
+
+    def _finish(self):
+        self._tar.close()
+        if self._gzip is not None:
+            self._gzip.close()
+
+
+class ZipSink(ArchiveSink):
+    """
+    Stream outputs into a zip archive.
+
+    Args:
+    target (str or file): Path of the archive, or a binary file object
+    root (str): Directory the output paths are relative to
+    mtime (int): Timestamp of every entry, defaults to default_mtime()
+        (zip cannot store times before 1980)
+    """
+
+    def __init__(self, target, root, mtime=None):
+        super().__init__(root, mtime)
+        self._zip = zipfile.ZipFile(self._open(target), 'w', zipfile.ZIP_DEFLATED)
+        self._date_time = time.gmtime(max(self.mtime, ZIP_EPOCH))[:6]
+
+    def _add(self, name, src, size):
+        info = zipfile.ZipInfo(name, date_time=self._date_time)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        with self._zip.open(info, 'w', force_zip64=size > zipfile.ZIP64_LIMIT) as dest:
+            shutil.copyfileobj(src, dest)
+
+    def _finish(self):
+        self._zip.close()
+
+
+class MemorySink(ArchiveSink):
+    """
+    Collect outputs in ``files``, a dict of path to bytes, e.g. for tests or
+    to send pages rendered in a worker process back to the parent.
+
+    Paths are kept as given unless a root is passed.
+    """
+
+    def __init__(self, root=None):
+        super().__init__(root)
+        self.files = {}
+
+    def _name(self, path):
+        if self.root is None:
+            return path
+        return super()._name(path)
+
+    def _add(self, name, src, size):
+        self.files[name] = src.read()
+
+    def _finish(self):
+        pass
+
+
+def open_sink(target, root, output_format=None):
+    """
+    Create the sink for an --output target.
+
+    Args:
+    target (str): Output directory, archive path, or "-" for stdout
+    root (str): Directory the build writes to, which archive paths are
+        relative to
+    output_format (str): One of OUTPUT_FORMATS, inferred from the target's
+        suffix when not given ("tar" for stdout)
+
+    Returns:
+    DirectorySink, TarSink or ZipSink
+    """
+    if output_format is None:
+        if target.endswith((".tar.gz", ".tgz")):
+            output_format = "tar.gz"
+        elif target.endswith(".tar") or target == "-":
+            output_format = "tar"
+        elif target.endswith(".zip"):
+            output_format = "zip"
+        else:
+            output_format = "dir"
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Invalid output format: {output_format}")
+    if output_format == "dir":
+        if target == "-":
+            raise ValueError("A directory output cannot be written to stdout")
+        return DIRECTORY_SINK
+    stream = sys.stdout.buffer if target == "-" else target
+    if output_format == "zip":
+        return ZipSink(stream, root)
+    return TarSink(stream, root, compress=output_format == "tar.gz")
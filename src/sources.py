@@ -0,0 +1,252 @@
+import hashlib
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import zipfile
+
+# Archive members larger than this are spooled to a temporary file by
+# TarSource instead of being kept in memory
+SPOOL_SIZE = 256 * 1024
+
+
+def _walk_key(path):
+    # Sort like os.walk with sorted directories: a directory's own files
+    # come before its subdirectories'
+    directory, name = os.path.split(path)
+    return directory.split(os.sep) if directory else [], name
+
+
+class SiteSource:
+    """
+    Base class for the places a site's content, static files and templates
+    are read from.
+
+    All sources take paths relative to their root, e.g. ``content/index.md``.
+    """
+
+    def files(self, prefix):
+        """
+        Return the paths of every file under prefix, in walk order.
+        """
+        raise NotImplementedError("files method not implemented")
+
+    def isfile(self, path):
+        raise NotImplementedError("isfile method not implemented")
+
+    def read_bytes(self, path):
+        raise NotImplementedError("read_bytes method not implemented")
+
+    def size(self, path):
+        raise NotImplementedError("size method not implemented")
+
+    def read_text(self, path):
+        return self.read_bytes(path).decode('utf-8')
+
+    def digest(self, path):
+        return hashlib.sha256(self.read_bytes(path)).hexdigest()
+
+    def close(self):
+        pass
+
+
+class DirectorySource(SiteSource):
+    """
+    Read site files from a directory on disk.
+    """
+
+    def __init__(self, root="."):
+        self.root = root
+
+    def files(self, prefix):
+        paths = []
+        top = os.path.join(self.root, prefix)
+        for root, dirs, files in os.walk(top):
+            dirs.sort()
+            rel_root = os.path.normpath(os.path.join(prefix, os.path.relpath(root, top)))
+            paths.extend(os.path.join(rel_root, name) for name in sorted(files))
+        return paths
+
+    def isfile(self, path):
+        return os.path.isfile(os.path.join(self.root, path))
+
+    def read_bytes(self, path):
+        with open(os.path.join(self.root, path), 'rb') as f:
+            return f.read()
+
+    def size(self, path):
+        return os.path.getsize(os.path.join(self.root, path))
+
+
+class MappingSource(SiteSource):
+    """
+    Read site files from a dict of path to text (or bytes), e.g. for an
+    entirely in-memory build.
+    """
+
+    def __init__(self, files=None):
+        self._files = {}
+        for path, data in (files or {}).items():
+            self.add(path, data)
+
+    def add(self, path, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._files[os.path.normpath(path)] = data
+
+    def files(self, prefix):
+        prefix = os.path.normpath(prefix)
+        if prefix == os.curdir:
+            paths = list(self._files)
+        else:
+            start = prefix + os.sep
+            paths = [path for path in self._files if path.startswith(start)]
+        return sorted(paths, key=_walk_key)
+
+    def isfile(self, path):
+        return os.path.normpath(path) in self._files
+
+    def read_bytes(self, path):
+        try:
+            return self._files[os.path.normpath(path)]
+        except KeyError:
+            raise FileNotFoundError(path) from None
+
+    def size(self, path):
+        return len(self.read_bytes(path))
+
+
+def _strip(name, strip_components):
+    parts = [part for part in name.split("/") if part not in ("", ".")]
+    if len(parts) <= strip_components:
+        return None
+    return os.path.join(*parts[strip_components:])
+
+
+class _Spooled:
+    # Where TarSource put a large member in its spool file
+    __slots__ = ("offset", "size")
+
+    def __init__(self, offset, size):
+        self.offset = offset
+        self.size = size
+
+
+class TarSource(MappingSource):
+    """
+    Read site files from a tar archive, compressed or not.
+
+    The archive is read in one sequential pass, so it may be a pipe such as
+    sys.stdin.buffer, and is never unpacked to disk. Members up to
+    spool_size bytes are kept in memory; larger ones (typically images and
+    other static files) are copied to a single anonymous temporary file and
+    read back from it when needed, so memory does not grow with the size of
+    the archive.
+
+    Args:
+    archive (str or file): Path of the archive, or a binary file object
+    strip_components (int): Leading path components to drop from every
+        name, as with ``tar --strip-components``
+    spool_size (int): Size above which members are spooled to disk
+    """
+
+    def __init__(self, archive, strip_components=0, spool_size=SPOOL_SIZE):
+        super().__init__()
+        self._spool = None
+        if isinstance(archive, str):
+            tar = tarfile.open(archive, mode='r|*')
+        else:
+            tar = tarfile.open(fileobj=archive, mode='r|*')
+        with tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                path = _strip(member.name, strip_components)
+                if path is None:
+                    continue
+                data = tar.extractfile(member)
+                if member.size <= spool_size:
+                    self.add(path, data.read())
+                    continue
+                if self._spool is None:
+                    self._spool = tempfile.TemporaryFile()
+                offset = self._spool.seek(0, os.SEEK_END)
+                shutil.copyfileobj(data, self._spool)
+                self._files[os.path.normpath(path)] = _Spooled(offset, member.size)
+        if self._spool is not None:
+            # Reads go straight to the file descriptor
+            self._spool.flush()
+
+    def read_bytes(self, path):
+        data = super().read_bytes(path)
+        if isinstance(data, _Spooled):
+            return os.pread(self._spool.fileno(), data.size, data.offset)
+        return data
+
+    def size(self, path):
+        data = super().read_bytes(path)
+        return data.size if isinstance(data, _Spooled) else len(data)
+
+    def close(self):
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+
+class ZipSource(SiteSource):
+    """
+    Read site files from a zip archive, decompressing each only when read.
+
+    Args:
+    archive (str or file): Path of the archive, or a seekable binary file
+    strip_components (int): Leading path components to drop from every name
+    """
+
+    def __init__(self, archive, strip_components=0):
+        self._zip = zipfile.ZipFile(archive)
+        self._names = {}
+        for info in self._zip.infolist():
+            if info.is_dir():
+                continue
+            path = _strip(info.filename, strip_components)
+            if path is not None:
+                self._names[path] = info
+
+    def files(self, prefix):
+        prefix = os.path.normpath(prefix)
+        start = prefix + os.sep
+        paths = [path for path in self._names if prefix == os.curdir or path.startswith(start)]
+        return sorted(paths, key=_walk_key)
+
+    def isfile(self, path):
+        return os.path.normpath(path) in self._names
+
+    def _info(self, path):
+        try:
+            return self._names[os.path.normpath(path)]
+        except KeyError:
+            raise FileNotFoundError(path) from None
+
+    def read_bytes(self, path):
+        return self._zip.read(self._info(path))
+
+    def size(self, path):
+        return self._info(path).file_size
+
+    def close(self):
+        self._zip.close()
+
+
+def open_source(target, strip_components=0):
+    """
+    Create the source for a --source target: a directory, a .zip file, any
+    other file as a (possibly compressed) tar, or "-" for a tar on stdin.
+    """
+    if target == "-":
+        return TarSource(sys.stdin.buffer, strip_components)
+    if os.path.isdir(target):
+        return DirectorySource(target)
+    if zipfile.is_zipfile(target):
+        return ZipSource(target, strip_components)
+    return TarSource(target, strip_components)
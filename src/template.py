@@ -0,0 +1,217 @@
+import hashlib
+import os
+import re
+
+# {{ Name }} is a slot, {{> path }} includes another template file
+TAG_PATTERN = re.compile(r"\{\{\s*(>?)\s*([^\s{}]+)\s*\}\}")
+
+# Name of the file that overrides the template for a content directory
+TEMPLATE_NAME = "template.html"
+
+
+class Template:
+    """
+    A template compiled into literal and slot segments.
+
+    ``segments`` holds the literal text of the template, with one entry per
+    slot holding the slot's original placeholder text. ``slots`` lists
+    ``(index, name)`` pairs pointing at those entries, so rendering is a copy
+    of the segment list, one assignment per slot and a single join.
+    """
+
+    def __init__(self, segments, slots, dependencies=None, digest=None):
+        self.segments = segments
+        self.slots = slots
+        self.dependencies = dependencies if dependencies is not None else []
+        self.digest = digest
+
+    @property
+    def slot_names(self):
+        return {name for _, name in self.slots}
+
+    def render(self, values=None, **slots):
+        """
+        Render the template with the given slot values.
+
+        Slot values may be strings or HTMLNodes. Slots without a value are
+        left as their original placeholder text.
+        """
+        return "".join(
+            part if isinstance(part, str) else part.to_html()
+            for part in self._fill(values, slots)
+        )
+
+    def write(self, sink, values=None, **slots):
+        """
+        Render the template into a file-like object, streaming HTMLNode slot
+        values straight into the sink instead of building them as strings.
+        """
+        for part in self._fill(values, slots):
+            if isinstance(part, str):
+                sink.write(part)
+            else:
+                part.write_html(sink)
+
+    def _fill(self, values, slots):
+        if values:
+            slots.update(values)
+        parts = list(self.segments)
+        for index, name in self.slots:
+            if name in slots:
+                value = slots[name]
+                parts[index] = value if hasattr(value, "write_html") else str(value)
+        return parts
+
+    def __repr__(self):
+        return f"Template({self.dependencies}, slots: {sorted(self.slot_names)})"
+
+
+def compile_template(text, base_dir=".", path=None, read=None):
+    """
+    Compile template text, resolving includes relative to base_dir.
+
+    Args:
+    text (str): Template source
+    base_dir (str): Directory that {{> path }} includes are relative to
+    path (str): Path the text was read from, if any
+    read (callable): Returns the text of an included file given its path,
+        reading from the filesystem by default
+
+    Returns:
+    Template: The compiled template
+
+    Raises:
+    ValueError: If includes form a cycle
+    """
+    segments = []
+    slots = []
+    dependencies = [path] if path is not None else []
+    digest = hashlib.sha256(text.encode())
+    stack = [path] if path is not None else []
+    if read is None:
+        read = _read_file
+    _compile_into(text, base_dir, segments, slots, dependencies, digest, stack, read)
+    return Template(segments, slots, dependencies, digest.hexdigest())
+
+
+def _read_file(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def _compile_into(text, base_dir, segments, slots, dependencies, digest, stack, read):
+    position = 0
+    literal = []
+    for match in TAG_PATTERN.finditer(text):
+        literal.append(text[position:match.start()])
+        position = match.end()
+        include, name = match.groups()
+        if include:
+            include_path = os.path.normpath(os.path.join(base_dir, name))
+            if include_path in stack:
+                raise ValueError(f"Template include cycle: {' -> '.join(stack + [include_path])}")
+            include_text = read(include_path)
+            dependencies.append(include_path)
+            digest.update(include_text.encode())
+            segments.append("".join(literal))
+            literal = []
+            stack.append(include_path)
+            _compile_into(
+                include_text, os.path.dirname(include_path),
+                segments, slots, dependencies, digest, stack, read,
+            )
+            stack.pop()
+        else:
+            segments.append("".join(literal))
+            literal = []
+            slots.append((len(segments), name))
+            segments.append(match.group(0))
+    literal.append(text[position:])
+    segments.append("".join(literal))
+
+
+# Compiled templates by path, with the stat signature of every file they were built from
+_cache = {}
+
+
+def load_template(path):
+    """
+    Load and compile a template file, reusing the cached compilation while
+    neither the file nor any of its includes have been modified.
+
+    Args:
+    path (str): Path to the template file
+
+    Returns:
+    Template: The compiled template
+    """
+    path = os.path.normpath(path)
+    cached = _cache.get(path)
+    if cached is not None:
+        signatures, template = cached
+        try:
+            if all(_signature(dep) == signature for dep, signature in signatures):
+                return template
+        except OSError:
+            pass
+    with open(path, 'r') as template_file:
+        text = template_file.read()
+    template = compile_template(text, os.path.dirname(path), path)
+    signatures = tuple((dep, _signature(dep)) for dep in template.dependencies)
+    _cache[path] = (signatures, template)
+    return template
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def cached_templates():
+    """
+    Return the paths of the templates currently compiled and cached.
+    """
+    return list(_cache)
+
+
+def clear_template_cache():
+    _cache.clear()
+
+
+class TemplateResolver:
+    """
+    Find the template that applies to a content directory.
+
+    A ``template.html`` inside a content directory overrides the template
+    for that directory and everything below it. Lookups are memoized per
+    directory for the lifetime of the resolver.
+
+    ``isfile`` checks whether an override exists, os.path.isfile by default.
+    """
+
+    def __init__(self, content_root, default_path, isfile=os.path.isfile):
+        self.content_root = os.path.normpath(content_root)
+        self.default_path = default_path
+        self.isfile = isfile
+        self._resolved = {}
+
+    def resolve(self, directory):
+        """
+        Return the template path for a directory inside the content root.
+        """
+        directory = os.path.normpath(directory)
+        resolved = self._resolved.get(directory)
+        if resolved is not None:
+            return resolved
+        rel_dir = os.path.relpath(directory, self.content_root)
+        candidate = os.path.join(directory, TEMPLATE_NAME)
+        if rel_dir.startswith(os.pardir):
+            resolved = self.default_path
+        elif self.isfile(candidate):
+            resolved = candidate
+        elif rel_dir == os.curdir:
+            resolved = self.default_path
+        else:
+            resolved = self.resolve(os.path.dirname(directory) or os.curdir)
+        self._resolved[directory] = resolved
+        return resolved
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from assets import copy_file, copy_files, sync_directory
+from testutil import write_file
+
+
+class TestSyncDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+        write_file(os.path.join(self.static, "images", "a.png"), "png")
+
+    def read(self, *parts):
+        with open(os.path.join(self.public, *parts)) as f:
+            return f.read()
+
+    def test_initial_sync_copies_everything(self):
+        report = sync_directory(self.static, self.public)
+        self.assertEqual(report.added, ["index.css", os.path.join("images", "a.png")])
+        self.assertEqual(self.read("images", "a.png"), "png")
+
+    def test_no_change(self):
+        sync_directory(self.static, self.public)
+        report = sync_directory(self.static, self.public)
+        self.assertFalse(report.changed)
+        self.assertEqual(report.unchanged, 2)
+
+    def test_changed_file_is_updated(self):
+        sync_directory(self.static, self.public)
+        write_file(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        report = sync_directory(self.static, self.public)
+        self.assertEqual(report.updated, ["index.css"])
+        self.assertEqual(self.read("index.css"), "body { margin: 0 }")
+
+    def test_checksum_detects_same_size_change(self):
+        sync_directory(self.static, self.public)
+        src = os.path.join(self.static, "index.css")
+        stat = os.stat(src)
+        write_file(src, "html {}")
+        os.utime(src, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertFalse(sync_directory(self.static, self.public).changed)
+        report = sync_directory(self.static, self.public, checksum=True)
+        self.assertEqual(report.updated, ["index.css"])
+
+    def test_orphans_removed_and_preserved(self):
+        sync_directory(self.static, self.public)
+        write_file(os.path.join(self.public, "index.html"), "<p>page</p>")
+        shutil.rmtree(os.path.join(self.static, "images"))
+        report = sync_directory(
+            self.static, self.public, preserve=lambda rel: rel.endswith(".html")
+        )
+        self.assertEqual(report.removed, [os.path.join("images", "a.png")])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+        self.assertEqual(self.read("index.html"), "<p>page</p>")
+
+    def test_parallel_sync(self):
+        for i in range(20):
+            write_file(os.path.join(self.static, "many", f"{i}.txt"), str(i) * (i + 1))
+        report = sync_directory(self.static, self.public, workers=4)
+        serial = sync_directory(self.static, os.path.join(self.tmp.name, "serial"))
+        self.assertEqual(len(report.added), 22)
+        self.assertEqual(report.added, serial.added)
+        self.assertEqual(self.read("many", "7.txt"), "7" * 8)
+
+
+class TestCopyFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.src = os.path.join(self.tmp.name, "src.bin")
+        with open(self.src, 'wb') as f:
+            f.write(os.urandom(3 * 1024 * 1024 + 17))
+        os.utime(self.src, ns=(1_000_000_000, 1_000_000_000))
+
+    def assertCopied(self, dest):
+        with open(self.src, 'rb') as a, open(dest, 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+        self.assertEqual(os.stat(dest).st_mtime_ns, 1_000_000_000)
+
+    def test_modes(self):
+        for mode in ("copy", "hardlink", "reflink"):
+            dest = os.path.join(self.tmp.name, f"{mode}.bin")
+            used = copy_file(self.src, dest, mode)
+            self.assertIn(used, (mode, "copy"))
+            self.assertCopied(dest)
+
+    def test_hardlink_replaces_existing(self):
+        dest = os.path.join(self.tmp.name, "dest.bin")
+        write_file(dest, "old")
+        copy_file(self.src, dest, "hardlink")
+        self.assertCopied(dest)
+
+    def test_copy_onto_hardlink_keeps_source(self):
+        for mode in ("copy", "reflink"):
+            dest = os.path.join(self.tmp.name, f"linked-{mode}.bin")
+            os.link(self.src, dest)
+            copy_file(self.src, dest, mode)
+            self.assertEqual(os.path.getsize(self.src), 3 * 1024 * 1024 + 17)
+            self.assertCopied(dest)
+            self.assertNotEqual(os.stat(dest).st_ino, os.stat(self.src).st_ino)
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            copy_file(self.src, os.path.join(self.tmp.name, "x"), "move")
+
+    def test_copy_files_order(self):
+        copies = [(self.src, os.path.join(self.tmp.name, f"{i}.bin")) for i in range(5)]
+        self.assertEqual(list(copy_files(copies, workers=3)), copies)
+
+
+if __name__ == "__main__":
+    unittest.main()
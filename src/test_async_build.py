@@ -0,0 +1,109 @@
+import os
+import threading
+import unittest
+from unittest import mock
+
+import async_build
+import build
+from markdown_blocks import BlockCache
+from profiling import BuildProfiler
+from render_cache import RenderCache
+from sinks import MemorySink
+from sources import MappingSource
+from template import compile_template
+from testutil import SiteTestCase, read_tree, write_file
+
+
+class TestGeneratePagesAsync(SiteTestCase):
+    files = {
+        **{f"content/section{i % 3}/page{i}.md": f"# Page {i}\n\nSome *text*\n\n* a\n* b" for i in range(12)},
+        "content/untitled.md": "No title",
+    }
+
+    def build(self, dest, **kwargs):
+        manifest = os.path.join(self.root, os.path.basename(dest) + ".json")
+        async_build.generate_pages_with_asyncio(
+            self.content, self.template, dest, manifest_path=manifest, **kwargs
+        )
+
+    def test_matches_generate_pages_recursive(self):
+        expected = os.path.join(self.root, "expected")
+        build.generate_pages_recursive(
+            self.content, self.template, expected,
+            manifest_path=os.path.join(self.root, "expected.json"),
+        )
+        for jobs in (1, 2):
+            dest = os.path.join(self.root, f"async{jobs}")
+            self.build(dest, jobs=jobs, io_workers=4, max_in_flight=3)
+            self.assertEqual(read_tree(dest), read_tree(expected))
+
+    def test_profiler_and_caches(self):
+        for jobs in (1, 2):
+            profiler = BuildProfiler()
+            block_cache = BlockCache()
+            render_cache = RenderCache(os.path.join(self.root, f"cache{jobs}"))
+            dest = os.path.join(self.root, f"public{jobs}")
+            self.build(
+                dest, jobs=jobs, incremental=False, profiler=profiler,
+                block_cache=block_cache, render_cache=render_cache,
+            )
+            self.assertEqual(len(profiler.pages), 13)
+            self.assertEqual((render_cache.hits, render_cache.misses), (0, 13))
+            # The pages share their list block
+            self.assertGreater(block_cache.hits, 0)
+            self.build(dest, jobs=jobs, incremental=False, render_cache=render_cache)
+            self.assertEqual(render_cache.hits, 13)
+
+    def test_renders_like_render_page(self):
+        markdown = "# Title\n\n```\ncode\n```\n\nText with `code` and *emphasis*"
+        with open(self.template) as f:
+            template = compile_template(f.read())
+        sink = MemorySink()
+        warnings = build.render_page(
+            "page.md", template, "page.html", sink=sink, site=MappingSource({"page.md": markdown}),
+        )
+        self.assertEqual(
+            async_build.render_markdown("page.md", markdown, self.template),
+            (sink.files["page.html"], warnings),
+        )
+
+    def test_backpressure(self):
+        lock = threading.Lock()
+        in_flight = [0, 0]
+        read_markdown = async_build.read_markdown
+        write_page = async_build.write_page
+
+        def tracked_read(path):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            return read_markdown(path)
+
+        def tracked_write(dest_path, html, sink):
+            write_page(dest_path, html, sink)
+            with lock:
+                in_flight[0] -= 1
+
+        with mock.patch.object(async_build, "read_markdown", tracked_read), \
+                mock.patch.object(async_build, "write_page", tracked_write):
+            self.build(os.path.join(self.root, "public"), io_workers=8, max_in_flight=2)
+        self.assertEqual(in_flight[0], 0)
+        self.assertLessEqual(in_flight[1], 2)
+
+    def test_incremental(self):
+        dest = os.path.join(self.root, "public")
+        self.build(dest)
+        with mock.patch.object(async_build, "render_markdown") as render:
+            self.build(dest)
+        render.assert_not_called()
+
+    def test_failure_stops_build(self):
+        write_file(os.path.join(self.content, "broken.md"), "# Broken\n\n###### ")
+        dest = os.path.join(self.root, "public")
+        with self.assertRaises(ValueError):
+            self.build(dest, max_in_flight=2)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "public.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from benchmarks import CorpusSpec, compare_results, generate_site, run_benchmarks
+from benchmarks.run import STAGES
+from markdown_blocks import markdown_to_html_node
+
+
+class TestCorpus(unittest.TestCase):
+    def test_generate_site(self):
+        spec = CorpusSpec(pages=12, blocks_per_page=15, directories=3, assets=4, asset_size=10)
+        with tempfile.TemporaryDirectory() as root:
+            site = generate_site(root, spec)
+            pages = [
+                os.path.join(dirpath, name)
+                for dirpath, _, files in os.walk(site["content"])
+                for name in files
+            ]
+            self.assertEqual(len(pages), 12)
+            self.assertEqual(len(os.listdir(site["content"])), 3)
+            self.assertEqual(len(os.listdir(os.path.join(site["static"], "images"))), 4)
+            # Every generated page must be valid input for the parser
+            for path in pages:
+                with open(path) as f:
+                    markdown_to_html_node(f.read())
+
+    def test_deterministic(self):
+        spec = CorpusSpec(pages=2, assets=1, asset_size=4, seed=7)
+        contents = []
+        for _ in range(2):
+            with tempfile.TemporaryDirectory() as root:
+                site = generate_site(root, spec)
+                with open(os.path.join(site["content"], "section0", "page0.md")) as f:
+                    contents.append(f.read())
+        self.assertEqual(contents[0], contents[1])
+
+
+class TestRunBenchmarks(unittest.TestCase):
+    def test_all_stages_timed(self):
+        spec = CorpusSpec(pages=3, blocks_per_page=5, assets=2, asset_size=10)
+        with tempfile.TemporaryDirectory() as root:
+            results = run_benchmarks(generate_site(root, spec), repeat=1)
+        self.assertEqual(tuple(results), STAGES)
+        self.assertEqual(results["read"]["items"], 3)
+
+    def test_compare(self):
+        baseline = {"stages": {"read": {"seconds": 1.0}, "to_html": {"seconds": 1.0}}}
+        current = {"stages": {"read": {"seconds": 1.5}, "to_html": {"seconds": 0.5}}}
+        self.assertEqual(
+            compare_results(baseline, current),
+            [("read", 1.0, 1.5, 1.5, True), ("to_html", 1.0, 0.5, 0.5, False)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
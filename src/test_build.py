@@ -0,0 +1,214 @@
+import os
+import tracemalloc
+import unittest
+from unittest import mock
+
+import build
+from manifest import BuildManifest, default_manifest_path
+from profiling import BuildProfiler, MemoryBudgetExceeded
+from render_cache import RenderCache
+from sinks import MemorySink
+from sources import MappingSource
+from testutil import TEMPLATE, SiteTestCase, read_tree, write_file
+
+
+class TestIncrementalBuild(SiteTestCase):
+    files = {
+        "content/index.md": "# Home\n\nWelcome",
+        "content/blog/post.md": "# Post\n\nBody",
+    }
+
+    def build(self):
+        with mock.patch("build.generate_page", wraps=build.generate_page) as generate:
+            build.generate_pages_recursive(self.content, self.template, self.public)
+        return sorted(
+            os.path.relpath(call.args[0], self.content) for call in generate.call_args_list
+        )
+
+    def test_first_build_renders_everything(self):
+        self.assertEqual(self.build(), [os.path.join("blog", "post.md"), "index.md"])
+        self.assertTrue(os.path.exists(default_manifest_path(self.public)))
+        self.assertEqual(
+            self.read_public("index.html"), "<title>Home</title><div><h1>Home</h1><p>Welcome</p></div>"
+        )
+
+    def test_unchanged_build_renders_nothing(self):
+        self.build()
+        self.assertEqual(self.build(), [])
+
+    def test_changed_source_renders_one_page(self):
+        self.build()
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nWelcome back")
+        self.assertEqual(self.build(), ["index.md"])
+
+    def test_changed_template_renders_everything(self):
+        self.build()
+        write_file(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(len(self.build()), 2)
+
+    def test_missing_output_is_rebuilt(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.html"))
+        self.assertEqual(self.build(), ["index.md"])
+
+    def test_source_build_invalidates_manifest(self):
+        self.build()
+        site = MappingSource({
+            "template.html": TEMPLATE,
+            "content/index.md": "# FromArchive",
+        })
+        build.generate_pages_from_source(site, "content", "template.html", self.public)
+        self.assertFalse(os.path.exists(default_manifest_path(self.public)))
+        # The next local build must not trust the outputs of the source build
+        self.assertEqual(self.build(), [os.path.join("blog", "post.md"), "index.md"])
+        self.assertIn("<h1>Home</h1>", self.read_public("index.html"))
+
+    def test_profiled_build_streams_like_unprofiled(self):
+        profiler = BuildProfiler(memory=True)
+        self.addCleanup(tracemalloc.stop)
+        with mock.patch("template.Template.render") as render:
+            build.generate_pages_recursive(self.content, self.template, self.public, profiler=profiler)
+        render.assert_not_called()
+        self.assertEqual(
+            self.read_public("index.html"), "<title>Home</title><div><h1>Home</h1><p>Welcome</p></div>"
+        )
+        self.assertEqual(set(profiler.pages[0]["stages"]), {"read", "blocks", "inline", "title", "write"})
+
+    def test_memory_budget_abort_leaves_no_output(self):
+        profiler = BuildProfiler(memory_budget=1, budget_action="abort")
+        self.addCleanup(tracemalloc.stop)
+        with self.assertRaises(MemoryBudgetExceeded):
+            build.generate_pages_recursive(self.content, self.template, self.public, profiler=profiler)
+        self.assertEqual(os.listdir(self.public), [])
+
+    def test_directory_template_override(self):
+        write_file(os.path.join(self.content, "blog", "template.html"), "<article>{{ Content }}</article>")
+        self.build()
+        self.assertEqual(
+            self.read_public("blog", "post.html"), "<article><div><h1>Post</h1><p>Body</p></div></article>"
+        )
+        write_file(os.path.join(self.content, "blog", "template.html"), "<main>{{ Content }}</main>")
+        self.assertEqual(self.build(), [os.path.join("blog", "post.md")])
+
+    def test_streaming_render_matches(self):
+        write_file(
+            os.path.join(self.content, "big.md"),
+            "Intro\n\n# Big\n\n" + "\n\n".join(f"Para *{i}* [x](y)" for i in range(200)),
+        )
+        self.build()
+        expected = self.read_public("big.html")
+        with mock.patch("build.STREAMING_THRESHOLD", 0):
+            build.generate_pages_recursive(self.content, self.template, self.public, incremental=False)
+        self.assertEqual(self.read_public("big.html"), expected)
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.assertEqual(self.build(), [])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        manifest = BuildManifest.load(default_manifest_path(self.public))
+        self.assertEqual(list(manifest.pages), ["index.md"])
+
+
+class TestParallelBuild(SiteTestCase):
+    def test_parallel_matches_sequential(self):
+        self.write_files({f"content/page{i}.md": f"# Page {i}\n\n*text* {i}" for i in range(6)})
+        self.write_files({"content/untitled.md": "No title here"})
+        outputs = {}
+        for jobs in (1, 3):
+            public = os.path.join(self.root, f"public{jobs}")
+            build.generate_pages_recursive(self.content, self.template, public, jobs=jobs)
+            outputs[jobs] = read_tree(public)
+        self.assertEqual(len(outputs[1]), 7)
+        self.assertEqual(outputs[1], outputs[3])
+
+    def test_parallel_profile(self):
+        self.write_files({f"content/page{i}.md": f"# Page {i}" for i in range(4)})
+        profiler = BuildProfiler()
+        build.generate_pages_recursive(self.content, self.template, self.public, jobs=2, profiler=profiler)
+        self.assertEqual(len(profiler.pages), 4)
+        self.assertIn("inline", profiler.stages)
+
+    def test_block_cache_shared_by_pages(self):
+        self.write_files({"template.html": "{{ Content }}"})
+        self.write_files({f"content/page{i}.md": f"# Page {i}\n\nShared *notice*" for i in range(4)})
+        for jobs in (1, 2):
+            public = os.path.join(self.root, f"public{jobs}")
+            block_cache = build.BlockCache()
+            build.generate_pages_recursive(
+                self.content, self.template, public, jobs=jobs, block_cache=block_cache,
+            )
+            self.assertEqual(block_cache.hits + block_cache.misses, 8)
+            self.assertGreaterEqual(block_cache.hits, 2)
+            with open(os.path.join(public, "page3.html")) as f:
+                self.assertEqual(f.read(), "<div><h1>Page 3</h1><p>Shared <i>notice</i></p></div>")
+
+    def test_render_cache(self):
+        self.write_files({f"content/page{i}.md": f"# Page {i}\n\nText *{i}*" for i in range(3)})
+        render_cache = RenderCache(os.path.join(self.root, "cache"))
+        outputs = []
+        for jobs in (1, 2):
+            public = os.path.join(self.root, f"public{jobs}")
+            build.generate_pages_recursive(
+                self.content, self.template, public, jobs=jobs, render_cache=render_cache
+            )
+            with open(os.path.join(public, "page2.html")) as f:
+                outputs.append(f.read())
+        self.assertEqual((render_cache.hits, render_cache.misses), (3, 3))
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0], "<title>Page 2</title><div><h1>Page 2</h1><p>Text <i>2</i></p></div>")
+
+    def test_archive_sink(self):
+        self.write_files({"template.html": "{{ Content }}", "static/index.css": "body {}"})
+        self.write_files({f"content/blog/page{i}.md": f"# Page {i}" for i in range(3)})
+        outputs = []
+        for jobs in (1, 2):
+            sink = MemorySink(self.public)
+            build.copy_directory(self.static, self.public, sink=sink)
+            build.generate_pages_recursive(self.content, self.template, self.public, jobs=jobs, sink=sink)
+            outputs.append(sink.files)
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(
+            list(outputs[0]),
+            ["index.css", "blog/page0.html", "blog/page1.html", "blog/page2.html"],
+        )
+        self.assertEqual(outputs[0]["blog/page1.html"], b"<div><h1>Page 1</h1></div>")
+        self.assertFalse(os.path.exists(self.public))
+        self.assertFalse(os.path.exists(default_manifest_path(self.public)))
+
+    def test_generate_pages_from_source(self):
+        files = {
+            "template.html": "<main>{{> nav.html }}{{ Content }}</main>",
+            "nav.html": "<nav>{{ Title }}</nav>",
+            "content/index.md": "# Home\n\nWelcome",
+            "content/blog/template.html": "<article>{{ Content }}</article>",
+            "content/blog/post.md": "# Post\n\n* a\n* b",
+            "content/untitled.md": "No title",
+            "static/index.css": "body {}",
+        }
+        self.write_files(files)
+        build.copy_directory(self.static, self.public)
+        build.generate_pages_recursive(self.content, self.template, self.public)
+        site = MappingSource(files)
+        for jobs in (1, 2):
+            sink = MemorySink("public")
+            build.copy_source_directory(site, "static", "public", sink=sink)
+            build.generate_pages_from_source(
+                site, "content", "template.html", "public", jobs=jobs, sink=sink
+            )
+            self.assertEqual(
+                list(sink.files), ["index.css", "index.html", "untitled.html", "blog/post.html"]
+            )
+            for name, data in sink.files.items():
+                self.assertEqual(data.decode(), self.read_public(name), name)
+
+    def test_parallel_memory_profile(self):
+        self.write_files({f"content/page{i}.md": f"# Page {i}" for i in range(2)})
+        profiler = BuildProfiler(memory=True)
+        self.addCleanup(tracemalloc.stop)
+        build.generate_pages_recursive(self.content, self.template, self.public, jobs=2, profiler=profiler)
+        self.assertTrue(all(page["peak_bytes"] > 0 for page in profiler.pages))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+import build
+from compress import (
+    MIN_SIZE,
+    GzipSink,
+    PrecompressState,
+    default_state_path,
+    gzip_bytes,
+    keep_compressed,
+    precompress_directory,
+    read_settings,
+)
+from testutil import TEMPLATE, write_file
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.public = os.path.join(tmp.name, "public")
+        self.page = os.path.join(self.public, "blog", "index.html")
+        write_file(self.page, "<p>hello</p>" * 100)
+        write_file(os.path.join(self.public, "index.css"), "body { color: red; }" * 50)
+        write_file(os.path.join(self.public, "tiny.css"), "a {}")
+        write_file(os.path.join(self.public, "logo.png"), "png" * 200)
+
+    def test_compresses_text_files(self):
+        report = precompress_directory(self.public, workers=2)
+        self.assertEqual(report.compressed, ["index.css", os.path.join("blog", "index.html")])
+        with gzip.open(self.page + ".gz", 'rt') as f:
+            self.assertEqual(f.read(), "<p>hello</p>" * 100)
+        self.assertEqual(os.stat(self.page + ".gz").st_mtime_ns, os.stat(self.page).st_mtime_ns)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "tiny.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "logo.png.gz")))
+        self.assertTrue(PrecompressState.load(default_state_path(self.public)).loaded)
+
+    def test_gzip_is_reproducible(self):
+        self.assertEqual(gzip_bytes(b"abc" * 100), gzip_bytes(b"abc" * 100))
+        self.assertEqual(gzip.decompress(gzip_bytes(b"abc", 1)), b"abc")
+
+    def test_full_pass_recompresses(self):
+        precompress_directory(self.public)
+        os.remove(self.page + ".gz")
+        self.assertEqual(len(precompress_directory(self.public, level=1).compressed), 2)
+        self.assertEqual(read_settings(default_state_path(self.public)), (1, MIN_SIZE))
+        self.assertFalse(PrecompressState.load(default_state_path(self.public)).loaded)
+
+    def test_shrunk_file_loses_gz(self):
+        precompress_directory(self.public)
+        write_file(os.path.join(self.public, "index.css"), "a {}")
+        report = precompress_directory(self.public)
+        self.assertEqual(report.removed, ["index.css"])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css.gz")))
+
+
+class TestGzipSink(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        self.public = os.path.join(self.root, "public")
+        self.sink = GzipSink(level=6)
+
+    def assertCompressed(self, path):
+        with open(path, 'rb') as f, gzip.open(path + ".gz") as gz:
+            self.assertEqual(gz.read(), f.read())
+        self.assertEqual(os.stat(path + ".gz").st_mtime_ns, os.stat(path).st_mtime_ns)
+
+    def test_writes_gz_with_each_file(self):
+        page = os.path.join(self.public, "blog", "index.html")
+        self.sink.write_page(page, lambda f: [f.write("<p>héllo</p>") for _ in range(100)])
+        self.assertCompressed(page)
+
+        data = os.path.join(self.public, "data.json")
+        self.sink.write_bytes(data, b"[1, 2, 3]" * 100)
+        self.assertCompressed(data)
+
+        src = os.path.join(self.root, "index.css")
+        write_file(src, "body { color: red; }" * 50)
+        css = os.path.join(self.public, "index.css")
+        self.sink.add_file(css, src)
+        self.assertCompressed(css)
+
+        self.sink.write_bytes(os.path.join(self.public, "logo.png"), b"png" * 200)
+        self.assertEqual(
+            sorted(os.listdir(self.public)),
+            ["blog", "data.json", "data.json.gz", "index.css", "index.css.gz", "logo.png"],
+        )
+
+    def test_small_file_loses_gz(self):
+        page = os.path.join(self.public, "index.html")
+        self.sink.write_page(page, lambda f: f.write("<p>hello</p>" * 100))
+        self.sink.write_page(page, lambda f: f.write("<p>hi</p>"))
+        self.assertEqual(os.listdir(self.public), ["index.html"])
+
+        def fail(f):
+            f.write("<p>partial</p>" * 100)
+            raise RuntimeError("render failed")
+
+        # A failed render leaves the page as it was and no .gz behind
+        with self.assertRaises(RuntimeError):
+            self.sink.write_page(page, fail)
+        self.assertEqual(os.listdir(self.public), ["index.html"])
+
+    def test_build_with_workers(self):
+        content = os.path.join(self.root, "content")
+        template = os.path.join(self.root, "template.html")
+        write_file(template, TEMPLATE)
+        for i in range(4):
+            write_file(os.path.join(content, f"page{i}.md"), f"# Page {i}\n\n" + "Some text. " * 50)
+        build.generate_pages_recursive(content, template, self.public, jobs=2, sink=self.sink)
+        for i in range(4):
+            self.assertCompressed(os.path.join(self.public, f"page{i}.html"))
+
+        os.remove(os.path.join(content, "page0.md"))
+        build.generate_pages_recursive(content, template, self.public, sink=self.sink)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "page0.html.gz")))
+
+    def test_keep_compressed(self):
+        static = os.path.join(self.root, "static")
+        write_file(os.path.join(static, "index.css"), "body {}")
+        keep = keep_compressed({"index.html"}.__contains__, static)
+        self.assertTrue(keep("index.html"))
+        self.assertTrue(keep("index.html.gz"))
+        self.assertTrue(keep("index.css.gz"))
+        self.assertFalse(keep("index.css"))
+        self.assertFalse(keep("old.css.gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
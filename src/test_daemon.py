@@ -0,0 +1,116 @@
+import json
+import os
+import socket
+import stat
+import threading
+import unittest
+from unittest import mock
+
+from daemon import DaemonServer, RenderDaemon, call
+from testutil import SiteTestCase
+
+
+class TestRenderDaemon(SiteTestCase):
+    files = {
+        "content/index.md": "# Home\n\nWelcome",
+        "content/blog/template.html": "<article>{{ Content }}</article>",
+        "content/blog/post.md": "# Post\n\n* a\n* b",
+        "static/index.css": "body {}",
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.renderer = RenderDaemon(
+            self.content, self.static, self.template, self.public,
+            render_cache_dir=os.path.join(self.root, "cache"),
+        )
+        self.socket_path = os.path.join(self.root, "ssg.sock")
+        self.server = DaemonServer(self.socket_path, self.renderer)
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_render(self):
+        result = call(self.socket_path, "render", path="index.md")
+        self.assertEqual(result, {"html": "<title>Home</title><div><h1>Home</h1><p>Welcome</p></div>", "warnings": []})
+        result = call(self.socket_path, "render", path="blog/post.md", markdown="Draft")
+        self.assertEqual(result["html"], "<article><div><p>Draft</p></div></article>")
+        self.assertEqual(len(result["warnings"]), 1)
+
+    def test_errors(self):
+        with self.assertRaisesRegex(RuntimeError, "Unknown method"):
+            call(self.socket_path, "publish")
+        with self.assertRaisesRegex(RuntimeError, "outside the content directory"):
+            call(self.socket_path, "render", path="../template.html")
+        with self.assertRaisesRegex(RuntimeError, "No such page"):
+            call(self.socket_path, "render", path="missing.md")
+        # The daemon keeps serving after failures
+        self.assertEqual(call(self.socket_path, "health")["status"], "ok")
+
+    def test_socket_is_private_from_bind(self):
+        socket_path = os.path.join(os.path.dirname(self.socket_path), "private.sock")
+        umasks = []
+        bind = socket.socket.bind
+
+        def tracked_bind(sock, address):
+            umask = os.umask(0)
+            os.umask(umask)
+            umasks.append(umask)
+            bind(sock, address)
+
+        before = os.umask(0o022)
+        try:
+            with mock.patch.object(socket.socket, "bind", tracked_bind):
+                server = DaemonServer(socket_path, self.renderer)
+            self.assertEqual(os.umask(0o022), 0o022)
+        finally:
+            os.umask(before)
+        self.addCleanup(server.server_close)
+        self.assertEqual(umasks, [0o077])
+        self.assertEqual(stat.S_IMODE(os.stat(socket_path).st_mode) & 0o077, 0)
+
+    def test_build_and_stats(self):
+        result = call(self.socket_path, "build")
+        self.assertEqual(result["copied"], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "post.html")))
+        call(self.socket_path, "render", path="index.md")
+        call(self.socket_path, "render", path="index.md")
+        stats = call(self.socket_path, "stats")
+        self.assertEqual(stats["requests"]["render"]["count"], 2)
+        self.assertEqual(stats["requests"]["build"]["errors"], 0)
+        # The build filled the shared on-disk render cache
+        self.assertEqual(stats["render_cache"]["hits"], 2)
+        self.assertGreaterEqual(stats["templates"], 1)
+
+    def test_many_requests_per_connection_and_concurrent_clients(self):
+        def client(results):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(self.socket_path)
+                reader = sock.makefile('rb')
+                for i in range(5):
+                    request = {"id": i, "method": "render", "params": {"markdown": f"# Page {i}"}}
+                    sock.sendall(json.dumps(request).encode() + b"\n")
+                    results.append(json.loads(reader.readline()))
+                sock.sendall(b"not json\n")
+                results.append(json.loads(reader.readline()))
+                reader.close()
+
+        results = [[] for _ in range(4)]
+        threads = [threading.Thread(target=client, args=(r,)) for r in results]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for responses in results:
+            self.assertEqual([r["id"] for r in responses[:5]], list(range(5)))
+            self.assertTrue(all(r["ok"] for r in responses[:5]))
+            self.assertIn("<title>Page 4</title>", responses[4]["result"]["html"])
+            self.assertFalse(responses[5]["ok"])
+
+    def test_socket_in_use(self):
+        with self.assertRaises(OSError):
+            DaemonServer(self.socket_path, self.renderer)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from build import generate_pages_recursive, render_page
+from document_ir import ELEMENT, LEAF, NONE, TEXT, Document, DocumentBuilder
+from htmlnode import LeafNode, ParentNode
+from markdown_blocks import (
+    BlockCache,
+    block_to_html_node,
+    blocks_to_document,
+    block_type_heading,
+    markdown_to_document,
+    markdown_to_html_node,
+)
+from sinks import MemorySink
+from template import compile_template
+from testutil import write_file
+
+MARKDOWN = """# Title with **bold**
+
+A paragraph with *italic*, `code`, a [link](https://boot.dev) and an ![image](/a.png).
+
+> a quote
+> on two lines
+
+* one
+* **two [nested](/x)**
+
+1. first
+2. second
+
+```
+code block
+```
+"""
+
+
+class TestDocument(unittest.TestCase):
+    def test_arrays(self):
+        builder = DocumentBuilder()
+        builder.open("p", {"class": "intro"})
+        builder.text("Hello ")
+        builder.leaf("b", "world")
+        builder.close()
+        builder.leaf("b", "again", {"class": "intro"})
+        document = builder.build()
+        self.assertEqual(len(document), 4)
+        self.assertEqual(list(document.kinds), [ELEMENT, TEXT, LEAF, LEAF])
+        self.assertEqual(list(document.parents()), [NONE, 0, 0, NONE])
+        self.assertEqual(list(document.ends), [3, 2, 3, 4])
+        self.assertEqual(document.children(0), [1, 2])
+        self.assertEqual(document.children(NONE), [0, 3])
+        self.assertEqual(document.props(0), {"class": "intro"})
+        self.assertIsNone(document.props(2))
+        self.assertEqual(document.props(3), {"class": "intro"})
+        # Tag names and attributes are stored once
+        self.assertEqual(document.strings.count("b"), 1)
+        self.assertEqual(document.strings.count("intro"), 1)
+        self.assertEqual(document.to_html(), '<p class="intro">Hello <b>world</b></p><b class="intro">again</b>')
+
+    def test_round_trip(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "a "), LeafNode("a", "link", {"href": "/x", "rel": "me"})]),
+            ParentNode("ul", [ParentNode("li", [ParentNode("b", [LeafNode(None, "deep")])])], {"id": "l"}),
+            LeafNode("img", "", {"src": "/a.png", "alt": ""}),
+        ])
+        document = Document.from_html_node(node)
+        self.assertEqual(document.to_html(), node.to_html())
+        self.assertEqual("".join(document.iter_html()), node.to_html())
+        self.assertEqual(document.to_html_node().to_html(), node.to_html())
+
+        roots = Document.from_html_node([LeafNode("b", "x"), LeafNode(None, "y")]).to_html_node()
+        self.assertEqual([root.to_html() for root in roots], ["<b>x</b>", "y"])
+
+    def test_nested_in_html_node(self):
+        document = markdown_to_document(MARKDOWN)
+        node = ParentNode("main", [LeafNode("h1", "Top"), document, ParentNode("footer", [document])])
+        expected = markdown_to_html_node(MARKDOWN).to_html()
+        self.assertEqual(node.to_html(), f"<main><h1>Top</h1>{expected}<footer>{expected}</footer></main>")
+
+    def test_invalid_nodes(self):
+        for node in (ParentNode(None, []), ParentNode("p", None), ParentNode("p", [LeafNode("b", None)])):
+            with self.assertRaises(ValueError):
+                Document.from_html_node(node)
+        builder = DocumentBuilder()
+        builder.open("p")
+        with self.assertRaises(ValueError):
+            builder.build()
+
+    def test_write_html_and_template_slot(self):
+        document = markdown_to_document("Hello")
+        sink = io.StringIO()
+        with mock.patch.object(sink, "write", wraps=sink.write) as write:
+            document.write_html(sink)
+        self.assertEqual(sink.getvalue(), "<div><p>Hello</p></div>")
+        # Written chunk by chunk, never as one string
+        self.assertEqual(write.call_count, 5)
+        template = compile_template("<main>{{ Content }}</main>")
+        self.assertEqual(template.render(Content=document), "<main><div><p>Hello</p></div></main>")
+
+
+class TestMarkdownToDocument(unittest.TestCase):
+    def test_matches_html_node_tree(self):
+        self.assertEqual(markdown_to_document(MARKDOWN).to_html(), markdown_to_html_node(MARKDOWN).to_html())
+
+    def test_blocks(self):
+        for block in MARKDOWN.strip().split("\n\n"):
+            self.assertEqual(markdown_to_document(block).to_html(), f"<div>{block_to_html_node(block).to_html()}</div>")
+        with self.assertRaises(ValueError):
+            blocks_to_document([(block_type_heading, "#")])
+
+    def test_zero_size_block_cache_uses_document(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            template = os.path.join(root, "template.html")
+            write_file(template, "{{ Content }}")
+            write_file(os.path.join(content, "index.md"), MARKDOWN)
+            outputs = []
+            for size in (0, 4096):
+                public = os.path.join(root, f"public{size}")
+                with mock.patch("build.blocks_to_document", wraps=blocks_to_document) as to_document:
+                    generate_pages_recursive(content, template, public, block_cache=BlockCache(size))
+                self.assertEqual(to_document.call_count, 1 if size == 0 else 0)
+                with open(os.path.join(public, "index.html")) as f:
+                    outputs.append(f.read())
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_build_uses_document_without_block_cache(self):
+        with tempfile.TemporaryDirectory() as root:
+            md_path = os.path.join(root, "page.md")
+            with open(md_path, 'w') as f:
+                f.write(MARKDOWN)
+            template = compile_template("{{ Title }}|{{ Content }}")
+            sink = MemorySink()
+            render_page(md_path, template, "page.html", sink=sink)
+            render_page(md_path, template, "cached.html", block_cache=BlockCache(), sink=sink)
+        self.assertEqual(sink.files["page.html"], sink.files["cached.html"])
+        self.assertEqual(
+            sink.files["page.html"].decode('utf-8'),
+            "Title with **bold**|" + markdown_to_html_node(MARKDOWN).to_html(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 from htmlnode import LeafNode, ParentNode, HTMLNode
 
@@ -49,6 +50,14 @@ class TestHTMLNode(unittest.TestCase):
             "HTMLNode(p, What a strange world, children: None, {'class': 'primary'})",
         )
 
+    def test_slots(self):
+        for node in (HTMLNode("p"), LeafNode("p", "x"), ParentNode("p", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    def test_tag_interned(self):
+        tag = "".join(["sp", "an"])
+        self.assertIs(LeafNode(tag, "x").tag, LeafNode("span", "y").tag)
+
     def test_to_html_no_children(self):
         node = LeafNode("p", "Hello, world!")
         self.assertEqual(node.to_html(), "<p>Hello, world!</p>")
@@ -101,6 +110,39 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_iter_html(self):
+        node = ParentNode(
+            "p",
+            [LeafNode("b", "Bold text"), LeafNode(None, "Normal text")],
+            {"class": "x"},
+        )
+        self.assertEqual(
+            list(node.iter_html()),
+            ['<p class="x">', "<b>Bold text</b>", "Normal text", "</p>"],
+        )
+
+    def test_write_html(self):
+        node = ParentNode("div", [ParentNode("span", [LeafNode("i", "x")])])
+        sink = io.StringIO()
+        node.write_html(sink)
+        self.assertEqual(sink.getvalue(), "<div><span><i>x</i></span></div>")
+
+    def test_deep_nesting(self):
+        node = LeafNode(None, "leaf")
+        for _ in range(10000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html), 4 + 10000 * len("<span></span>"))
+
+    def test_to_html_invalid(self):
+        with self.assertRaises(ValueError):
+            ParentNode(None, [LeafNode("b", "x")]).to_html()
+        with self.assertRaises(ValueError):
+            ParentNode("div", None).to_html()
+        with self.assertRaises(ValueError):
+            ParentNode("div", [LeafNode("b", None)]).to_html()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -285,6 +285,124 @@ class TestMarkdownExtraction(unittest.TestCase):
         actual = text_to_textnodes(text)
         self.assertEqual(actual, expected)
 
+    def test_bold_inside_link(self):
+        text = "See [**bold** link](https://example.com) here"
+        expected = [
+            TextNode("See ", TextType.TEXT),
+            TextNode(
+                "bold link",
+                TextType.LINK,
+                "https://example.com",
+                [
+                    TextNode("bold", TextType.BOLD),
+                    TextNode(" link", TextType.TEXT),
+                ],
+            ),
+            TextNode(" here", TextType.TEXT),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_italic_inside_bold(self):
+        text = "**very *important* note**"
+        expected = [
+            TextNode(
+                "very important note",
+                TextType.BOLD,
+                None,
+                [
+                    TextNode("very ", TextType.TEXT),
+                    TextNode("important", TextType.ITALIC),
+                    TextNode(" note", TextType.TEXT),
+                ],
+            ),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_bold_italic(self):
+        text = "***both***"
+        expected = [
+            TextNode("both", TextType.BOLD, None, [TextNode("both", TextType.ITALIC)]),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_code_span_is_literal(self):
+        text = "Use `a*b [x](y)` here"
+        expected = [
+            TextNode("Use ", TextType.TEXT),
+            TextNode("a*b [x](y)", TextType.CODE),
+            TextNode(" here", TextType.TEXT),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_unmatched_brackets_are_text(self):
+        text = "a [b] (c) ! d"
+        self.assertEqual(text_to_textnodes(text), [TextNode(text, TextType.TEXT)])
+
+    def test_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **not closed")
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is *not closed")
+
+    def test_unclosed_backtick_is_text(self):
+        self.assertEqual(
+            text_to_textnodes("This is `not closed"),
+            [TextNode("This is `not closed", TextType.TEXT)],
+        )
+        self.assertEqual(
+            text_to_textnodes("*don't use ` here*"),
+            [TextNode("don't use ` here", TextType.ITALIC)],
+        )
+        self.assertEqual(
+            text_to_textnodes("**a ` b** and `code`"),
+            [
+                TextNode("a ` b", TextType.BOLD),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("code", TextType.CODE),
+            ],
+        )
+
+    def test_link_after_stray_bracket(self):
+        self.assertEqual(
+            text_to_textnodes("see [the *new* docs and [link](u)"),
+            [
+                TextNode("see [the ", TextType.TEXT),
+                TextNode("new", TextType.ITALIC),
+                TextNode(" docs and ", TextType.TEXT),
+                TextNode("link", TextType.LINK, "u"),
+            ],
+        )
+        self.assertEqual(text_to_textnodes("[a [b](u)"), [TextNode("a [b", TextType.LINK, "u")])
+        # "![" in a URL does not start an image
+        self.assertEqual(text_to_textnodes("[x](a![)"), [TextNode("x", TextType.LINK, "a![")])
+
+    def test_empty_code_span_in_emphasis(self):
+        self.assertEqual(text_to_textnodes("*``*"), [TextNode("``", TextType.ITALIC)])
+        self.assertEqual(text_to_textnodes("**``**"), [TextNode("``", TextType.BOLD)])
+        self.assertEqual(text_to_textnodes("a `` b"), [TextNode("a ", TextType.TEXT), TextNode(" b", TextType.TEXT)])
+
+    def test_falls_back_to_split_passes(self):
+        # Accepted by the original passes, which paired the asterisks
+        # before looking for code spans and links
+        self.assertEqual(
+            text_to_textnodes("*`* `)`"),
+            [
+                TextNode("`", TextType.ITALIC),
+                TextNode(" ", TextType.TEXT),
+                TextNode(")", TextType.CODE),
+            ],
+        )
+        self.assertEqual(
+            text_to_textnodes("[*[x](u)!*"),
+            [TextNode("[", TextType.TEXT), TextNode("[x](u)!", TextType.ITALIC)],
+        )
+
+    def test_many_links(self):
+        text = " ".join(f"[l{i}](u{i})" for i in range(1000))
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 1999)
+        self.assertEqual(nodes[-1], TextNode("l999", TextType.LINK, "u999"))
+
 
 if __name__ == "__main__":
     unittest.main()
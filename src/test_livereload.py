@@ -0,0 +1,141 @@
+import http.client
+import json
+import os
+import threading
+import unittest
+
+from livereload import (
+    BLOCKS_ATTRIBUTE,
+    LIVE_RELOAD_PATH,
+    LiveReload,
+    diff_blocks,
+    inject_script,
+    page_event,
+    render_live_page,
+)
+from serve import SiteServer, SiteStore
+from template import compile_template
+import testutil
+
+
+def write_file(path, content):
+    testutil.write_file(path, content)
+    # Make every write visible to stat-based change checks
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+class TestDiffBlocks(unittest.TestCase):
+    def test_diff_blocks(self):
+        old = ["<h1>A</h1>", "<p>b</p>", "<p>c</p>", "<p>d</p>"]
+        self.assertEqual(diff_blocks(old, old), [])
+        self.assertEqual(
+            diff_blocks(old, ["<h1>A</h1>", "<p>B</p>", "<p>c</p>", "<p>d</p>", "<p>e</p>"]),
+            [[1, 2, ["<p>B</p>"]], [4, 4, ["<p>e</p>"]]],
+        )
+        self.assertEqual(diff_blocks(old, ["<h1>A</h1>", "<p>d</p>"]), [[1, 3, []]])
+
+    def test_inject_script(self):
+        html = inject_script("<html><body><p>x</p></BODY></html>", "v1")
+        self.assertTrue(html.endswith("</script>\n</BODY></html>"))
+        self.assertIn("&version=v1", html)
+        self.assertTrue(inject_script("<p>x</p>", "v1").startswith("<p>x</p><script>"))
+
+
+class TestLiveReload(testutil.SiteTestCase):
+    files = {
+        "template.html": "<title>{{ Title }}</title><body>{{ Content }}</body>",
+        "content/index.md": "# Home\n\nFirst\n\nSecond\n\n* a\n* b",
+        "static/index.css": "body {}",
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.page = os.path.join(self.content, "index.md")
+        self.store = SiteStore(self.content, self.static, self.template, live=True)
+        self.live_reload = LiveReload(self.store)
+
+    def events(self, subscriber):
+        events = []
+        while not subscriber.events.empty():
+            events.append(subscriber.events.get())
+        return events
+
+    def test_render_live_page(self):
+        template = compile_template("<h1>{{ Title }}</h1>{{ Content }}")
+        html, page = render_live_page(self.page, template)
+        self.assertEqual(page.title, "Home")
+        self.assertEqual(page.blocks[1], "<p>First</p>")
+        self.assertIn(f'<div {BLOCKS_ATTRIBUTE}=""><h1>Home</h1><p>First</p>', html)
+        self.assertIn(page.version, html)
+
+    def test_edit_sends_only_changed_blocks(self):
+        version = self.store.get("page", self.page).live.version
+        subscriber = self.live_reload.subscribe(self.page, version)
+        self.live_reload.poll()
+        self.assertEqual(self.events(subscriber), [])
+
+        write_file(self.page, "# Home\n\nFirst\n\nSecond, edited\n\n* a\n* b")
+        self.live_reload.poll()
+        self.assertEqual(
+            self.events(subscriber),
+            [{"type": "patch", "ops": [[2, 3, ["<p>Second, edited</p>"]]]}],
+        )
+        # The browser now shows the edited version
+        self.live_reload.poll()
+        self.assertEqual(self.events(subscriber), [])
+
+    def test_reloads(self):
+        subscriber = self.live_reload.subscribe(self.page, "stale")
+        self.assertEqual(self.events(subscriber), [{"type": "reload"}])
+        write_file(self.page, "# New title\n\nFirst\n\nSecond\n\n* a\n* b")
+        self.live_reload.poll()
+        self.assertEqual(self.events(subscriber), [{"type": "reload"}])
+        write_file(self.template, "<h1>{{ Title }}</h1><body>{{ Content }}</body>")
+        self.live_reload.poll()
+        self.assertEqual(self.events(subscriber), [{"type": "reload"}])
+        write_file(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.live_reload.poll()
+        self.assertEqual(self.events(subscriber), [{"type": "reload"}])
+
+    def test_page_event(self):
+        _, page = render_live_page(self.page, compile_template("{{ Content }}"))
+        self.assertIsNone(page_event(page, page))
+        self.assertEqual(page_event(None, page), {"type": "reload"})
+
+    def test_event_stream(self):
+        server = SiteServer(("127.0.0.1", 0), self.store, live_reload=self.live_reload, keepalive=0.05)
+        threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        connection = http.client.HTTPConnection(*server.server_address[:2])
+        self.addCleanup(connection.close)
+        connection.request("GET", "/")
+        body = connection.getresponse().read().decode('utf-8')
+        version = self.store.get("page", self.page).live.version
+        self.assertIn(f"version={version}", body)
+
+        stream = http.client.HTTPConnection(*server.server_address[:2])
+        self.addCleanup(stream.close)
+        stream.request("GET", f"{LIVE_RELOAD_PATH}?path=/index.html&version={version}")
+        response = stream.getresponse()
+        self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+        self.assertEqual(response.readline(), b": keepalive\n")
+        response.readline()
+
+        write_file(self.page, "# Home\n\nFirst!\n\nSecond\n\n* a\n* b")
+        self.live_reload.poll()
+        line = response.readline()
+        while line.startswith(b":") or line == b"\n":
+            line = response.readline()
+        event = json.loads(line.decode('utf-8').removeprefix("data: "))
+        self.assertEqual(event, {"type": "patch", "ops": [[1, 2, ["<p>First!</p>"]]]})
+        self.live_reload.stop()
+        # The stream ends when live reload stops
+        while response.readline():
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
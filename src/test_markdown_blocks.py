@@ -1,5 +1,21 @@
+import io
+import os
+import tempfile
 import unittest
-from markdown_blocks import markdown_to_blocks, block_to_block_type, extract_title
+from markdown_blocks import (
+    parse_markdown,
+    BlockCache,
+    block_to_html_node,
+    markdown_to_blocks,
+    block_to_block_type,
+    extract_title,
+    extract_title_from_lines,
+    iter_blocks,
+    iter_file_blocks,
+    iter_typed_blocks,
+    blocks_to_html_node,
+    markdown_to_html_node,
+)
 
 class TestMarkdownToBlocks(unittest.TestCase):
 
@@ -40,11 +56,109 @@ class TestMarkdownToBlocks(unittest.TestCase):
         ]
         self.assertEqual(markdown_to_blocks(markdown), expected)
 
+    def test_code_block_with_blank_lines(self):
+        markdown = "Intro\n\n```\nfirst\n\n\nsecond\n```\n\nAfter"
+        expected = ["Intro", "```\nfirst\n\n\nsecond\n```", "After"]
+        self.assertEqual(markdown_to_blocks(markdown), expected)
+
+    def test_unterminated_code_block(self):
+        markdown = "```python\ncode\n\nMore text\n\n* item"
+        expected = ["```python\ncode", "More text", "* item"]
+        self.assertEqual(markdown_to_blocks(markdown), expected)
+
     def test_trailing_newlines(self):
         markdown = "First block\n\nSecond block\n\n"
         expected = ["First block", "Second block"]
         self.assertEqual(markdown_to_blocks(markdown), expected)
 
+class TestIterBlocks(unittest.TestCase):
+
+    def test_file_object(self):
+        markdown = "# Heading\n\nParagraph one\nstill one\n\n\n* a\n* b\n"
+        self.assertEqual(
+            list(iter_blocks(io.StringIO(markdown))),
+            markdown_to_blocks(markdown),
+        )
+
+    def test_file_blocks(self):
+        markdown = "# Title\n\nSome **text**\n\n> quote\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, 'w') as f:
+                f.write(markdown)
+            for use_mmap in (False, True):
+                self.assertEqual(
+                    list(iter_file_blocks(path, use_mmap)),
+                    ["# Title", "Some **text**", "> quote"],
+                )
+
+    def test_empty_file_mmap(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "empty.md")
+            open(path, 'w').close()
+            self.assertEqual(list(iter_file_blocks(path, use_mmap=True)), [])
+
+    def test_blocks_to_html_node(self):
+        markdown = "# Title\n\nSome **text**\n\n* a\n* b"
+        node = blocks_to_html_node(iter_blocks(io.StringIO(markdown)))
+        self.assertEqual(node.to_html(), markdown_to_html_node(markdown).to_html())
+
+class TestParseMarkdown(unittest.TestCase):
+    def test_blocks_classified_like_block_to_block_type(self):
+        markdown = (
+            "Intro\n\n# Title\n\n## Part *one*\n\n> a\n> b\n\n* a\n- b\n\n"
+            "1. a\n2. b\n\n1. a\n3. b\n\n```\ncode\n```\n\n####### Not a heading"
+        )
+        document = parse_markdown(markdown)
+        self.assertEqual(
+            document.blocks,
+            [(block_to_block_type(block), block) for block in markdown_to_blocks(markdown)],
+        )
+
+    def test_title_and_headings(self):
+        document = parse_markdown("Intro\n#   Main Title  \n\n## Sub\n\n# Second")
+        self.assertEqual(document.title, "Main Title")
+        self.assertEqual(document.headings, [(2, "Sub"), (1, "Second")])
+
+    def test_no_title(self):
+        document = parse_markdown("Text\n\n## Sub\n\n#  \nmore")
+        self.assertIsNone(document.title)
+
+    def test_fenced_code_block_with_blank_lines(self):
+        document = parse_markdown("```\na\n\nb\n```")
+        self.assertEqual(document.blocks, [("code", "```\na\n\nb\n```")])
+        self.assertEqual(
+            markdown_to_html_node("```\na\n\nb\n```").to_html(),
+            "<div><pre><code>a\n\nb\n</code></pre></div>",
+        )
+
+    def test_unterminated_fence_lookahead_is_bounded(self):
+        consumed = []
+
+        def lines():
+            yield "```python"
+            for i in range(100000):
+                consumed.append(i)
+                yield f"line {i}\n" if i % 3 else "\n"
+
+        blocks = iter_typed_blocks(lines(), fence_lookahead=1000)
+        self.assertEqual(next(blocks), ("paragraph", "```python"))
+        self.assertEqual(next(blocks), ("paragraph", "line 1\nline 2"))
+        self.assertLess(len(consumed), 200)
+
+    def test_unterminated_fence_past_lookahead(self):
+        markdown = "```\na\n\n* b\n* c\n\n> d\n> e\n\n1. f\n2. g"
+        self.assertEqual(
+            list(iter_typed_blocks(markdown.split("\n"), fence_lookahead=3)),
+            list(iter_typed_blocks(markdown.split("\n"))),
+        )
+        # A fence closed beyond the lookahead is not a code block
+        markdown = "```\n" + "x\n\n" * 10 + "```"
+        self.assertEqual(parse_markdown(markdown).blocks, [("code", markdown)])
+        blocks = list(iter_typed_blocks(markdown.split("\n"), fence_lookahead=5))
+        self.assertEqual(blocks[:2], [("paragraph", "```\nx"), ("paragraph", "x")])
+        self.assertEqual(len(blocks), 11)
+
 class TestBlockToBlockType(unittest.TestCase):
 
     def test_heading(self):
@@ -110,9 +224,43 @@ class TestExtractTitle(unittest.TestCase):
         with self.assertRaises(ValueError):
             extract_title(markdown)
 
+    def test_title_from_lines(self):
+        lines = io.StringIO("Intro\n#   Main Title  \n# Second\n")
+        self.assertEqual(extract_title_from_lines(lines), "Main Title")
+        with self.assertRaises(ValueError):
+            extract_title_from_lines(io.StringIO("No title\n## Sub\n"))
+
     def test_multiple_titles(self):
         markdown = "# First Title\n## Subtitle\n# Second Title"
         self.assertEqual(extract_title(markdown), "First Title")
 
+class TestBlockCache(unittest.TestCase):
+    def test_renders_like_block_to_html_node(self):
+        cache = BlockCache()
+        blocks = ["Some **bold** text", "* one\n* two", "Some **bold** text", "> quote"]
+        for block in blocks:
+            self.assertEqual(cache.render(block).to_html(), block_to_html_node(block).to_html())
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = BlockCache(maxsize=2)
+        cache.render("a")
+        cache.render("b")
+        cache.render("a")
+        cache.render("c")
+        self.assertEqual(len(cache), 2)
+        cache.render("a")
+        cache.render("b")
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 4, "size": 2, "maxsize": 2})
+
+    def test_large_blocks_and_disabled_cache_are_not_stored(self):
+        cache = BlockCache(max_block_size=5)
+        cache.render("a long paragraph")
+        self.assertEqual(len(cache), 0)
+        disabled = BlockCache(maxsize=0)
+        disabled.render("a")
+        disabled.render("a")
+        self.assertEqual((disabled.hits, disabled.misses, len(disabled)), (0, 2, 0))
+
 if __name__ == "__main__":
     unittest.main()
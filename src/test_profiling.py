@@ -0,0 +1,101 @@
+import json
+import os
+import pickle
+import tempfile
+import tracemalloc
+import unittest
+
+from profiling import NULL_PROFILER, BuildProfiler, MemoryBudgetExceeded
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def test_stages_attributed_to_pages(self):
+        profiler = BuildProfiler()
+        with profiler.stage("copy_static"):
+            pass
+        with profiler.page("a.md"):
+            with profiler.stage("read"):
+                pass
+            with profiler.stage("read"):
+                pass
+        self.assertEqual(set(profiler.stages), {"copy_static", "read"})
+        self.assertEqual(len(profiler.pages), 1)
+        self.assertEqual(list(profiler.pages[0]["stages"]), ["read"])
+
+    def test_add_pages(self):
+        profiler = BuildProfiler()
+        profiler.add_pages([
+            {"path": "a.md", "seconds": 0.5, "stages": {"read": 0.2, "write": 0.3}},
+            {"path": "b.md", "seconds": 1.5, "stages": {"read": 1.0}},
+        ])
+        self.assertAlmostEqual(profiler.stages["read"], 1.2)
+        report = profiler.report(top=1)
+        self.assertEqual(report["pages"], 2)
+        self.assertEqual([page["path"] for page in report["slowest_pages"]], ["b.md"])
+
+    def test_json_and_prometheus(self):
+        profiler = BuildProfiler()
+        profiler.add_pages([{"path": 'odd"name.md', "seconds": 0.1, "stages": {"read": 0.1}}])
+        profiler.add_static_files(3)
+        profiler.stop()
+        text = profiler.format_prometheus()
+        self.assertIn('ssg_build_stage_seconds{stage="read"} 0.1', text)
+        self.assertIn('ssg_build_page_seconds{path="odd\\"name.md"} 0.1', text)
+        self.assertIn("ssg_build_static_files 3", text)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "report.json")
+            profiler.write_json(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)["static_files"], 3)
+
+    def test_memory_profile(self):
+        profiler = BuildProfiler(memory=True)
+        self.addCleanup(tracemalloc.stop)
+        with profiler.page("small.md"):
+            pass
+        with profiler.page("large.md"):
+            data = bytearray(1024 * 1024)
+            del data
+        report = profiler.report()
+        self.assertEqual(report["memory"]["largest_pages"][0]["path"], "large.md")
+        self.assertGreaterEqual(report["memory"]["max_peak_bytes"], 1024 * 1024)
+        self.assertEqual(report["memory"]["over_budget"], [])
+        self.assertIn("ssg_build_page_peak_bytes{path=\"large.md\"}", profiler.format_prometheus())
+
+    def test_memory_budget_warn(self):
+        profiler = BuildProfiler(memory_budget=512 * 1024)
+        self.addCleanup(tracemalloc.stop)
+        with profiler.page("large.md"):
+            data = bytearray(1024 * 1024)
+            del data
+        self.assertTrue(profiler.memory)
+        self.assertEqual(profiler.report()["memory"]["over_budget"], ["large.md"])
+        self.assertIn("exceeded", profiler.format_report())
+
+    def test_memory_budget_abort(self):
+        profiler = BuildProfiler(memory_budget=512 * 1024, budget_action="abort")
+        self.addCleanup(tracemalloc.stop)
+        with profiler.page("small.md"):
+            pass
+        with self.assertRaises(MemoryBudgetExceeded) as cm:
+            with profiler.page("large.md"):
+                data = bytearray(1024 * 1024)
+                del data
+        self.assertEqual(cm.exception.path, "large.md")
+        # Workers send the exception back to the parent process
+        copy = pickle.loads(pickle.dumps(cm.exception))
+        self.assertEqual(str(copy), str(cm.exception))
+
+    def test_invalid_budget_action(self):
+        with self.assertRaises(ValueError):
+            BuildProfiler(budget_action="ignore")
+
+    def test_null_profiler(self):
+        with NULL_PROFILER.page("a.md"):
+            with NULL_PROFILER.stage("read"):
+                pass
+        self.assertFalse(NULL_PROFILER.enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+import render_cache
+from render_cache import RenderCache
+
+
+def _put(args):
+    directory, markdown, html = args
+    RenderCache(directory).put(markdown, html)
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = RenderCache(self.tmp.name)
+
+    def test_get_and_put(self):
+        self.assertIsNone(self.cache.get("# Title"))
+        self.cache.put("# Title", "<div><h1>Title</h1></div>")
+        self.assertEqual(self.cache.get("# Title"), "<div><h1>Title</h1></div>")
+        self.assertEqual((self.cache.hits, self.cache.misses, self.cache.writes), (1, 1, 1))
+        stats = self.cache.stats()
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(stats["bytes"], len("<div><h1>Title</h1></div>"))
+
+    def test_key_includes_generator_version(self):
+        self.cache.put("# Title", "<h1>Title</h1>")
+        with mock.patch.object(render_cache, "GENERATOR_VERSION", "test"):
+            self.assertIsNone(self.cache.get("# Title"))
+
+    def test_prune_evicts_least_recently_used(self):
+        for name in ("a", "b", "c"):
+            self.cache.put(name, "x" * 10)
+        # Make "a" the oldest, then use it so "b" becomes the oldest
+        old = time.time() - 100
+        for name, age in (("a", 3), ("b", 2), ("c", 1)):
+            os.utime(self.cache._path(self.cache.key(name)), (old - age, old - age))
+        self.cache.get("a")
+        self.assertEqual(self.cache.prune(20), (1, 10))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("c"))
+        self.assertEqual(self.cache.prune(0), (2, 20))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_prune_removes_stale_temporary_files(self):
+        self.cache.put("a", "x")
+        shard = os.path.dirname(self.cache._path(self.cache.key("a")))
+        stale = os.path.join(shard, ".abandoned.tmp")
+        fresh = os.path.join(shard, ".writing.tmp")
+        for path in (stale, fresh):
+            with open(path, 'w') as f:
+                f.write("partial")
+        old = time.time() - 2 * render_cache.STALE_TMP_SECONDS
+        os.utime(stale, (old, old))
+        self.cache.prune()
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(fresh))
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+    def test_concurrent_writers(self):
+        tasks = [(self.tmp.name, "same page", "<p>same</p>")] * 8
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(_put, tasks))
+        self.assertEqual(self.cache.get("same page"), "<p>same</p>")
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
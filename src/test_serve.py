@@ -0,0 +1,107 @@
+import gzip
+import http.client
+import os
+import threading
+import unittest
+
+from serve import SiteServer, SiteStore, accepts_gzip, etag_matches
+from testutil import SiteTestCase, write_file
+
+
+class TestSiteServer(SiteTestCase):
+    files = {
+        "content/index.md": "# Home\n\n" + "Welcome. " * 50,
+        "content/blog/post.md": "# Post\n\n* a\n* b",
+        "static/index.css": "body {}",
+        "static/blog/logo.png": "png",
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.store = SiteStore(self.content, self.static, self.template)
+        self.server = SiteServer(("127.0.0.1", 0), self.store)
+        thread = threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def request(self, path, method="GET", **headers):
+        connection = http.client.HTTPConnection(*self.server.server_address[:2])
+        self.addCleanup(connection.close)
+        connection.request(method, path, headers=headers)
+        response = connection.getresponse()
+        return response, response.read()
+
+    def test_renders_only_requested_page(self):
+        response, body = self.request("/blog/post.html")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Type"), "text/html; charset=utf-8")
+        self.assertIn(b"<title>Post</title>", body)
+        self.assertEqual(self.store.renders, 1)
+        self.request("/blog/post.html")
+        self.assertEqual(self.store.renders, 1)
+
+    def test_static_index_and_redirect(self):
+        response, body = self.request("/index.css")
+        self.assertEqual((response.status, body), (200, b"body {}"))
+        self.assertEqual(response.getheader("Content-Type"), "text/css")
+        response, body = self.request("/")
+        self.assertIn(b"<title>Home</title>", body)
+        response, _ = self.request("/blog")
+        self.assertEqual(response.status, 301)
+        self.assertEqual(response.getheader("Location"), "/blog/")
+        for path in ("/missing.html", "/../template.html", "/blog/"):
+            self.assertEqual(self.request(path)[0].status, 404, path)
+
+    def test_etag_and_not_modified(self):
+        response, _ = self.request("/index.html")
+        etag = response.getheader("ETag")
+        self.assertTrue(etag.startswith('"'))
+        response, body = self.request("/index.html", **{"If-None-Match": etag})
+        self.assertEqual((response.status, body), (304, b""))
+        self.assertEqual(response.getheader("ETag"), etag)
+
+        write_file(os.path.join(self.content, "index.md"), "# Changed")
+        os.utime(os.path.join(self.content, "index.md"), ns=(0, 0))
+        response, body = self.request("/index.html", **{"If-None-Match": etag})
+        self.assertEqual(response.status, 200)
+        self.assertIn(b"<title>Changed</title>", body)
+        self.assertNotEqual(response.getheader("ETag"), etag)
+
+    def test_template_change_rerenders(self):
+        self.request("/index.html")
+        write_file(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        _, body = self.request("/index.html")
+        self.assertIn(b"<h1>Home</h1>", body)
+        self.assertEqual(self.store.renders, 2)
+
+    def test_gzip(self):
+        _, plain = self.request("/index.html")
+        response, body = self.request("/index.html", **{"Accept-Encoding": "gzip, br"})
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+        self.assertEqual(gzip.decompress(body), plain)
+        gzip_etag = response.getheader("ETag")
+        response, _ = self.request("/index.html", **{"If-None-Match": gzip_etag})
+        self.assertEqual(response.status, 304)
+        # Small and binary files are sent as they are
+        response, _ = self.request("/index.css", **{"Accept-Encoding": "gzip"})
+        self.assertIsNone(response.getheader("Content-Encoding"))
+
+    def test_head(self):
+        response, body = self.request("/index.html", method="HEAD")
+        self.assertEqual(body, b"")
+        self.assertGreater(int(response.getheader("Content-Length")), 0)
+
+    def test_header_parsing(self):
+        self.assertTrue(accepts_gzip("deflate, gzip;q=0.5"))
+        self.assertFalse(accepts_gzip("gzip;q=0, *"))
+        self.assertTrue(accepts_gzip("*"))
+        self.assertFalse(accepts_gzip(None))
+        self.assertTrue(etag_matches('W/"a", "b"', '"a"'))
+        self.assertTrue(etag_matches("*", '"a"'))
+        self.assertFalse(etag_matches('"b"', '"a"'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import unittest
+
+import build
+from compress import MIN_SIZE, PrecompressState, default_state_path
+from manifest import BuildManifest, default_manifest_path
+from shard import ShardMergeError, in_shard, merge_shards, parse_shard, shard_of
+from testutil import SiteTestCase, read_tree, write_file
+
+
+class TestShardAssignment(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/8"), (2, 8))
+        for text in ("0/4", "5/4", "1/0", "a/4", "1", "1/2/3"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_partition_is_stable_and_disjoint(self):
+        paths = [f"section{i % 7}/page{i}.md" for i in range(200)]
+        # Fixed so that a change to the hash, which would move pages
+        # between shards built on different versions, is noticed
+        self.assertEqual(
+            [shard_of(path, 4) for path in ("index.md", "blog/post.md", "a/b/c.md", "section1/page5.md")],
+            [4, 1, 4, 3],
+        )
+        for path in paths:
+            self.assertEqual(sum(in_shard(path, (index, 4)) for index in range(1, 5)), 1)
+        sizes = [sum(in_shard(path, (index, 4)) for path in paths) for index in range(1, 5)]
+        self.assertGreater(min(sizes), 25)
+
+
+class TestShardedBuild(SiteTestCase):
+    files = {
+        **{f"content/section{i % 4}/page{i}.md": f"# Page {i}" for i in range(20)},
+        "content/index.md": "# Home",
+        "static/index.css": "body {}",
+    }
+
+    def build_shards(self, count):
+        shard_dirs = []
+        for index in range(1, count + 1):
+            public = os.path.join(self.root, f"shard{index}", "public")
+            if index == 1:
+                build.copy_directory(self.static, public)
+            build.generate_pages_recursive(self.content, self.template, public, shard=(index, count))
+            shard_dirs.append(public)
+        return shard_dirs
+
+    def test_merge_matches_full_build(self):
+        expected = os.path.join(self.root, "expected")
+        build.copy_directory(self.static, expected)
+        build.generate_pages_recursive(self.content, self.template, expected)
+
+        shard_dirs = self.build_shards(3)
+        pages = [set(BuildManifest.load(default_manifest_path(d)).pages) for d in shard_dirs]
+        self.assertEqual(sum(map(len, pages)), 21)
+        self.assertEqual(len(set.union(*pages)), 21)
+
+        public = os.path.join(self.root, "public")
+        self.assertEqual(merge_shards(list(reversed(shard_dirs)), public), (22, 21))
+        self.assertEqual(read_tree(public), read_tree(expected))
+        merged = BuildManifest.load(default_manifest_path(public))
+        self.assertIsNone(merged.shard)
+        self.assertEqual(merged.pages, BuildManifest.load(default_manifest_path(expected)).pages)
+
+    def test_merge_carries_gzip_state(self):
+        shard_dirs = self.build_shards(2)
+        for shard_dir in shard_dirs:
+            PrecompressState(default_state_path(shard_dir), 9, MIN_SIZE).save()
+        public = os.path.join(self.root, "public")
+        merge_shards(shard_dirs, public)
+        self.assertTrue(PrecompressState.load(default_state_path(public)).loaded)
+
+        PrecompressState(default_state_path(shard_dirs[1]), 1, MIN_SIZE).save()
+        merge_shards(shard_dirs, public)
+        self.assertFalse(os.path.exists(default_state_path(public)))
+
+    def test_shard_build_is_incremental(self):
+        public = self.build_shards(2)[1]
+        before = read_tree(public)
+        build.generate_pages_recursive(self.content, self.template, public, shard=(2, 2))
+        self.assertEqual(read_tree(public), before)
+        # Changing the split drops the pages that left the shard
+        build.generate_pages_recursive(self.content, self.template, public, shard=(2, 4))
+        manifest = BuildManifest.load(default_manifest_path(public))
+        self.assertEqual(manifest.shard, (2, 4))
+        self.assertEqual(len(read_tree(public)), len(manifest.pages))
+
+    def test_conflicts(self):
+        shard_dirs = self.build_shards(3)
+        public = os.path.join(self.root, "public")
+        with self.assertRaises(ShardMergeError) as error:
+            merge_shards(shard_dirs[:2], public)
+        self.assertEqual(error.exception.problems, ["Missing shards: 3"])
+
+        write_file(os.path.join(shard_dirs[2], "index.css"), "body { color: red }")
+        write_file(os.path.join(shard_dirs[1], "index.css"), "body {}")
+        with self.assertRaises(ShardMergeError) as error:
+            merge_shards(shard_dirs + [shard_dirs[0]], public)
+        problems = error.exception.problems
+        self.assertIn(f"Shard 1 given twice: {shard_dirs[0]} and {shard_dirs[0]}", problems)
+        self.assertTrue(any(problem.startswith("index.css: differs") for problem in problems))
+        self.assertFalse(os.path.exists(public))
+
+        with self.assertRaises(ShardMergeError):
+            merge_shards([os.path.join(self.root, "missing")], public)
+
+
+if __name__ == "__main__":
+    unittest.main()
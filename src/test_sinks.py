@@ -0,0 +1,92 @@
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+import build
+from sinks import DIRECTORY_SINK, MemorySink, TarSink, ZipSink, open_sink
+from testutil import write_file
+
+
+def fill(sink, root, static_file):
+    sink.add_file(os.path.join(root, "index.css"), static_file)
+    sink.write_page(os.path.join(root, "blog", "index.html"), lambda f: f.write("<p>ünïcode</p>"))
+    sink.write_bytes(os.path.join(root, "robots.txt"), b"User-agent: *\n")
+
+
+class TestSinks(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.static_file = os.path.join(self.tmp, "index.css")
+        with open(self.static_file, 'w') as f:
+            f.write("body {}")
+
+    def test_directory_sink(self):
+        root = os.path.join(self.tmp, "public")
+        fill(DIRECTORY_SINK, root, self.static_file)
+        with open(os.path.join(root, "blog", "index.html"), encoding='utf-8') as f:
+            self.assertEqual(f.read(), "<p>ünïcode</p>")
+        self.assertTrue(os.path.exists(os.path.join(root, "robots.txt")))
+
+    def test_tar_is_reproducible(self):
+        archives = []
+        for compress in (False, False, True, True):
+            buffer = io.BytesIO()
+            with TarSink(buffer, "public", compress=compress) as sink:
+                fill(sink, "public", self.static_file)
+            archives.append(buffer.getvalue())
+        self.assertEqual(archives[0], archives[1])
+        self.assertEqual(archives[2], archives[3])
+        with tarfile.open(fileobj=io.BytesIO(archives[2])) as tar:
+            self.assertEqual(tar.getnames(), ["index.css", "blog/index.html", "robots.txt"])
+            self.assertEqual({member.mtime for member in tar.getmembers()}, {0})
+            page = tar.extractfile("blog/index.html").read().decode('utf-8')
+            self.assertEqual(page, "<p>ünïcode</p>")
+
+    def test_zip(self):
+        path = os.path.join(self.tmp, "site.zip")
+        with open_sink(path, "public") as sink:
+            self.assertIsInstance(sink, ZipSink)
+            fill(sink, "public", self.static_file)
+        with zipfile.ZipFile(path) as archive:
+            self.assertEqual(archive.namelist(), ["index.css", "blog/index.html", "robots.txt"])
+            self.assertEqual(archive.getinfo("index.css").date_time, (1980, 1, 1, 0, 0, 0))
+            self.assertEqual(archive.read("robots.txt"), b"User-agent: *\n")
+
+    def test_failed_build_leaves_no_archive(self):
+        content = os.path.join(self.tmp, "content")
+        template = os.path.join(self.tmp, "template.html")
+        write_file(template, "{{ Content }}")
+        write_file(os.path.join(content, "a.md"), "# Fine")
+        write_file(os.path.join(content, "b.md"), "**not closed")
+        for name in ("site.tar", "site.tar.gz", "site.zip"):
+            path = os.path.join(self.tmp, name)
+            with self.assertRaises(ValueError):
+                with open_sink(path, "public") as sink:
+                    build.generate_pages_recursive(content, template, "public", sink=sink)
+            self.assertFalse(os.path.exists(path), name)
+            self.assertFalse(os.path.exists(path + ".tmp"), name)
+
+    def test_memory_sink_and_duplicates(self):
+        sink = MemorySink("public")
+        fill(sink, "public", self.static_file)
+        self.assertEqual(sink.files["index.css"], b"body {}")
+        with self.assertRaises(ValueError):
+            sink.write_bytes(os.path.join("public", "robots.txt"), b"")
+
+    def test_open_sink_formats(self):
+        self.assertIs(open_sink("public", "public"), DIRECTORY_SINK)
+        for name, compressed in (("site.tar", False), ("site.tgz", True)):
+            with open_sink(os.path.join(self.tmp, name), "public") as sink:
+                self.assertIsInstance(sink, TarSink)
+                self.assertEqual(sink._gzip is not None, compressed)
+        with self.assertRaises(ValueError):
+            open_sink("site.rar", "public", "rar")
+
+
+if __name__ == "__main__":
+    unittest.main()
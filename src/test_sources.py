@@ -0,0 +1,88 @@
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from sources import DirectorySource, MappingSource, TarSource, ZipSource, open_source
+
+FILES = {
+    "template.html": "{{ Content }}",
+    "content/index.md": "# Home",
+    "content/blog/z.md": "# Z",
+    "content/blog/a.md": "# A",
+    "content/b.md": "# B",
+    "static/logo.png": b"\x89PNG",
+}
+
+WALK_ORDER = ["content/b.md", "content/index.md", "content/blog/a.md", "content/blog/z.md"]
+
+
+class TestSources(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+    def check(self, source):
+        self.assertEqual(source.files("content"), WALK_ORDER)
+        self.assertEqual(source.files("static"), ["static/logo.png"])
+        self.assertEqual(source.files("missing"), [])
+        self.assertEqual(source.read_text("content/blog/a.md"), "# A")
+        self.assertEqual(source.read_bytes("static/logo.png"), b"\x89PNG")
+        self.assertEqual(source.size("static/logo.png"), 4)
+        self.assertTrue(source.isfile("template.html"))
+        self.assertFalse(source.isfile("content/blog"))
+        with self.assertRaises(FileNotFoundError):
+            source.read_bytes("content/missing.md")
+
+    def test_directory(self):
+        for path, data in FILES.items():
+            path = os.path.join(self.tmp, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data.encode() if isinstance(data, str) else data)
+        self.check(DirectorySource(self.tmp))
+        self.check(open_source(self.tmp))
+
+    def test_mapping(self):
+        self.check(MappingSource(FILES))
+
+    def test_tar(self):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+            for path, data in FILES.items():
+                data = data.encode() if isinstance(data, str) else data
+                info = tarfile.TarInfo(f"site-1.0/{path}")
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        buffer.seek(0)
+        self.check(TarSource(buffer, strip_components=1))
+        # Members over spool_size are read back from a temporary file
+        buffer.seek(0)
+        source = TarSource(buffer, strip_components=1, spool_size=3)
+        self.check(source)
+        self.assertEqual(source.read_text("template.html"), "{{ Content }}")
+        self.assertEqual(source.size("template.html"), 13)
+        self.assertEqual(source.read_bytes("content/b.md"), b"# B")
+        source.close()
+        path = os.path.join(self.tmp, "site.tar.gz")
+        with open(path, 'wb') as f:
+            f.write(buffer.getvalue())
+        self.check(open_source(path, strip_components=1))
+
+    def test_zip(self):
+        path = os.path.join(self.tmp, "site.zip")
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr("content/", "")
+            for name, data in FILES.items():
+                archive.writestr(name, data)
+        source = open_source(path)
+        self.assertIsInstance(source, ZipSource)
+        self.check(source)
+        source.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
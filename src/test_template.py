@@ -0,0 +1,99 @@
+import io
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import TemplateResolver, clear_template_cache, compile_template, load_template
+from testutil import write_file
+
+
+class TestCompileTemplate(unittest.TestCase):
+    def test_render_slots(self):
+        template = compile_template("<title> {{ Title }} </title><p>{{Content}}</p>")
+        self.assertEqual(
+            template.render(Title="Hi", Content="<b>x</b>"),
+            "<title> Hi </title><p><b>x</b></p>",
+        )
+
+    def test_repeated_slot(self):
+        template = compile_template("{{ Title }}|{{ Title }}")
+        self.assertEqual(template.render({"Title": "a"}), "a|a")
+
+    def test_missing_slot_left_in_place(self):
+        template = compile_template("{{ Title }} {{ Author }}")
+        self.assertEqual(template.render(Title="T"), "T {{ Author }}")
+
+    def test_no_slots(self):
+        template = compile_template("plain")
+        self.assertEqual(template.render(Title="T"), "plain")
+        self.assertEqual(template.slot_names, set())
+
+    def test_value_not_rescanned(self):
+        template = compile_template("{{ Title }}:{{ Content }}")
+        self.assertEqual(
+            template.render(Title="{{ Content }}", Content="c"), "{{ Content }}:c"
+        )
+
+    def test_node_slot(self):
+        template = compile_template("<main>{{ Content }}</main>")
+        node = ParentNode("div", [LeafNode("b", "x")])
+        self.assertEqual(template.render(Content=node), "<main><div><b>x</b></div></main>")
+        sink = io.StringIO()
+        template.write(sink, Content=node)
+        self.assertEqual(sink.getvalue(), "<main><div><b>x</b></div></main>")
+
+
+class TestIncludes(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        clear_template_cache()
+
+    def path(self, *parts):
+        return os.path.join(self.tmp.name, *parts)
+
+    def test_include(self):
+        write_file(self.path("partials", "head.html"), "<head>{{ Title }}</head>")
+        write_file(self.path("page.html"), "{{> partials/head.html }}<body>{{ Content }}</body>")
+        template = load_template(self.path("page.html"))
+        self.assertEqual(
+            template.render(Title="T", Content="C"), "<head>T</head><body>C</body>"
+        )
+        self.assertEqual(len(template.dependencies), 2)
+
+    def test_include_cycle(self):
+        write_file(self.path("a.html"), "{{> b.html }}")
+        write_file(self.path("b.html"), "{{> a.html }}")
+        with self.assertRaises(ValueError):
+            load_template(self.path("a.html"))
+
+    def test_cache_reloads_changed_partial(self):
+        write_file(self.path("foot.html"), "v1")
+        write_file(self.path("page.html"), "{{> foot.html }}")
+        first = load_template(self.path("page.html"))
+        self.assertIs(first, load_template(self.path("page.html")))
+        write_file(self.path("foot.html"), "v2")
+        os.utime(self.path("foot.html"), ns=(0, 0))
+        second = load_template(self.path("page.html"))
+        self.assertEqual(second.render(), "v2")
+        self.assertNotEqual(first.digest, second.digest)
+
+
+class TestTemplateResolver(unittest.TestCase):
+    def test_directory_override(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            default = os.path.join(root, "template.html")
+            override = os.path.join(content, "blog", "template.html")
+            write_file(default, "default")
+            write_file(override, "blog")
+            os.makedirs(os.path.join(content, "blog", "2024"))
+            resolver = TemplateResolver(content, default)
+            self.assertEqual(resolver.resolve(content), default)
+            self.assertEqual(resolver.resolve(os.path.join(content, "blog")), override)
+            self.assertEqual(resolver.resolve(os.path.join(content, "blog", "2024")), override)
+
+
+if __name__ == "__main__":
+    unittest.main()
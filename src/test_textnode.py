@@ -24,6 +24,15 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.TEXT, "https://www.boot.dev")
         self.assertEqual(node, node2)
 
+    def test_text_type_is_member(self):
+        node = TextNode("This is a text node", TextType.BOLD)
+        self.assertIs(node.text_type, TextType.BOLD)
+        self.assertEqual(node, TextNode("This is a text node", "bold"))
+
+    def test_slots(self):
+        node = TextNode("This is a text node", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+
     def test_repr(self):
         node = TextNode("This is a text node", TextType.TEXT, "https://www.boot.dev")
         self.assertEqual(
@@ -54,6 +63,19 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         self.assertEqual(html_node.tag, "b")
         self.assertEqual(html_node.value, "This is bold")
 
+    def test_nested_link(self):
+        node = TextNode(
+            "bold link",
+            TextType.LINK,
+            "https://www.boot.dev",
+            [TextNode("bold", TextType.BOLD), TextNode(" link", TextType.TEXT)],
+        )
+        html_node = text_node_to_html_node(node)
+        self.assertEqual(
+            html_node.to_html(),
+            '<a href="https://www.boot.dev"><b>bold</b> link</a>',
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
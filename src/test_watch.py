@@ -0,0 +1,103 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import build
+from watch import SiteWatcher, diff_snapshots, snapshot
+from testutil import SiteTestCase, write_file
+
+
+class TestSnapshots(unittest.TestCase):
+    def test_diff(self):
+        old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        new = {"a": (1, 1), "b": (2, 1), "d": (1, 1)}
+        self.assertEqual(diff_snapshots(old, new), {"b", "c", "d"})
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as root:
+            write_file(os.path.join(root, "a", "b.md"), "x")
+            self.assertEqual(list(snapshot(root)), [os.path.join("a", "b.md")])
+            self.assertEqual(snapshot(os.path.join(root, "missing")), {})
+
+
+class TestSiteWatcher(SiteTestCase):
+    files = {
+        "content/index.md": "# Home",
+        "content/about.md": "# About",
+        "static/index.css": "body {}",
+    }
+
+    def setUp(self):
+        super().setUp()
+        build.copy_directory(self.static, self.public)
+        build.generate_pages_recursive(self.content, self.template, self.public)
+        self.watcher = SiteWatcher(self.content, self.static, self.template, self.public)
+
+    def rebuild(self):
+        changes = self.watcher.poll()
+        with mock.patch("build.generate_page", wraps=build.generate_page) as generate:
+            self.watcher.rebuild(*changes)
+        return sorted(os.path.basename(call.args[0]) for call in generate.call_args_list)
+
+    def test_no_changes(self):
+        self.assertEqual(self.watcher.poll(), (set(), set(), False))
+
+    def test_markdown_change_renders_one_page(self):
+        write_file(os.path.join(self.content, "about.md"), "# About us")
+        self.assertEqual(self.rebuild(), ["about.md"])
+        self.assertIn("About us", self.read_public("about.html"))
+
+    def test_markdown_removed(self):
+        os.remove(os.path.join(self.content, "about.md"))
+        self.assertEqual(self.rebuild(), [])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "about.html")))
+
+    def test_template_change_renders_every_page(self):
+        write_file(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.rebuild(), ["about.md", "index.md"])
+
+    def test_static_changes(self):
+        write_file(os.path.join(self.static, "img", "a.png"), "png")
+        os.remove(os.path.join(self.static, "index.css"))
+        self.assertEqual(self.rebuild(), [])
+        self.assertTrue(os.path.exists(os.path.join(self.public, "img", "a.png")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css")))
+
+    def test_edit_during_initial_build_is_rebuilt(self):
+        watcher = SiteWatcher(self.content, self.static, self.template, self.public, debounce=0)
+
+        def initial_build():
+            write_file(os.path.join(self.content, "about.md"), "# About us")
+
+        polls = iter(range(2))
+
+        def sleep(seconds):
+            if next(polls, None) is None:
+                raise KeyboardInterrupt
+
+        with mock.patch("watch.time.sleep", sleep), mock.patch.object(watcher, "rebuild") as rebuild:
+            with self.assertRaises(KeyboardInterrupt):
+                watcher.run(initial_build)
+        rebuild.assert_called_once_with({"about.md"}, set(), False)
+
+    def test_gzip_compresses_what_is_written(self):
+        self.watcher = SiteWatcher(self.content, self.static, self.template, self.public, gzip_level=9)
+        write_file(os.path.join(self.content, "about.md"), "About us. " * 100)
+        write_file(os.path.join(self.static, "site.css"), "body { color: red; }" * 50)
+        self.assertEqual(self.rebuild(), ["about.md"])
+        about = os.path.join(self.public, "about.html")
+        with open(about, 'rb') as f, gzip.open(about + ".gz") as gz:
+            self.assertEqual(gz.read(), f.read())
+        self.assertTrue(os.path.exists(os.path.join(self.public, "site.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html.gz")))
+
+        os.remove(os.path.join(self.content, "about.md"))
+        os.remove(os.path.join(self.static, "site.css"))
+        self.rebuild()
+        self.assertEqual(sorted(os.listdir(self.public)), ["index.css", "index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+def write_file(path, content):
+    """
+    Write a text file, creating its parent directories.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def read_tree(root):
+    """
+    Return the text of every file under root, keyed by relative path.
+    """
+    files = {}
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(dirpath, name)
+            with open(path) as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+class SiteTestCase(unittest.TestCase):
+    """
+    Test case with a site laid out in a temporary directory.
+
+    setUp sets root and, under it, content, static, template and public,
+    writes TEMPLATE to template.html and then writes files, the text of
+    each site file keyed by its path relative to root. A subclass lists
+    its pages in files and may replace template.html there.
+    """
+    files = {}
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.template = os.path.join(self.root, "template.html")
+        self.public = os.path.join(self.root, "public")
+        write_file(self.template, TEMPLATE)
+        self.write_files(self.files)
+
+    def write_files(self, files):
+        """
+        Write each file in files, keyed by its path relative to root.
+        """
+        for path, text in files.items():
+            write_file(os.path.join(self.root, path), text)
+
+    def read_public(self, *parts):
+        """
+        Return the text of a built file under public.
+        """
+        with open(os.path.join(self.public, *parts)) as f:
+            return f.read()
@@ -1,4 +1,4 @@
-from htmlnode import LeafNode
+from htmlnode import LeafNode, ParentNode
 from enum import Enum
 
 
@@ -11,34 +11,60 @@ class TextType(Enum):
     IMAGE = "image"
 
 
+# Tags for the text types that render as a plain tag around their text
+TEXT_TYPE_TAGS = {
+    TextType.TEXT: None,
+    TextType.BOLD: "b",
+    TextType.ITALIC: "i",
+    TextType.CODE: "code",
+}
+
+
 class TextNode:
-    def __init__(self, text, text_type, url=None):
+    __slots__ = ("text", "text_type", "url", "children")
+
+    def __init__(self, text, text_type, url=None, children=None):
         self.text = text
-        self.text_type = text_type.value
+        # The TextType member itself, so type checks are identity comparisons
+        self.text_type = text_type if type(text_type) is TextType else TextType(text_type)
         self.url = url
+        # Nested TextNodes when the formatted text contains further markup
+        self.children = children
 
     def __eq__(self, other):
         return (
             self.text == other.text
-            and self.text_type == other.text_type
+            and self.text_type is other.text_type
             and self.url == other.url
+            and self.children == other.children
         )
 
     def __repr__(self):
-        return f"TextNode({self.text}, {self.text_type}, {self.url})"
+        if self.children is not None:
+            return f"TextNode({self.text}, {self.text_type.value}, {self.url}, children: {self.children})"
+        return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
 
 def text_node_to_html_node(text_node):
-    if text_node.text_type == TextType.TEXT.value:
-        return LeafNode(None, text_node.text)
-    if text_node.text_type == TextType.BOLD.value:
-        return LeafNode("b", text_node.text)
-    if text_node.text_type == TextType.ITALIC.value:
-        return LeafNode("i", text_node.text)
-    if text_node.text_type == TextType.CODE.value:
-        return LeafNode("code", text_node.text)
-    if text_node.text_type == TextType.LINK.value:
+    if text_node.children is not None:
+        return nested_text_node_to_html_node(text_node)
+    text_type = text_node.text_type
+    if text_type in TEXT_TYPE_TAGS:
+        return LeafNode(TEXT_TYPE_TAGS[text_type], text_node.text)
+    if text_type is TextType.LINK:
         return LeafNode("a", text_node.text, {"href": text_node.url})
-    if text_node.text_type == TextType.IMAGE.value:
+    if text_type is TextType.IMAGE:
         return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
-    raise ValueError(f"Invalid text type: {text_node.text_type}")
+    raise ValueError(f"Invalid text type: {text_type}")
+
+
+def nested_text_node_to_html_node(text_node):
+    children = [text_node_to_html_node(child) for child in text_node.children]
+    text_type = text_node.text_type
+    if text_type is TextType.BOLD:
+        return ParentNode("b", children)
+    if text_type is TextType.ITALIC:
+        return ParentNode("i", children)
+    if text_type is TextType.LINK:
+        return ParentNode("a", children, {"href": text_node.url})
+    raise ValueError(f"Invalid nested text type: {text_type}")
@@ -0,0 +1,165 @@
+import os
+import time
+from compress import GzipSink
+from build import generate_pages_recursive, remove_output, update_pages
+from markdown_blocks import BlockCache
+from sinks import DIRECTORY_SINK
+from template import load_template
+
+
+def snapshot(directory):
+    """
+    Return {relative path: (mtime_ns, size)} for every file under directory.
+    """
+    files = {}
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = os.scandir(current)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    rel_path = os.path.relpath(entry.path, directory)
+                    files[rel_path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def diff_snapshots(old, new):
+    """
+    Return the paths that were added, removed or modified between snapshots.
+    """
+    return {path for path in old.keys() | new.keys() if old.get(path) != new.get(path)}
+
+
+class SiteWatcher:
+    """
+    Poll the content, static and template files and rebuild what changed.
+
+    Changes are collected until nothing has changed for ``debounce``
+    seconds, then applied together:
+
+    - a change to the template (or one of its partials) or to a
+      per-directory template runs an incremental build, which re-renders
+      exactly the pages using the changed template
+    - a markdown change re-renders (or removes) only that page
+    - a static file change copies (or removes) only that file
+
+    Rendered blocks are cached across rebuilds, so re-rendering a page
+    only parses the blocks that were edited. With a ``gzip_level``, every
+    file written gets its .gz copy as it is written.
+
+    Each poll walks the watched directories, so ``interval`` trades how
+    quickly an edit is noticed against the cost of polling while idle.
+    """
+
+    def __init__(self, content_dir, static_dir, template_path, public_dir,
+                 interval=0.25, debounce=0.025, jobs=1, copy_mode="copy",
+                 block_cache_size=4096, render_cache=None, gzip_level=None):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.public_dir = public_dir
+        self.interval = interval
+        self.debounce = debounce
+        self.jobs = jobs
+        self.copy_mode = copy_mode
+        self.block_cache = BlockCache(block_cache_size)
+        self.render_cache = render_cache
+        self.sink = GzipSink(gzip_level) if gzip_level is not None else DIRECTORY_SINK
+        self._template_files = [template_path]
+        self.content, self.static, self.templates = self._snapshot()
+
+    def _snapshot(self):
+        try:
+            self._template_files = load_template(self.template_path).dependencies
+        except (OSError, ValueError):
+            # Keep watching the last known files until the template is fixed
+            pass
+        templates = {}
+        for path in self._template_files:
+            try:
+                stat = os.stat(path)
+                templates[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                templates[path] = None
+        return snapshot(self.content_dir), snapshot(self.static_dir), templates
+
+    def poll(self):
+        """
+        Take a new snapshot and return (content, static, template_changed),
+        the changed content and static paths and whether the template did.
+        """
+        content, static, templates = self._snapshot()
+        changes = (
+            diff_snapshots(self.content, content),
+            diff_snapshots(self.static, static),
+            templates != self.templates,
+        )
+        self.content, self.static, self.templates = content, static, templates
+        return changes
+
+    def rebuild(self, content_changes, static_changes, template_changed):
+        """
+        Apply a batch of changes to the output directory.
+        """
+        markdown = {path for path in content_changes if path.endswith('.md')}
+        if template_changed or len(markdown) != len(content_changes):
+            generate_pages_recursive(
+                self.content_dir, self.template_path, self.public_dir, jobs=self.jobs,
+                block_cache=self.block_cache, render_cache=self.render_cache, sink=self.sink,
+            )
+        elif markdown:
+            update_pages(
+                self.content_dir, self.template_path, self.public_dir, markdown,
+                block_cache=self.block_cache, render_cache=self.render_cache, sink=self.sink,
+            )
+
+        for rel_path in sorted(static_changes):
+            src_file = os.path.join(self.static_dir, rel_path)
+            dest_file = os.path.join(self.public_dir, rel_path)
+            if os.path.exists(src_file):
+                self.sink.add_file(dest_file, src_file, self.copy_mode)
+                print(f"Copied: {dest_file}")
+            else:
+                remove_output(self.public_dir, rel_path)
+
+    def run(self, initial_build=None):
+        """
+        Watch for changes until interrupted.
+
+        Args:
+        initial_build (callable): Called before watching starts, e.g. to
+            build the whole site. The files were already snapshotted when
+            the watcher was created, so edits made while it runs are
+            rebuilt too.
+        """
+        if initial_build is not None:
+            initial_build()
+        print(f"Watching {self.content_dir}, {self.static_dir} and {self.template_path} for changes...")
+        content_changes, static_changes, template_changed = set(), set(), False
+        last_change = None
+        while True:
+            time.sleep(self.interval)
+            content, static, template = self.poll()
+            if content or static or template:
+                content_changes |= content
+                static_changes |= static
+                template_changed = template_changed or template
+                last_change = time.monotonic()
+                continue
+            if last_change is None or time.monotonic() - last_change < self.debounce:
+                continue
+            start = time.monotonic()
+            try:
+                self.rebuild(content_changes, static_changes, template_changed)
+                print(f"Rebuilt in {(time.monotonic() - start) * 1000:.0f} ms")
+            except Exception as e:
+                print(f"Rebuild failed: {e}")
+            content_changes, static_changes, template_changed = set(), set(), False
+            last_change = None